@@ -40,12 +40,20 @@ except importlib.metadata.PackageNotFoundError as e:
 from klass.classes.classification import KlassClassification
 from klass.classes.codes import KlassCodes
 from klass.classes.correspondence import KlassCorrespondence
+from klass.classes.crawler import KlassCatalogCrawler
 from klass.classes.family import KlassFamily
+from klass.classes.lookup import KlassLookup
+from klass.classes.matcher import KlassCodeMatcher
+from klass.classes.multimap import KlassMultiMap
+from klass.classes.poller import KlassChangePoller
 from klass.classes.search import KlassSearchClassifications
 from klass.classes.search import KlassSearchFamilies
+from klass.classes.search_index import KlassSearchIndex
 from klass.classes.variant import KlassVariant
 from klass.classes.variant import KlassVariantSearchByName
 from klass.classes.version import KlassVersion
+from klass.io.streaming import map_batches
+from klass.io.streaming import map_file
 from klass.requests.klass_requests import changes
 from klass.requests.klass_requests import classification_by_id
 from klass.requests.klass_requests import classification_search
@@ -54,6 +62,7 @@ from klass.requests.klass_requests import classificationfamilies_by_id
 from klass.requests.klass_requests import classifications
 from klass.requests.klass_requests import codes
 from klass.requests.klass_requests import codes_at
+from klass.requests.klass_requests import codes_at_many
 from klass.requests.klass_requests import correspondence_table_by_id
 from klass.requests.klass_requests import corresponds
 from klass.requests.klass_requests import corresponds_at
@@ -61,19 +70,31 @@ from klass.requests.klass_requests import variant
 from klass.requests.klass_requests import variant_at
 from klass.requests.klass_requests import variants_by_id
 from klass.requests.klass_requests import version_by_id
+from klass.requests.metadata_cache import clear_metadata_cache
+from klass.requests.metadata_cache import metadata_cache
 from klass.requests.sections import sections_dict
 from klass.requests.sections import sections_list
 from klass.utility.classification import get_classification
 from klass.utility.codes import get_codes
+from klass.utility.object_cache import clear_object_cache
+from klass.utility.object_cache import object_cache
+from klass.utility.profiling import KlassProfiler
 from klass.widgets.search_ipywidget import search_classification
 
 __all__ = [
+    "KlassCatalogCrawler",
+    "KlassChangePoller",
     "KlassClassification",
+    "KlassCodeMatcher",
     "KlassCodes",
     "KlassCorrespondence",
     "KlassFamily",
+    "KlassLookup",
+    "KlassMultiMap",
+    "KlassProfiler",
     "KlassSearchClassifications",
     "KlassSearchFamilies",
+    "KlassSearchIndex",
     "KlassVariant",
     "KlassVariantSearchByName",
     "KlassVersion",
@@ -83,13 +104,20 @@ __all__ = [
     "classificationfamilies",
     "classificationfamilies_by_id",
     "classifications",
+    "clear_metadata_cache",
+    "clear_object_cache",
     "codes",
     "codes_at",
+    "codes_at_many",
     "correspondence_table_by_id",
     "corresponds",
     "corresponds_at",
     "get_classification",
     "get_codes",
+    "map_batches",
+    "map_file",
+    "metadata_cache",
+    "object_cache",
     "search_classification",
     "sections_dict",
     "sections_list",
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from typing import Any
 from typing import Literal
 
 import pandas as pd
@@ -9,11 +11,15 @@ from ..requests.klass_types import ClassificationsByIdType
 from ..requests.klass_types import Language
 from ..requests.klass_types import OptionalLanguage
 from ..requests.klass_types import VersionPartType
+from ..utility.profiling import profiled
+from ..utility.versions import VersionIndex
 from .codes import KlassCodes
 from .correspondence import KlassCorrespondence
 from .variant import KlassVariant
 from .variant import KlassVariantSearchByName
+from .variant import cached_variant
 from .version import KlassVersion
+from .version import cached_version
 
 
 class KlassClassification:
@@ -39,6 +45,7 @@ class KlassClassification:
         include_future: Whether to include future versions of the classification.
     """
 
+    @profiled("KlassClassification")
     def __init__(
         self: Self,
         classification_id: str | int,
@@ -72,6 +79,7 @@ class KlassClassification:
             )
 
         self.versions: list[VersionPartType] = version_replace
+        self.version_index = VersionIndex(self.versions)
 
     def __str__(self) -> str:
         """Print a readable string of the classification, including some of its attributes."""
@@ -105,36 +113,68 @@ class KlassClassification:
         select_level: int | None = None,
         language: OptionalLanguage = None,
         include_future: bool | None = None,
+        date: str | None = None,
     ) -> KlassVersion:
-        """Return a KlassVersion object of the classification based on ID.
+        """Return a KlassVersion object of the classification based on ID, or the version valid at a date.
 
         A Version in Klass is a Classification placed in time.
-        If no ID is specified, will get the first version under the attribute .versions on this class.
+        Versions are kept in an in-process cache, so getting the same version again returns the same, already parsed, object.
+        If no ID or date is specified, will get the version with the latest validFrom under the attribute .versions on this class.
 
         Args:
             version_id: The version ID of the version.
             select_level: The level of the version to keep in the data.
             language: The language of the version. "nn", "nb" or "en".
             include_future: Whether to include future versions of the version.
+            date: Get the version valid at this date instead, if no version_id is specified. "YYYY-MM-DD".
 
         Returns:
             KlassVersion: A KlassVersion object of the specified ID.
+
+        Raises:
+            ValueError: If no version of the classification is valid at the date.
         """
+        if not version_id and date:
+            version_id = self.version_index.version_id_at(date)
+            if version_id is None:
+                raise ValueError(
+                    f"No version of classification {self.classification_id} is valid at {date}: {self.version_index}"
+                )
         if not version_id:
-            version_id = sorted(self.versions, key=lambda x: x["validFrom"])[-1][
-                "version_id"
-            ]
+            version_id = self.version_index.latest()
         if not language:
             language = self.language
         if include_future is None:
             include_future = self.include_future
-        return KlassVersion(
+        return cached_version(
             str(version_id),
             select_level=select_level,
             language=language,
             include_future=include_future,
         )
 
+    def version_id_at(self, date: str) -> int | None:
+        """Get the ID of the version valid at a date, using the versions on this object instead of asking the API.
+
+        Args:
+            date: The date to look up. "YYYY-MM-DD".
+
+        Returns:
+            int | None: The ID of the version, None if no version is valid at the date.
+        """
+        return self.version_index.version_id_at(date)
+
+    def version_ids_at(self, dates: Iterable[str] | pd.Series) -> pd.Series:
+        """Get the IDs of the versions valid at many dates, for routing each record in a dataset to the right version.
+
+        Args:
+            dates: The dates to look up. If a pandas Series is sent in, the result keeps its index.
+
+        Returns:
+            pd.Series: The version IDs as nullable integers, NA where no version is valid.
+        """
+        return self.version_index.version_ids_at(dates)
+
     def versions_dict(self) -> dict[int, str]:
         """Reformats the versions into a simple dict with just the IDs as keys and names as values.
 
@@ -332,7 +372,7 @@ class KlassClassification:
                 + ",\n".join(variants.values())
             )
         variant_id: str = results[0]
-        return KlassVariant(variant_id)
+        return cached_variant(variant_id)
 
     def join_all_variants_correspondences_on_data(
         self,
@@ -363,3 +403,40 @@ class KlassClassification:
             code_col_name,
             include_cols,
         )
+
+    def join_all_variants_correspondences_on_partitions(
+        self,
+        data: Any,
+        version_id: int | None = None,
+        shortname_len: int = 3,
+        code_col_name: str = "code",
+        include_cols: list[str] | None = None,
+        max_workers: int | None = None,
+        categorical: bool = False,
+    ) -> Any:
+        """Join both variants and correspondences onto partitioned data, a Dask DataFrame or an iterator of pandas DataFrames.
+
+        The mappings are built once, and applied to the partitions in parallel, see KlassVersion.join_all_variants_correspondences_on_partitions.
+
+        Args:
+            data: A Dask DataFrame, or an iterable of pandas DataFrames.
+            version_id: If you want, specify the ID of the version. If None, will get the "latest" version for the classification.
+            shortname_len: Amount of words from the correspondences and variants that the new column names will be constructed from.
+            code_col_name: The column in the data to join the code on.
+            include_cols: A list of the columns from the correspondences and variants you want to include when adding to the data.
+            max_workers: The amount of processes used for pandas chunks. Defaults to the amount of cores.
+            categorical: Store the joined columns as categoricals, to use bytes instead of strings per row.
+
+        Returns:
+            Any: A Dask DataFrame, or an iterator of pandas DataFrames, with the variants and correspondences joined on.
+        """
+        return self.get_version(
+            version_id
+        ).join_all_variants_correspondences_on_partitions(
+            data,
+            shortname_len,
+            code_col_name,
+            include_cols,
+            max_workers,
+            categorical,
+        )
@@ -1,14 +1,25 @@
 from collections import defaultdict
+from collections.abc import Iterable
 from datetime import datetime
+from typing import TYPE_CHECKING
+from typing import Any
 
 import pandas as pd
 from typing_extensions import Self
 
-from ..requests.klass_requests import codes
-from ..requests.klass_requests import codes_at
+from ..requests.klass_requests import codes_at_many
+from ..requests.klass_requests import codes_at_records
+from ..requests.klass_requests import codes_records
 from ..requests.klass_types import Language
-from ..utility.filters import apply_presentation_name_fallback
-from ..utility.filters import limit_na_level
+from ..utility.dtypes import compact_dtypes
+from ..utility.filters import MappingMemo
+from ..utility.profiling import phase
+from ..utility.profiling import profiled
+from .lookup import KlassLookup
+from .matcher import KlassCodeMatcher
+
+if TYPE_CHECKING:
+    import polars as pl
 
 
 class KlassCodes:
@@ -27,6 +38,7 @@ class KlassCodes:
         include_future: Whether to include future codes. Defaults to False.
     """
 
+    @profiled("KlassCodes")
     def __init__(
         self,
         classification_id: str | int,
@@ -48,6 +60,7 @@ class KlassCodes:
         self.presentation_name_pattern = presentation_name_pattern
         self.language: Language = language
         self.include_future = include_future
+        self._mappings = MappingMemo()
         self.get_codes()
 
     def __repr__(self) -> str:
@@ -65,7 +78,7 @@ class KlassCodes:
 
     def __str__(self) -> str:
         """Print a readable string of the codelist, including some of its attributes."""
-        unique_levels = ", ".join(self.data["level"].unique())
+        unique_levels = ", ".join(str(level) for level in self.data["level"].unique())
         some_names = ", \n\t- ".join(
             self.data[self.data["name"].notna()]["name"].value_counts().iloc[:5].index
         )
@@ -125,7 +138,7 @@ class KlassCodes:
             ValueError: If the returned dataframe is empty, there is probably something too narrow in the parameters.
         """
         if self.to_date:
-            self.data = codes(
+            records = codes_records(
                 classification_id=self.classification_id,
                 from_date=self.from_date,
                 to_date=self.to_date,
@@ -136,7 +149,7 @@ class KlassCodes:
                 include_future=self.include_future,
             )
         else:
-            self.data = codes_at(
+            records = codes_at_records(
                 classification_id=self.classification_id,
                 date=self.from_date,
                 select_codes=self.select_codes,
@@ -145,12 +158,96 @@ class KlassCodes:
                 language=self.language,
                 include_future=self.include_future,
             )
-        if len(self.data) == 0 and raise_on_empty_data:
+        if len(records) == 0 and raise_on_empty_data:
             raise ValueError(
                 "Empty data, no codes found for the specified parameters. Maybe your select_codes or select_level is too narrow?"
             )
+        # The codes are normalized into .data on first access, to_polars() can skip pandas altogether
+        self._records: list[dict[str, Any]] | None = records
+        self._data: pd.DataFrame | None = None
+        self._mappings.clear()
         return self
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """The codes as a dataframe, built from the records the first time it is accessed, setting it forgets the mappings remembered by to_dict()."""
+        if self._data is None:
+            with phase("normalize"):
+                self._data = pd.json_normalize(self._records or [])
+            self._records = None
+        return self._data
+
+    @data.setter
+    def data(self, value: pd.DataFrame) -> None:
+        self._data = value
+        self._records = None
+        self._mappings.clear()
+
+    def compact_dtypes(self) -> Self:
+        """Convert the .data to dtypes using less memory, levels to small integers, dates to datetime64 and codes to categoricals.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        self.data = compact_dtypes(self.data)
+        return self
+
+    def to_polars(self) -> "pl.DataFrame":
+        """Get the codes as a Polars DataFrame, needs the optional dependency polars.
+
+        If the .data has not been built yet, the Polars DataFrame is built straight from the records,
+        skipping pandas altogether. Otherwise the .data is converted with pandas_to_polars().
+
+        Returns:
+            pl.DataFrame: The codes.
+        """
+        from ..io.polars_frames import pandas_to_polars
+        from ..io.polars_frames import records_to_polars
+
+        if self._data is None:
+            return records_to_polars(self._records or [])
+        return pandas_to_polars(self._data)
+
+    def at_dates(
+        self, dates: Iterable[str], long_format: bool = False
+    ) -> dict[str, pd.DataFrame] | pd.DataFrame:
+        """Get the codelist at many dates, with the same parameters as this codelist.
+
+        Only does one request for each distinct version of the classification the dates fall in,
+        so monthly dates over 30 years usually need just a handful of requests.
+
+        Args:
+            dates: The dates to get codes for. "YYYY-MM-DD".
+            long_format: Set to True to get a single DataFrame with a "date" column,
+                instead of a dict of DataFrames.
+
+        Returns:
+            dict[str, pd.DataFrame] | pd.DataFrame: The dates as keys and their codes as values,
+                or all of them stacked in a long DataFrame, empty with the columns of .data when no dates are given.
+        """
+        dates = list(dates)
+        if not dates:
+            if not long_format:
+                return {}
+            return self.data.iloc[:0].assign(date=pd.Series(dtype=str))[
+                ["date", *self.data.columns]
+            ]
+        result = codes_at_many(
+            classification_id=self.classification_id,
+            dates=dates,
+            select_codes=self.select_codes,
+            select_level=self.select_level,
+            presentation_name_pattern=self.presentation_name_pattern,
+            language=self.language,
+            include_future=self.include_future,
+        )
+        if not long_format:
+            return result
+        return pd.concat(
+            [data.assign(date=day) for day, data in result.items()], ignore_index=True
+        )[["date", *next(iter(result.values())).columns]]
+
+    @profiled("KlassCodes.to_dict")
     def to_dict(
         self,
         key: str = "code",
@@ -162,6 +259,7 @@ class KlassCodes:
         """Extract two columns from the data, turning them into a dict.
 
         If you specify a value for "other", returns a defaultdict instead.
+        The mapping is built once per combination of parameters, later calls get their own copy, until .data is replaced, refetched or edited.
 
         Args:
             key: The name of the column with the values you want as keys.
@@ -179,12 +277,53 @@ class KlassCodes:
                 value = "presentationName"
             else:
                 value = "name"
-        data, value_col = apply_presentation_name_fallback(self.data, value)
-        limit_data = limit_na_level(data, key, value_col, remove_na, select_level)
-        mapping = dict(zip(limit_data[key], limit_data[value_col], strict=False))
+        mapping = self._mappings.mapping(self.data, key, value, remove_na, select_level)
         if other:
-            mapping = defaultdict(lambda: other, mapping)
-        return mapping
+            return defaultdict(lambda: other, mapping)
+        return dict(mapping)
+
+    def to_lookup(
+        self,
+        key: str = "code",
+        value: str | None = None,
+        other: str | None = None,
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> KlassLookup:
+        """Extract two columns from the data into a compact, immutable lookup, cheap to send to other processes.
+
+        Takes the same parameters as to_dict().
+
+        Args:
+            key: The name of the column with the values you want as keys.
+            value: The name of the column with the values you want as values. Defaults to "name", or "presentationName" if a pattern is set.
+            other: The value the lookup maps missing codes to.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+            select_level: Keep only a specific level.
+
+        Returns:
+            KlassLookup: The lookup, backed by sorted numpy arrays.
+        """
+        return KlassLookup.from_mapping(
+            self.to_dict(key, value, remove_na=remove_na, select_level=select_level),
+            other=other,
+        )
+
+    def get_matcher(
+        self,
+        fields: Iterable[str] = ("name", "shortName", "notes"),
+        n: int = 3,
+    ) -> KlassCodeMatcher:
+        """Get a fuzzy matcher, for assigning codes from this codelist to free-text values.
+
+        Args:
+            fields: The columns with text to match against.
+            n: The length of the character n-grams compared.
+
+        Returns:
+            KlassCodeMatcher: The matcher, built over the current .data.
+        """
+        return KlassCodeMatcher(self.data, fields=fields, n=n)
 
     def pivot_level(self, keep: list[str] | None = None) -> pd.DataFrame:
         """Pivot levels into separate columns and number columns based on levels as suffixes.
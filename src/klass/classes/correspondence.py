@@ -1,6 +1,7 @@
 from calendar import monthrange
 from collections import defaultdict
 from datetime import date
+from typing import TYPE_CHECKING
 
 import dateutil.parser
 import pandas as pd
@@ -11,9 +12,22 @@ from ..requests.klass_requests import correspondence_table_by_id
 from ..requests.klass_requests import corresponds
 from ..requests.klass_types import CorrespondsType
 from ..requests.klass_types import Language
+from ..requests.klass_types import PeriodFrequency
 from ..requests.klass_types import T_correspondanceMaps
-from ..utility.filters import apply_presentation_name_fallback
-from ..utility.filters import limit_na_level
+from ..utility.dtypes import compact_dtypes
+from ..utility.filters import MappingMemo
+from ..utility.filters import mapping_columns
+from ..utility.profiling import phase
+from ..utility.profiling import profiled
+from .lookup import KlassLookup
+from .multimap import KlassMultiMap
+from .multimap import multimap_from_frame
+
+if TYPE_CHECKING:
+    import polars as pl
+
+
+PERIOD_FREQUENCIES: dict[PeriodFrequency, str] = {"quarter": "Q", "month": "M"}
 
 
 class KlassCorrespondence:
@@ -63,6 +77,7 @@ class KlassCorrespondence:
         include_future: bool = ...,
     ) -> None: ...
 
+    @profiled("KlassCorrespondence")
     def __init__(
         self: Self,
         correspondence_id: str | int | None = None,
@@ -82,6 +97,7 @@ class KlassCorrespondence:
         self.contain_quarter = contain_quarter
         self.language: Language = language
         self.include_future = include_future
+        self._mappings = MappingMemo()
 
         self.get_correspondence()
 
@@ -173,9 +189,42 @@ class KlassCorrespondence:
             raise ValueError(
                 "Please set correspondence ID, or source and target classification IDs + from_date"
             )
-        self.data = pd.json_normalize(self.correspondence)
+        with phase("normalize"):
+            self.data = pd.json_normalize(self.correspondence)
+        self._mappings.clear()
         return self
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """The correspondences as a dataframe, setting it forgets the mappings remembered by to_dict()."""
+        return self._data
+
+    @data.setter
+    def data(self, value: pd.DataFrame) -> None:
+        self._data = value
+        self._mappings.clear()
+
+    def compact_dtypes(self) -> Self:
+        """Convert the .data to dtypes using less memory, levels to small integers, dates to datetime64 and codes to categoricals.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        self.data = compact_dtypes(self.data)
+        return self
+
+    def to_polars(self) -> "pl.DataFrame":
+        """Get the correspondence as a Polars DataFrame, built straight from the records from the API.
+
+        Needs the optional dependency polars.
+
+        Returns:
+            pl.DataFrame: The correspondence, with the same columns as the .data.
+        """
+        from ..io.polars_frames import records_to_polars
+
+        return records_to_polars(self.correspondence)
+
     def _last_date_of_quarter(self) -> str:
         """Calculate the last date of the quarter.
 
@@ -199,6 +248,106 @@ class KlassCorrespondence:
         )
         return str(date_of_last_day_of_quarter)
 
+    def periods(self, frequency: PeriodFrequency = "quarter") -> pd.PeriodIndex:
+        """Get the quarters or months between from_date and to_date.
+
+        A period starting on the to_date is left out, as the API treats to_date as the end of the range.
+
+        Args:
+            frequency: "quarter" or "month".
+
+        Returns:
+            pd.PeriodIndex: The periods, the one containing from_date first.
+
+        Raises:
+            ValueError: If from_date is not set.
+        """
+        if not self.from_date:
+            raise ValueError(
+                "Can't split the correspondence into periods without from_date"
+            )
+        to_date = pd.Timestamp(self.to_date or self.from_date)
+        periods = pd.period_range(
+            self.from_date, to_date, freq=PERIOD_FREQUENCIES[frequency]
+        )
+        if self.to_date:
+            periods = periods[(periods.start_time < to_date) | (periods == periods[0])]
+        return periods
+
+    def period_frame(self, frequency: PeriodFrequency = "quarter") -> pd.DataFrame:
+        """Slice the data into the quarters or months it is valid in, as one long dataframe.
+
+        Fetch a whole span once, by setting both from_date and to_date, instead of one correspondence per quarter.
+        A row is in a period if it is valid on any day of it, so rows changing during a period are in it twice.
+
+        Example:
+            correspondence = KlassCorrespondence(
+                source_classification_id="131",
+                target_classification_id="104",
+                from_date="2018-01-01",
+                to_date="2024-01-01",
+            )
+            quarterly = correspondence.period_frame("quarter")
+
+        Args:
+            frequency: "quarter" or "month".
+
+        Returns:
+            pd.DataFrame: The rows of the data valid in each period, with the period in the column "period",
+                like "2023Q1" or "2023-01".
+
+        Raises:
+            ValueError: If the data has no validFrom and validTo columns,
+                like correspondences fetched by correspondence_id.
+        """
+        if not {"validFrom", "validTo"} <= set(self.data.columns):
+            raise ValueError(
+                "The data has no validFrom and validTo, get the correspondence from source and target classification IDs."
+            )
+        valid_from = pd.to_datetime(self.data["validFrom"], errors="coerce")
+        valid_to = pd.to_datetime(self.data["validTo"], errors="coerce")
+        slices = []
+        for period in self.periods(frequency):
+            mask = (valid_from.isna() | (valid_from <= period.end_time)) & (
+                valid_to.isna() | (valid_to > period.start_time)
+            )
+            slices.append(self.data.loc[mask].assign(period=str(period)))
+        if not slices:
+            return self.data.iloc[:0].assign(period=pd.Series(dtype=str))
+        return pd.concat(slices, ignore_index=True)
+
+    def to_period_dicts(
+        self,
+        frequency: PeriodFrequency = "quarter",
+        key: str = "sourceCode",
+        value: str = "targetCode",
+        other: str | None = None,
+        remove_na: bool = True,
+    ) -> dict[str, dict[str, str | None] | defaultdict[str, str | None]]:
+        """Get a mapping per quarter or month, like calling to_dict() on one correspondence per period.
+
+        Args:
+            frequency: "quarter" or "month".
+            key: The name of the column with the values you want as keys.
+            value: The name of the column with the values you want as values in your dicts.
+            other: The value to use for keys that don't exist in the data.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+
+        Returns:
+            dict[str, dict[str, str | None] | defaultdict[str, str | None]]: The periods, like "2023Q1", as keys,
+                with the mappings valid in them as values.
+        """
+        frame = self.period_frame(frequency)
+        result: dict[str, dict[str, str | None] | defaultdict[str, str | None]] = {}
+        for period in self.periods(frequency).astype(str):
+            keys, values = mapping_columns(
+                frame[frame["period"] == period], key, value, remove_na
+            )
+            mapping = dict(zip(keys, values, strict=False))
+            result[period] = defaultdict(lambda: other, mapping) if other else mapping
+        return result
+
+    @profiled("KlassCorrespondence.to_dict")
     def to_dict(
         self,
         key: str = "sourceCode",
@@ -210,6 +359,7 @@ class KlassCorrespondence:
         """Extract two columns from the data, turning them into a dict.
 
         If you specify a value for "other", returns a defaultdict instead.
+        The mapping is built once per combination of parameters, later calls get their own copy, until .data is replaced, refetched or edited.
 
         Columns in the data are 'sourceCode', 'sourceName', 'sourceShortName',
         'targetCode', 'targetName', 'targetShortName', 'validFrom', 'validTo'.
@@ -224,9 +374,93 @@ class KlassCorrespondence:
         Returns:
             dict[str, str | None] | defaultdict[str, str | None]: The dictionary of the correspondence.
         """
-        data, value_col = apply_presentation_name_fallback(self.data, value)
-        limit_data = limit_na_level(data, key, value_col, remove_na, select_level)
-        mapping = dict(zip(limit_data[key], limit_data[value_col], strict=False))
+        mapping = self._mappings.mapping(self.data, key, value, remove_na, select_level)
         if other:
-            mapping = defaultdict(lambda: other, mapping)
-        return mapping
+            return defaultdict(lambda: other, mapping)
+        return dict(mapping)
+
+    def to_lookup(
+        self,
+        key: str = "sourceCode",
+        value: str = "targetCode",
+        other: str | None = None,
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> KlassLookup:
+        """Extract two columns from the data into a compact, immutable lookup, cheap to send to other processes.
+
+        Takes the same parameters as to_dict(). When a source code has several targets, the last one is kept, like in to_dict().
+
+        Args:
+            key: The name of the column with the values you want as keys.
+            value: The name of the column with the values you want as values.
+            other: The value the lookup maps missing codes to.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+            select_level: Keep only a specific level.
+
+        Returns:
+            KlassLookup: The lookup, backed by sorted numpy arrays.
+        """
+        return KlassLookup.from_mapping(
+            self.to_dict(key, value, remove_na=remove_na, select_level=select_level),
+            other=other,
+        )
+
+    def to_multimap(
+        self,
+        key: str = "sourceCode",
+        value: str = "targetCode",
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> KlassMultiMap:
+        """Extract two columns from the data, keeping every target of a source code, unlike to_dict().
+
+        Use inverse() on the result to go from the target codes back to all of their source codes.
+
+        Args:
+            key: The name of the column with the codes to map from.
+            value: The name of the column with the codes to map to.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+            select_level: Keep only a specific level.
+
+        Returns:
+            KlassMultiMap: The codes of the key column, each with all of its codes in the value column.
+        """
+        return multimap_from_frame(self.data, key, value, remove_na, select_level)
+
+    def allocate(
+        self,
+        data: pd.DataFrame,
+        value_cols: str | list[str],
+        code_col_name: str = "sourceCode",
+        new_col_name: str = "targetCode",
+        weights: pd.Series | None = None,
+        keep_missing: bool = True,
+    ) -> pd.DataFrame:
+        """Divide measures on source codes between all their target codes, keeping the totals unchanged.
+
+        Source codes split between several targets get their values divided equally,
+        or in proportion to the weights of the targets. See KlassMultiMap.allocate() for the details.
+
+        Example:
+            correspondence.allocate(persons_per_bydel, "persons", "bydel", "kommune", weights=population)
+
+        Args:
+            data: The dataframe with the measures, it is not changed.
+            value_cols: The column or columns with the measures to divide.
+            code_col_name: The column in the data with the source codes.
+            new_col_name: The column to put the target codes in.
+            weights: Weights indexed by target code, or by (source code, target code).
+            keep_missing: Keep rows with source codes missing from the correspondence, with NA as target.
+
+        Returns:
+            pd.DataFrame: One row per source row and target, with its share of the measures.
+        """
+        return self.to_multimap().allocate(
+            data,
+            code_col_name,
+            value_cols,
+            new_col_name,
+            weights=weights,
+            keep_missing=keep_missing,
+        )
@@ -0,0 +1,452 @@
+import json
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import requests
+from typing_extensions import Self
+
+from ..requests.klass_requests import classification_by_id
+from ..requests.klass_requests import classification_by_id_call
+from ..requests.klass_requests import classificationfamilies
+from ..requests.klass_requests import classificationfamilies_by_id
+from ..requests.klass_requests import classificationfamilies_by_id_call
+from ..requests.klass_requests import version_by_id
+from ..requests.klass_requests import version_by_id_call
+from ..requests.klass_types import CatalogNodeKind
+from ..requests.klass_types import CatalogNodeType
+from ..requests.klass_types import Language
+from ..requests.session import prefetch
+from ..requests.transport import ParamsType
+
+logger = logging.getLogger(__name__)
+
+# A queued node: kind, ID and the key of the node it was found under
+QueueItem = tuple[str, str, str]
+NODE_COLUMNS: list[str] = ["key", "kind", "id", "name", "parent"]
+# The root of the tree, the families-endpoint, is not a node in the manifest itself
+ROOT_KEY: str = "catalog:"
+
+
+def _node_key(kind: str, node_id: str | int) -> str:
+    return f"{kind}:{node_id}"
+
+
+def _id_from_links(part: dict[str, Any]) -> str:
+    return str(part["_links"]["self"]["href"].split("/")[-1])
+
+
+class KlassCatalogCrawler:
+    """Walk the KLASS-tree breadth-first, from families, to classifications, to versions, to variants and correspondences.
+
+    The requests on each level are sent in batches of checkpoint_every, through the get_many() of the transport,
+    with at most max_workers requests in flight.
+    Nodes shared by several parents, like correspondence tables between two classifications,
+    are only requested once, but all the edges to them are kept.
+    Only the metadata is requested, no codelists, so crawling a whole section is a request per
+    family, classification and version.
+
+    The result is a manifest of nodes and edges, which can be saved as JSON or turned into dataframes.
+    With a checkpoint_path, progress is written to disk while crawling,
+    and an interrupted crawl can be picked up again with resume().
+
+    Example:
+        crawler = KlassCatalogCrawler(ssbsection="426", checkpoint_path="catalog.json")
+        crawler.crawl()
+        crawler.to_frame()
+
+    Args:
+        ssbsection: Limit the crawl to the families and classifications owned by this section.
+        classification_ids: Start from these classifications instead of from the families.
+        include_versions: Whether to crawl the versions, and the variants and correspondences listed on them.
+        language: The language of the names. "nb", "nn" or "en".
+        include_future: Whether to include future versions of the classifications.
+        max_workers: The maximum amount of requests sent at the same time.
+        checkpoint_path: A JSON-file to write the progress to while crawling.
+        checkpoint_every: Send this many requests in each batch, writing the checkpoint after each batch.
+    """
+
+    def __init__(
+        self,
+        ssbsection: str = "",
+        classification_ids: Iterable[str | int] | None = None,
+        include_versions: bool = True,
+        language: Language = "nb",
+        include_future: bool = False,
+        max_workers: int = 8,
+        checkpoint_path: str | Path | None = None,
+        checkpoint_every: int = 50,
+    ) -> None:
+        self.ssbsection = ssbsection
+        self.include_versions = include_versions
+        self.language: Language = language
+        self.include_future = include_future
+        self.max_workers = max_workers
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+
+        self.nodes: dict[str, CatalogNodeType] = {}
+        self.edges: list[tuple[str, str]] = []
+        # Failed node keys, with the error and the parent it was found under
+        self.failed: dict[str, dict[str, str]] = {}
+        if classification_ids is None:
+            self.queue: list[QueueItem] = [("catalog", "", ROOT_KEY)]
+        else:
+            self.queue = [
+                ("classification", str(cid), ROOT_KEY) for cid in classification_ids
+            ]
+        self.requests_done = 0
+        self._seen: set[str] = set()
+        self._update_seen()
+
+    def __repr__(self) -> str:
+        """Get a string representation of the crawler and its progress."""
+        return f"KlassCatalogCrawler(ssbsection='{self.ssbsection}') # {len(self.nodes)} nodes, {len(self.queue)} queued"
+
+    def __str__(self) -> str:
+        """Print a summary of what the crawler has found so far."""
+        counts = pd.Series([n["kind"] for n in self.nodes.values()]).value_counts()
+        found = "\n\t".join(f"{k}: {v}" for k, v in counts.items())
+        return f"""Catalog crawl{" of section " + self.ssbsection if self.ssbsection else ""}
+        Finished: {self.finished}
+        Requests done: {self.requests_done}, failed: {len(self.failed)}, queued: {len(self.queue)}
+        Found:
+\t{found}
+        """
+
+    @property
+    def finished(self) -> bool:
+        """Whether there is nothing left in the queue."""
+        return not self.queue
+
+    def crawl(self, retry_failed: bool = False) -> dict[str, Any]:
+        """Crawl until the queue is empty, level by level.
+
+        Args:
+            retry_failed: Put the nodes that failed on a previous run back into the queue first.
+
+        Returns:
+            dict[str, Any]: The manifest, see manifest().
+        """
+        if retry_failed:
+            self._requeue_failed()
+        while self.queue:
+            self._crawl_level()
+            self.checkpoint()
+        return self.manifest()
+
+    def _update_seen(self) -> None:
+        """Collect the keys of every node found, failed or queued, used to only request each node once."""
+        self._seen = (
+            set(self.nodes)
+            | set(self.failed)
+            | {_node_key(kind, node_id) for kind, node_id, _ in self.queue}
+        )
+
+    def _requeue_failed(self) -> None:
+        """Move the failed nodes back into the queue."""
+        for key, failure in self.failed.items():
+            kind, node_id = key.split(":", 1)
+            self.queue.append((kind, node_id, failure["parent"]))
+        self.failed = {}
+
+    def _crawl_level(self) -> None:
+        """Request every node in the queue, a batch at a time, queueing their children as the next level."""
+        level = self.queue
+        # Keep the unfinished part of the level in the queue, so a checkpoint mid-level is resumable
+        remaining = dict.fromkeys(level)
+        next_level: list[QueueItem] = []
+        batch_size = max(self.checkpoint_every, 1)
+        for start in range(0, len(level), batch_size):
+            batch = level[start : start + batch_size]
+            calls = [self._call(kind, node_id) for kind, node_id, _ in batch]
+            with prefetch(
+                (call for call in calls if call is not None),
+                max_concurrent=self.max_workers,
+            ):
+                for item in batch:
+                    kind, node_id, parent = item
+                    key = _node_key(kind, node_id)
+                    try:
+                        result = self._fetch(kind, node_id)
+                    except requests.RequestException as e:
+                        logger.warning("Failed getting %s: %s", key, e)
+                        self.failed[key] = {"error": str(e), "parent": parent}
+                    else:
+                        next_level += self._register(kind, node_id, parent, result)
+                    del remaining[item]
+                    self.requests_done += 1
+            self.queue = list(remaining) + next_level
+            self.checkpoint()
+        self.queue = next_level
+
+    def _call(self, kind: str, node_id: str) -> tuple[str, ParamsType] | None:
+        """Get the URL and parameters _fetch() sends for a node, to send them together in a batch.
+
+        The catalog is a single request, its listing of families is left to the metadata cache.
+        """
+        if kind == "catalog":
+            return None
+        if kind == "family":
+            return classificationfamilies_by_id_call(
+                node_id, ssbsection=self.ssbsection, language=self.language
+            )
+        if kind == "classification":
+            return classification_by_id_call(
+                node_id, language=self.language, include_future=self.include_future
+            )
+        return version_by_id_call(
+            node_id, language=self.language, include_future=self.include_future
+        )
+
+    def _fetch(self, kind: str, node_id: str) -> Any:
+        """Get the metadata of a single node, from the batch sent ahead, or from the API."""
+        if kind == "catalog":
+            return classificationfamilies(
+                ssbsection=self.ssbsection, language=self.language
+            )
+        if kind == "family":
+            return classificationfamilies_by_id(
+                node_id, ssbsection=self.ssbsection, language=self.language
+            )
+        if kind == "classification":
+            return classification_by_id(
+                node_id, language=self.language, include_future=self.include_future
+            )
+        return version_by_id(
+            node_id, language=self.language, include_future=self.include_future
+        )
+
+    def _register(
+        self, kind: str, node_id: str, parent: str, result: Any
+    ) -> list[QueueItem]:
+        """Add a fetched node to the manifest, returning the children not seen before, that need requests."""
+        if kind == "catalog":
+            families = result.get("_embedded", {}).get("classificationFamilies", [])
+            return self._children(
+                ROOT_KEY, "family", [_id_from_links(f) for f in families]
+            )
+        key = _node_key(kind, node_id)
+        self._add_edge(parent, key)
+        if kind == "family":
+            self._add_node("family", node_id, result["name"], parent, {})
+            return self._children(
+                key,
+                "classification",
+                [_id_from_links(c) for c in result["classifications"]],
+            )
+        if kind == "classification":
+            self._add_node(
+                "classification",
+                node_id,
+                result.get("name", ""),
+                parent,
+                {
+                    "classificationType": result.get("classificationType", ""),
+                    "owningSection": result.get("owningSection", ""),
+                    "lastModified": result.get("lastModified", ""),
+                },
+            )
+            if not self.include_versions:
+                return []
+            return self._children(
+                key,
+                "version",
+                [_id_from_links(v) for v in result.get("versions", [])],
+            )
+        self._add_node(
+            "version",
+            node_id,
+            result["name"],
+            parent,
+            {
+                "validFrom": result["validFrom"],
+                "validTo": result.get("validTo", ""),
+                "lastModified": result["lastModified"],
+            },
+        )
+        # Variants and correspondences are listed in full on the version, they need no requests of their own
+        for variant in result.get("classificationVariants", []):
+            self._add_leaf(key, "variant", variant, {})
+        for table in result.get("correspondenceTables", []):
+            self._add_leaf(
+                key,
+                "correspondence",
+                table,
+                {
+                    "source": table.get("source", ""),
+                    "sourceId": str(table.get("sourceId", "")),
+                    "target": table.get("target", ""),
+                    "targetId": str(table.get("targetId", "")),
+                },
+            )
+        return []
+
+    def _children(
+        self, parent: str, kind: str, child_ids: list[str]
+    ) -> list[QueueItem]:
+        """Return the children that are not already found or queued, only recording the edges to the others."""
+        new: list[QueueItem] = []
+        for child_id in child_ids:
+            key = _node_key(kind, child_id)
+            if key in self._seen:
+                self._add_edge(parent, key)
+            else:
+                self._seen.add(key)
+                new.append((kind, child_id, parent))
+        return new
+
+    def _add_leaf(
+        self,
+        parent: str,
+        kind: CatalogNodeKind,
+        part: dict[str, Any],
+        attributes: dict[str, str],
+    ) -> None:
+        leaf_id = _id_from_links(part)
+        key = _node_key(kind, leaf_id)
+        self._add_edge(parent, key)
+        if key not in self._seen:
+            self._seen.add(key)
+            self._add_node(
+                kind,
+                leaf_id,
+                part["name"],
+                parent,
+                {"owningSection": part.get("owningSection", ""), **attributes},
+            )
+
+    def _add_node(
+        self,
+        kind: CatalogNodeKind,
+        node_id: str,
+        name: str,
+        parent: str,
+        attributes: dict[str, str],
+    ) -> None:
+        self.nodes[_node_key(kind, node_id)] = {
+            "kind": kind,
+            "id": node_id,
+            "name": name,
+            "parent": parent,
+            "attributes": attributes,
+        }
+
+    def _add_edge(self, parent: str, child: str) -> None:
+        if parent != ROOT_KEY:
+            self.edges.append((parent, child))
+
+    def manifest(self) -> dict[str, Any]:
+        """Get everything found so far, and what is left, as a JSON-serializable dict.
+
+        Returns:
+            dict[str, Any]: The settings of the crawl, the "nodes" by key ("kind:id"), the "edges" as (parent, child)-pairs,
+            the keys of "failed" nodes with their errors and parents, and the "queue" of nodes left to request.
+        """
+        return {
+            "settings": {
+                "ssbsection": self.ssbsection,
+                "include_versions": self.include_versions,
+                "language": self.language,
+                "include_future": self.include_future,
+            },
+            "finished": self.finished,
+            "requests_done": self.requests_done,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "failed": self.failed,
+            "queue": self.queue,
+        }
+
+    def checkpoint(self) -> None:
+        """Write the manifest to the checkpoint_path, if it is set. Writes to a temporary file first, so an interruption does not corrupt it."""
+        if self.checkpoint_path is None:
+            return
+        self.save(self.checkpoint_path)
+
+    def save(self, path: str | Path) -> None:
+        """Write the manifest to a JSON-file.
+
+        Args:
+            path: The path to the file.
+        """
+        path = Path(path)
+        temp = path.with_suffix(path.suffix + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest(), f, ensure_ascii=False)
+        temp.replace(path)
+        logger.debug(
+            "Wrote catalog manifest with %s nodes to %s", len(self.nodes), path
+        )
+
+    @classmethod
+    def resume(
+        cls,
+        path: str | Path,
+        max_workers: int = 8,
+        checkpoint_every: int = 50,
+    ) -> Self:
+        """Recreate a crawler from a saved manifest or checkpoint, continuing to checkpoint to the same file.
+
+        Run crawl() on the result to request what was left in the queue.
+
+        Args:
+            path: The path to the JSON-file.
+            max_workers: The maximum amount of requests sent at the same time.
+            checkpoint_every: Write the checkpoint after this many finished requests.
+
+        Returns:
+            Self: The crawler, with the nodes found and the queue left at the time of saving.
+        """
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        settings = manifest["settings"]
+        crawler = cls(
+            ssbsection=settings["ssbsection"],
+            classification_ids=[],
+            include_versions=settings["include_versions"],
+            language=settings["language"],
+            include_future=settings["include_future"],
+            max_workers=max_workers,
+            checkpoint_path=path,
+            checkpoint_every=checkpoint_every,
+        )
+        crawler.nodes = manifest["nodes"]
+        crawler.edges = [(p, c) for p, c in manifest["edges"]]
+        crawler.failed = manifest["failed"]
+        crawler.queue = [(k, i, p) for k, i, p in manifest["queue"]]
+        crawler.requests_done = manifest["requests_done"]
+        crawler._update_seen()
+        return crawler
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get the found nodes as a dataframe, one row per node, with the attributes as columns.
+
+        Returns:
+            pd.DataFrame: The nodes, with the columns "key", "kind", "id", "name", "parent" and the attributes.
+        """
+        if not self.nodes:
+            return pd.DataFrame(columns=NODE_COLUMNS)
+        return pd.DataFrame(
+            [
+                {
+                    "key": key,
+                    "kind": n["kind"],
+                    "id": n["id"],
+                    "name": n["name"],
+                    "parent": n["parent"],
+                    **n["attributes"],
+                }
+                for key, n in self.nodes.items()
+            ]
+        )
+
+    def edges_frame(self) -> pd.DataFrame:
+        """Get the edges between the nodes as a dataframe, for lineage-tools. A node with many parents has one row per parent.
+
+        Returns:
+            pd.DataFrame: The edges, with the columns "parent" and "child".
+        """
+        return pd.DataFrame(self.edges, columns=["parent", "child"])
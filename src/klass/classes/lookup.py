@@ -0,0 +1,280 @@
+import sys
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from typing_extensions import Self
+
+# Stands in for missing values in the value array, a Unicode noncharacter, reserved for internal use and never in the data
+NA_SENTINEL: str = "\uffff"
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Open an existing shared memory block, without this process taking over the responsibility of unlinking it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg,unused-ignore]
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 every process opening the block registers it, and removes it when exiting
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+class KlassLookup(Mapping[str, str | None]):
+    """An immutable, compact mapping from codes to values, like the dicts from to_dict(), backed by two numpy arrays.
+
+    The keys are kept sorted in a fixed-width string array, with the values in a matching array,
+    so lookups are binary searches, and mapping a whole column at once is vectorized.
+    Missing values are kept as missing, so codes mapping to NA give NA, like with pd.Series.map(dict).
+    Pickling the lookup only sends the two arrays, making it cheap to ship to the workers of
+    a ProcessPoolExecutor or a Dask cluster.
+    With share(), the arrays are put in shared memory, and pickling only sends the name of the memory block,
+    so many processes can map against a single copy.
+
+    Get one from the to_lookup() methods on KlassCodes, KlassVariant and KlassCorrespondence, or from_mapping().
+
+    Example:
+        lookup = get_codes(131, "2024-01-01").to_lookup()
+        with ProcessPoolExecutor() as pool:
+            names = pool.map(lookup.map, chunks_of_municipality_codes)
+
+    Args:
+        keys: The codes, sorted and unique.
+        values: The values of the codes, in the same order as the keys.
+        other: The value returned by map() for codes that are not in the lookup.
+        _shm: The shared memory block the arrays live in, set by share().
+    """
+
+    __slots__ = ("_keys", "_other", "_shm", "_values")
+    _keys: npt.NDArray[np.str_]
+    _values: npt.NDArray[np.str_]
+    _other: str | None
+    _shm: shared_memory.SharedMemory | None
+
+    def __init__(
+        self,
+        keys: npt.NDArray[np.str_],
+        values: npt.NDArray[np.str_],
+        other: str | None = None,
+        _shm: shared_memory.SharedMemory | None = None,
+    ) -> None:
+        keys.flags.writeable = False
+        values.flags.writeable = False
+        object.__setattr__(self, "_keys", keys)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_other", other)
+        object.__setattr__(self, "_shm", _shm)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Refuse changing the lookup after it is created."""
+        raise AttributeError("KlassLookup is immutable, create a new one instead.")
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, Any], other: str | None = None) -> Self:
+        """Create a lookup from a dict, like the ones from to_dict(). Missing values, like None and NA, stay missing.
+
+        Args:
+            mapping: Codes as keys, and the values to map to as values.
+            other: The value returned by map() for codes that are not in the lookup.
+
+        Returns:
+            Self: The lookup.
+        """
+        keys = np.array([str(k) for k in mapping.keys()], dtype=np.str_)
+        values = np.array(
+            [NA_SENTINEL if pd.isna(v) else str(v) for v in mapping.values()],
+            dtype=np.str_,
+        )
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], values[order], other)
+
+    def __len__(self) -> int:
+        """Get the amount of codes in the lookup."""
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the codes, in sorted order."""
+        return iter(self._keys.tolist())
+
+    def __getitem__(self, key: str) -> str | None:
+        """Get the value of a single code.
+
+        Args:
+            key: The code.
+
+        Returns:
+            str | None: The value of the code, None if the code maps to a missing value.
+
+        Raises:
+            KeyError: If the code is not in the lookup.
+        """
+        i = int(np.searchsorted(self._keys, key))
+        if i < len(self._keys) and self._keys[i] == key:
+            value = str(self._values[i])
+            return None if value == NA_SENTINEL else value
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the lookup, with its size and whether it is in shared memory."""
+        shared = f", shared_memory='{self._shm.name}'" if self._shm else ""
+        return f"KlassLookup(<{len(self)} codes>, other={self._other!r}{shared})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Pickle only the arrays, or only the name of the shared memory block if the lookup is shared."""
+        if self._shm is not None:
+            return (
+                _attach_lookup,
+                (
+                    self._shm.name,
+                    self._keys.dtype.str,
+                    self._values.dtype.str,
+                    len(self),
+                    self._other,
+                ),
+            )
+        return (self.__class__, (self._keys, self._values, self._other))
+
+    @property
+    def other(self) -> str | None:
+        """The value map() returns for codes that are not in the lookup."""
+        return self._other
+
+    @property
+    def nbytes(self) -> int:
+        """The amount of bytes used by the arrays of the lookup."""
+        return int(self._keys.nbytes + self._values.nbytes)
+
+    def map(
+        self,
+        codes: Iterable[Any] | pd.Series,
+        other: str | None = None,
+        categorical: bool = False,
+    ) -> pd.Series:
+        """Map many codes at once, like pd.Series.map(dict), but without building a dict.
+
+        Args:
+            codes: The codes to look up. If a pandas Series is sent in, the result keeps its index.
+            other: The value for codes that are not in the lookup, defaults to the other set on the lookup.
+                If neither is set, missing codes become NA.
+            categorical: Return a categorical, storing each distinct value once, and a small integer per row.
+
+        Returns:
+            pd.Series: The values of the codes, NA for codes mapping to missing values.
+        """
+        if other is None:
+            other = self.other
+        series = codes if isinstance(codes, pd.Series) else pd.Series(list(codes))
+        missing = series.isna().to_numpy()
+        needles = series.astype(str).to_numpy(dtype=object).astype(np.str_)
+        if len(self._keys):
+            i = np.clip(np.searchsorted(self._keys, needles), 0, len(self._keys) - 1)
+            found = (self._keys[i] == needles) & ~missing
+        else:
+            i = np.zeros(len(needles), dtype=np.intp)
+            found = np.zeros(len(needles), dtype=bool)
+        if categorical:
+            return self._map_categorical(i, found, other, series.index)
+        result = np.full(len(needles), pd.NA if other is None else other, dtype=object)
+        if found.any():
+            values = self._values[i[found]].astype(object)
+            values[values == NA_SENTINEL] = pd.NA
+            result[found] = values
+        return pd.Series(result, index=series.index, dtype="string[pyarrow]")
+
+    def _map_categorical(
+        self,
+        positions: npt.NDArray[np.intp],
+        found: npt.NDArray[np.bool_],
+        other: str | None,
+        index: pd.Index,
+    ) -> pd.Series:
+        """Build the categorical result of map() directly from the positions in the lookup, without strings per row."""
+        categories, value_codes = np.unique(self._values, return_inverse=True)
+        categories = categories.tolist()
+        if NA_SENTINEL in categories:
+            # Codes mapping to missing values get the missing category-code, the categories after it move down one
+            na_code = categories.index(NA_SENTINEL)
+            del categories[na_code]
+            value_codes = np.where(
+                value_codes == na_code,
+                -1,
+                value_codes - (value_codes > na_code),
+            )
+        missing_code = -1
+        if other is not None:
+            if other not in categories:
+                categories.append(other)
+            missing_code = categories.index(other)
+        codes = np.full(len(positions), missing_code, dtype=np.int64)
+        codes[found] = value_codes[positions[found]]
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=categories), index=index
+        )
+
+    def share(self) -> "KlassLookup":
+        """Copy the lookup into a new shared memory block, so pickling it only sends the name of the block.
+
+        The process calling share() owns the block, and should call unlink() when all processes are done with it.
+
+        Returns:
+            KlassLookup: A lookup backed by the shared memory.
+        """
+        size = max(self._keys.nbytes + self._values.nbytes, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        keys, values = _arrays_in_buffer(
+            shm, self._keys.dtype.str, self._values.dtype.str, len(self)
+        )
+        keys[:] = self._keys
+        values[:] = self._values
+        return KlassLookup(keys, values, self._other, _shm=shm)
+
+    def close(self) -> None:
+        """Stop using the shared memory block in this process, the lookup is empty afterwards."""
+        if self._shm is None:
+            return
+        object.__setattr__(self, "_keys", np.array([], dtype=np.str_))
+        object.__setattr__(self, "_values", np.array([], dtype=np.str_))
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Close and free the shared memory block, call it in the process that ran share()."""
+        if self._shm is None:
+            return
+        self.close()
+        self._shm.unlink()
+        object.__setattr__(self, "_shm", None)
+
+    def __enter__(self) -> Self:
+        """Use the lookup as a context manager, freeing its shared memory on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Free the shared memory, if the lookup is shared."""
+        self.unlink()
+
+
+def _arrays_in_buffer(
+    shm: shared_memory.SharedMemory, key_dtype: str, value_dtype: str, length: int
+) -> tuple[npt.NDArray[np.str_], npt.NDArray[np.str_]]:
+    """Lay out the keys, then the values, in the shared memory block."""
+    keys: npt.NDArray[np.str_] = np.ndarray(
+        (length,), dtype=np.dtype(key_dtype), buffer=shm.buf
+    )
+    values: npt.NDArray[np.str_] = np.ndarray(
+        (length,), dtype=np.dtype(value_dtype), buffer=shm.buf, offset=keys.nbytes
+    )
+    return keys, values
+
+
+def _attach_lookup(
+    name: str, key_dtype: str, value_dtype: str, length: int, other: str | None
+) -> KlassLookup:
+    """Recreate a shared lookup in another process, from the name of its shared memory block."""
+    shm = _attach_shared_memory(name)
+    keys, values = _arrays_in_buffer(shm, key_dtype, value_dtype, length)
+    return KlassLookup(keys, values, other, _shm=shm)
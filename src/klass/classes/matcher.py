@@ -0,0 +1,308 @@
+import logging
+import math
+from collections import Counter
+from collections.abc import Iterable
+from itertools import pairwise
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from ..utility.naming import tokenize
+
+logger = logging.getLogger(__name__)
+
+MATCH_COLUMNS: list[str] = ["text", "rank", "code", "name", "score"]
+# Upper limit of (query, code)-pairs scored at once, keeps memory use bounded for large inputs
+PAIR_BUDGET: int = 20_000_000
+
+
+def _ngrams(text: str, n: int) -> list[str]:
+    """Split normalized text into overlapping character n-grams, padded with spaces to mark word boundaries."""
+    padded = f" {' '.join(tokenize(text))} "
+    if len(padded.strip()) == 0:
+        return []
+    return [padded[i : i + n] for i in range(max(len(padded) - n + 1, 1))]
+
+
+class KlassCodeMatcher:
+    """Match free text against the codes in a codelist, tolerating typos and different spellings.
+
+    The matcher compares character n-grams (trigrams by default) of the texts with the n-grams of
+    the codes' name, shortName and notes, scoring them by cosine similarity of tf-idf weighted n-gram counts.
+    The text is normalized first, so "Tromsø", "tromsoe" and "TROMSO" are close to each other.
+
+    The n-gram index is built once, and matching is vectorized with numpy,
+    duplicates in the texts are only matched once.
+
+    Args:
+        data: The codelist to match against, a dataframe like the .data on KlassCodes or KlassVersion,
+            or one of those objects directly.
+        fields: The columns with text to match against, missing columns are skipped.
+        n: The length of the character n-grams.
+        code_col: The column containing the codes.
+        name_col: The column containing the names returned in the results.
+
+    Raises:
+        ValueError: If none of the fields are columns in the data.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame | Any,
+        fields: Iterable[str] = ("name", "shortName", "notes"),
+        n: int = 3,
+        code_col: str = "code",
+        name_col: str = "name",
+    ) -> None:
+        if not isinstance(data, pd.DataFrame):
+            data = data.data
+        self.n = n
+        self.fields = [f for f in fields if f in data.columns]
+        if not self.fields:
+            raise ValueError(f"None of the fields {list(fields)} are in the data.")
+        data = data.drop_duplicates(subset=[code_col])
+        self.codes: npt.NDArray[np.object_] = data[code_col].astype(str).to_numpy()
+        self.names: npt.NDArray[np.object_] = (
+            data[name_col].to_numpy() if name_col in data.columns else self.codes
+        )
+        self._build_index(data)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the matcher, with its settings."""
+        return f"KlassCodeMatcher(<{len(self.codes)} codes>, fields={self.fields}, n={self.n})"
+
+    def __str__(self) -> str:
+        """Print a human-readable string of the matcher, with the size of its index."""
+        return f"""Fuzzy matcher over {len(self.codes)} codes
+        Matching on: {", ".join(self.fields)}
+        Distinct {self.n}-grams: {len(self._vocabulary)}
+        """
+
+    def _build_index(self, data: pd.DataFrame) -> None:
+        """Build a compressed (CSR-style) inverted index from n-grams to the texts containing them.
+
+        Every non-empty field on every code becomes a separate "entry", entry_code maps the entries back to the codes.
+        """
+        entry_counts: list[Counter[str]] = []
+        entry_code: list[int] = []
+        for field in self.fields:
+            for code_idx, text in enumerate(data[field].to_numpy()):
+                if isinstance(text, str) and text.strip():
+                    grams = Counter(_ngrams(text, self.n))
+                    if grams:
+                        entry_counts.append(grams)
+                        entry_code.append(code_idx)
+        self._entry_code = np.asarray(entry_code, dtype=np.int64)
+
+        document_frequency: Counter[str] = Counter()
+        for grams in entry_counts:
+            document_frequency.update(grams.keys())
+        self._vocabulary: dict[str, int] = {
+            g: i for i, g in enumerate(document_frequency)
+        }
+        n_entries = len(entry_counts)
+        self._idf = np.array(
+            [
+                math.log((1 + n_entries) / (1 + df)) + 1
+                for df in document_frequency.values()
+            ]
+        )
+        self._unknown_idf = math.log(1 + n_entries) + 1
+
+        gram_ids: list[int] = []
+        entry_ids: list[int] = []
+        counts: list[float] = []
+        for entry_id, grams in enumerate(entry_counts):
+            for gram, count in grams.items():
+                gram_ids.append(self._vocabulary[gram])
+                entry_ids.append(entry_id)
+                counts.append(count)
+        gram_arr = np.asarray(gram_ids, dtype=np.int64)
+        entry_arr = np.asarray(entry_ids, dtype=np.int64)
+        weights = np.asarray(counts, dtype=np.float64) * self._idf[gram_arr]
+        norms = np.sqrt(np.bincount(entry_arr, weights=weights**2, minlength=n_entries))
+        weights = weights / norms[entry_arr]
+
+        order = np.argsort(gram_arr, kind="stable")
+        self._indices = entry_arr[order]
+        self._weights = weights[order]
+        self._indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(gram_arr, minlength=len(self._vocabulary)))]
+        )
+
+    def _query_vectors(
+        self, texts: npt.NDArray[np.object_]
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+        """Turn the texts into sparse tf-idf vectors, as (text index, n-gram id, weight) triples of known n-grams."""
+        query_ids: list[int] = []
+        gram_ids: list[int] = []
+        weights: list[float] = []
+        for query_id, text in enumerate(texts):
+            grams = Counter(_ngrams(text, self.n)) if isinstance(text, str) else {}
+            known: list[tuple[int, float]] = []
+            norm = 0.0
+            for gram, count in grams.items():
+                gram_id = self._vocabulary.get(gram)
+                weight = count * (
+                    self._idf[gram_id] if gram_id is not None else self._unknown_idf
+                )
+                norm += weight**2
+                if gram_id is not None:
+                    known.append((gram_id, weight))
+            norm = math.sqrt(norm)
+            for gram_id, weight in known:
+                query_ids.append(query_id)
+                gram_ids.append(gram_id)
+                weights.append(weight / norm)
+        return (
+            np.asarray(query_ids, dtype=np.int64),
+            np.asarray(gram_ids, dtype=np.int64),
+            np.asarray(weights, dtype=np.float64),
+        )
+
+    def _score_chunk(
+        self,
+        query_ids: npt.NDArray[np.int64],
+        gram_ids: npt.NDArray[np.int64],
+        weights: npt.NDArray[np.float64],
+        top_k: int,
+        min_score: float,
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+        """Score a chunk of query-vectors against the index, returning the top_k (query, code, score) per query."""
+        starts = self._indptr[gram_ids]
+        lengths = self._indptr[gram_ids + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, np.array([], dtype=np.float64)
+        # Expand every query n-gram into the postings of that n-gram, without a python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = np.arange(total) + offsets
+        pair_query = np.repeat(query_ids, lengths)
+        pair_score = np.repeat(weights, lengths) * self._weights[positions]
+
+        # Sum the contributions per (query, entry), then keep the best entry per (query, code)
+        entries = self._indices[positions]
+        entry_key = pair_query * len(self._entry_code) + entries
+        unique_keys, inverse = np.unique(entry_key, return_inverse=True)
+        entry_scores = np.bincount(inverse, weights=pair_score)
+        key_query = unique_keys // len(self._entry_code)
+        key_code = self._entry_code[unique_keys % len(self._entry_code)]
+
+        order = np.lexsort((-entry_scores, key_code, key_query))
+        key_query, key_code, entry_scores = (
+            key_query[order],
+            key_code[order],
+            entry_scores[order],
+        )
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (key_query[1:] != key_query[:-1]) | (key_code[1:] != key_code[:-1])
+        key_query, key_code, entry_scores = (
+            key_query[first],
+            key_code[first],
+            entry_scores[first],
+        )
+
+        order = np.lexsort((-entry_scores, key_query))
+        key_query, key_code, entry_scores = (
+            key_query[order],
+            key_code[order],
+            entry_scores[order],
+        )
+        group_start = np.ones(len(key_query), dtype=bool)
+        group_start[1:] = key_query[1:] != key_query[:-1]
+        start_idx = np.maximum.accumulate(
+            np.where(group_start, np.arange(len(key_query)), 0)
+        )
+        rank = np.arange(len(key_query)) - start_idx
+        keep = (rank < top_k) & (entry_scores >= min_score)
+        return (
+            key_query[keep].astype(np.int64),
+            key_code[keep].astype(np.int64),
+            entry_scores[keep].astype(np.float64),
+        )
+
+    def match(
+        self,
+        texts: Iterable[str] | pd.Series,
+        top_k: int = 5,
+        min_score: float = 0.0,
+    ) -> pd.DataFrame:
+        """Find the best matching codes for each distinct text.
+
+        Args:
+            texts: The free-text values to match, duplicates are only matched once.
+            top_k: The maximum amount of candidate codes to return per text.
+            min_score: Leave out candidates scoring lower than this, scores are between 0 and 1.
+
+        Returns:
+            pd.DataFrame: One row per candidate, with the columns "text", "rank", "code", "name" and "score".
+            Texts without any candidates are left out.
+        """
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        unique_texts = np.asarray(pd.unique(series.dropna()), dtype=object)
+        query_ids, gram_ids, weights = self._query_vectors(unique_texts)
+
+        # Split into chunks of whole queries, so the expanded postings fit in memory
+        pair_counts = self._indptr[gram_ids + 1] - self._indptr[gram_ids]
+        per_query = np.bincount(
+            query_ids, weights=pair_counts, minlength=len(unique_texts)
+        )
+        chunk_of_query = (np.cumsum(per_query) // PAIR_BUDGET).astype(np.int64)
+        chunk_of_pair = chunk_of_query[query_ids]
+        bounds = np.searchsorted(chunk_of_pair, np.unique(chunk_of_pair), side="left")
+        bounds = np.append(bounds, len(chunk_of_pair))
+
+        results = [
+            self._score_chunk(
+                query_ids[start:stop],
+                gram_ids[start:stop],
+                weights[start:stop],
+                top_k,
+                min_score,
+            )
+            for start, stop in pairwise(bounds)
+        ]
+        if not results:
+            # No text shares an n-gram with the codes, or there were no texts
+            empty = np.array([], dtype=np.int64)
+            results = [(empty, empty, np.array([], dtype=np.float64))]
+        result_query = np.concatenate([r[0] for r in results])
+        result_code = np.concatenate([r[1] for r in results])
+        result_score = np.concatenate([r[2] for r in results])
+        group_start = np.ones(len(result_query), dtype=bool)
+        group_start[1:] = result_query[1:] != result_query[:-1]
+        start_idx = np.maximum.accumulate(
+            np.where(group_start, np.arange(len(result_query)), 0)
+        )
+        return pd.DataFrame(
+            {
+                "text": unique_texts[result_query],
+                "rank": np.arange(len(result_query)) - start_idx + 1,
+                "code": self.codes[result_code],
+                "name": self.names[result_code],
+                "score": result_score.round(4),
+            },
+            columns=MATCH_COLUMNS,
+        )
+
+    def best(
+        self, texts: Iterable[str] | pd.Series, min_score: float = 0.0
+    ) -> pd.Series:
+        """Get the single best matching code for every text, in the same order as the texts.
+
+        Useful for adding a column of codes to a dataframe with a free-text column.
+
+        Args:
+            texts: The free-text values to match.
+            min_score: Texts where the best candidate scores lower than this get NA instead.
+
+        Returns:
+            pd.Series: The best code for every text, NA where nothing matched well enough.
+        """
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        best = self.match(series, top_k=1, min_score=min_score)
+        mapping = pd.Series(best["code"].to_numpy(), index=best["text"].to_numpy())
+        return series.map(mapping)
@@ -0,0 +1,390 @@
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from typing_extensions import Self
+
+from ..utility.filters import mapping_columns
+
+
+def _as_strings(codes: Iterable[Any] | pd.Series) -> npt.NDArray[np.str_]:
+    """Turn codes into a fixed-width string array, NA-values become empty strings."""
+    series = codes if isinstance(codes, pd.Series) else pd.Series(list(codes))
+    return (
+        series.astype(str)
+        .where(series.notna(), "")
+        .to_numpy(dtype=object)
+        .astype(np.str_)
+    )
+
+
+class KlassMultiMap(Mapping[str, tuple[str, ...]]):
+    """A mapping from each code to all the codes it corresponds to, for one-to-many and many-to-many correspondences.
+
+    to_dict() keeps a single value per key, so when a source code is split between several targets,
+    only the last target survives. The multimap keeps all of them, stored like a CSR sparse matrix:
+    the keys are sorted, and the values of the key at position i are values[indptr[i]:indptr[i + 1]].
+
+    Get one from to_multimap() on KlassCorrespondence or KlassVariant, or from_pairs().
+    The inverse() points the other way, from targets to sources.
+
+    Example:
+        splits = correspondence.to_multimap()
+        long_data = splits.explode(data, "nace", "nace_new")
+
+    Args:
+        keys: The codes, sorted and unique.
+        indptr: The start of the values of each key, with the end of the values last, one longer than the keys.
+        values: The values, grouped by key.
+    """
+
+    def __init__(
+        self,
+        keys: npt.NDArray[np.str_],
+        indptr: npt.NDArray[np.intp],
+        values: npt.NDArray[np.str_],
+    ) -> None:
+        for array in (keys, indptr, values):
+            array.flags.writeable = False
+        self._keys = keys
+        self._indptr = indptr
+        self._values = values
+
+    @classmethod
+    def from_pairs(
+        cls, keys: Iterable[Any] | pd.Series, values: Iterable[Any] | pd.Series
+    ) -> Self:
+        """Create a multimap from two equally long sequences of codes, duplicate pairs are only kept once.
+
+        Args:
+            keys: The codes to map from, like the sourceCode column.
+            values: The codes to map to, like the targetCode column.
+
+        Returns:
+            Self: The multimap, keeping the values of each key in the order they first appeared.
+        """
+        key_array = _as_strings(keys)
+        value_array = _as_strings(values)
+        pairs = pd.DataFrame({"key": key_array, "value": value_array})
+        pairs = pairs.drop_duplicates()
+        # Stable sort on the keys only, keeps the order of the values within each key
+        order = np.argsort(pairs["key"].to_numpy(dtype=np.str_), kind="stable")
+        sorted_keys = pairs["key"].to_numpy(dtype=np.str_)[order]
+        sorted_values = pairs["value"].to_numpy(dtype=np.str_)[order]
+        unique_keys, starts = np.unique(sorted_keys, return_index=True)
+        indptr = np.append(starts, len(sorted_keys)).astype(np.intp)
+        return cls(unique_keys, indptr, sorted_values)
+
+    def __len__(self) -> int:
+        """Get the amount of keys in the multimap."""
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys, in sorted order."""
+        return iter(self._keys.tolist())
+
+    def __getitem__(self, key: str) -> tuple[str, ...]:
+        """Get all the values of a single key.
+
+        Args:
+            key: The code.
+
+        Returns:
+            tuple[str, ...]: The codes the key maps to.
+
+        Raises:
+            KeyError: If the code is not in the multimap.
+        """
+        i = int(np.searchsorted(self._keys, key))
+        if i < len(self._keys) and self._keys[i] == key:
+            return tuple(self._values[self._indptr[i] : self._indptr[i + 1]].tolist())
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the multimap, with its size."""
+        return f"KlassMultiMap(<{len(self)} keys>, <{len(self._values)} pairs>)"
+
+    @property
+    def sizes(self) -> npt.NDArray[np.intp]:
+        """The amount of values for each key, in the order of the keys."""
+        return np.diff(self._indptr)
+
+    def is_one_to_one(self) -> bool:
+        """Check if every key has a single value, in which case to_dict() loses nothing.
+
+        Returns:
+            bool: True if no key has more than one value.
+        """
+        return bool((self.sizes <= 1).all())
+
+    def inverse(self) -> "KlassMultiMap":
+        """Point the multimap the other way, from the values to the keys.
+
+        Returns:
+            KlassMultiMap: A multimap from each value to all the keys mapping to it.
+        """
+        return KlassMultiMap.from_pairs(self._values, np.repeat(self._keys, self.sizes))
+
+    def positions(
+        self, codes: Iterable[Any] | pd.Series
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.bool_]]:
+        """Find the position of each code among the keys, vectorized.
+
+        Args:
+            codes: The codes to look up.
+
+        Returns:
+            tuple[npt.NDArray[np.intp], npt.NDArray[np.bool_]]: The positions, and whether each code was found.
+        """
+        series = codes if isinstance(codes, pd.Series) else pd.Series(list(codes))
+        needles = _as_strings(series)
+        if not len(self._keys):
+            return np.zeros(len(needles), dtype=np.intp), np.zeros(
+                len(needles), dtype=bool
+            )
+        i = np.clip(np.searchsorted(self._keys, needles), 0, len(self._keys) - 1)
+        found = (self._keys[i] == needles) & series.notna().to_numpy()
+        return i.astype(np.intp), found
+
+    def counts(self, codes: Iterable[Any] | pd.Series) -> npt.NDArray[np.intp]:
+        """Count the values of each code, zero for codes that are not in the multimap.
+
+        Args:
+            codes: The codes to count the values of.
+
+        Returns:
+            npt.NDArray[np.intp]: The amount of values per code.
+        """
+        i, found = self.positions(codes)
+        if not len(self._keys):
+            return np.zeros(len(i), dtype=np.intp)
+        return np.where(found, self._indptr[i + 1] - self._indptr[i], 0)
+
+    def explode(
+        self,
+        data: pd.DataFrame,
+        code_col_name: str,
+        new_col_name: str,
+        keep_missing: bool = True,
+    ) -> pd.DataFrame:
+        """Repeat each row of the data once per value of its code, like DataFrame.explode over the mapped codes.
+
+        Args:
+            data: The dataframe, it is not changed.
+            code_col_name: The column in the data with the codes.
+            new_col_name: The column to put the mapped codes in.
+            keep_missing: Keep rows with codes that are not in the multimap once, with NA in the new column.
+
+        Returns:
+            pd.DataFrame: The exploded data, keeping the index of the original rows.
+        """
+        rows, pairs = self._explode_positions(data[code_col_name], keep_missing)
+        return self._with_codes(data.iloc[rows], pairs, new_col_name)
+
+    def _explode_positions(
+        self, codes: pd.Series, keep_missing: bool
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+        """Get the input row of each exploded row, and its position among the pairs, -1 for missing codes."""
+        i, found = self.positions(codes)
+        if not len(self._keys):
+            # Every code is missing from an empty multimap
+            rows = np.arange(len(codes) if keep_missing else 0, dtype=np.intp)
+            return rows, np.full(len(rows), -1, dtype=np.intp)
+        repeats = np.where(
+            found, self._indptr[i + 1] - self._indptr[i], int(keep_missing)
+        )
+        rows = np.repeat(np.arange(len(codes)), repeats)
+        # The offset of each output row within the values of its input row
+        offsets = np.arange(len(rows)) - np.repeat(
+            np.cumsum(repeats) - repeats, repeats
+        )
+        pairs = np.repeat(self._indptr[i], repeats) + offsets
+        return rows, np.where(np.repeat(found, repeats), pairs, -1).astype(np.intp)
+
+    def _with_codes(
+        self, rows: pd.DataFrame, pairs: npt.NDArray[np.intp], new_col_name: str
+    ) -> pd.DataFrame:
+        """Add the mapped code of each pair as a column, NA where the pair is -1."""
+        new_values = np.full(len(pairs), pd.NA, dtype=object)
+        found = pairs >= 0
+        new_values[found] = self._values[pairs[found]].astype(object)
+        return rows.assign(
+            **{
+                new_col_name: pd.Series(
+                    new_values, index=rows.index, dtype="string[pyarrow]"
+                )
+            }
+        )
+
+    def shares(self, weights: pd.Series | None = None) -> npt.NDArray[np.float64]:
+        """Get the share of each key going to each of its values, summing to 1 per key.
+
+        Args:
+            weights: Weights of the values, indexed by the mapped codes, like the population of each target code.
+                Or indexed by a two-level index of (key, value), for weights specific to each pair.
+                Keys where all weights are missing or zero are split equally. Defaults to equal splits.
+
+        Returns:
+            npt.NDArray[np.float64]: The share of each pair, in the order of the pairs.
+
+        Raises:
+            ValueError: If any of the weights are negative.
+        """
+        sizes = self.sizes
+        if weights is None:
+            pair_weights: npt.NDArray[np.float64] = np.ones(len(self._values))
+        else:
+            if (weights < 0).any():
+                raise ValueError("Weights can not be negative.")
+            if weights.index.nlevels == 2:
+                index: pd.Index = pd.MultiIndex.from_arrays(
+                    [
+                        weights.index.get_level_values(level).astype(str)
+                        for level in (0, 1)
+                    ]
+                )
+                lookup: pd.Index = pd.MultiIndex.from_arrays(
+                    [np.repeat(self._keys, sizes), self._values]
+                )
+            else:
+                index = weights.index.astype(str)
+                lookup = pd.Index(self._values)
+            pair_weights = (
+                weights.set_axis(index).reindex(lookup).fillna(0).to_numpy(dtype=float)
+            )
+        if not len(pair_weights):
+            return pair_weights
+        totals = np.repeat(np.add.reduceat(pair_weights, self._indptr[:-1]), sizes)
+        shares: npt.NDArray[np.float64] = 1 / np.repeat(sizes, sizes)
+        np.divide(pair_weights, totals, out=shares, where=totals > 0)
+        return shares
+
+    def allocate(
+        self,
+        data: pd.DataFrame,
+        code_col_name: str,
+        value_cols: str | list[str],
+        new_col_name: str,
+        weights: pd.Series | None = None,
+        keep_missing: bool = True,
+        share_col_name: str | None = None,
+    ) -> pd.DataFrame:
+        """Divide the values of each row between the mapped codes of the row, keeping the totals unchanged.
+
+        A row on a code mapping to three codes becomes three rows, each with its share of the values.
+        Without weights the values are split equally, with weights in proportion to the weights of the mapped codes.
+        Allocated counts become floats, round them yourself if needed.
+
+        Example:
+            correspondence.to_multimap().allocate(
+                businesses, "nace", "employees", "nace_new", weights=employees_per_new_code
+            )
+
+        Args:
+            data: The dataframe, it is not changed.
+            code_col_name: The column in the data with the codes.
+            value_cols: The column or columns with the values to divide.
+            new_col_name: The column to put the mapped codes in.
+            weights: Weights of the mapped codes, see shares().
+            keep_missing: Keep rows with codes that are not in the multimap, whole, with NA in the new column.
+                If False, the totals only cover the codes in the multimap.
+            share_col_name: Also add a column with the share each row got, if set.
+
+        Returns:
+            pd.DataFrame: The allocated data, keeping the index of the original rows.
+        """
+        cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        rows, pairs = self._explode_positions(data[code_col_name], keep_missing)
+        pair_shares = self.shares(weights)
+        row_shares = np.ones(len(pairs))
+        row_shares[pairs >= 0] = pair_shares[pairs[pairs >= 0]]
+        result = self._with_codes(data.iloc[rows], pairs, new_col_name)
+        allocated = {
+            col: result[col].astype(float).mul(row_shares, axis=0) for col in cols
+        }
+        if share_col_name:
+            allocated[share_col_name] = pd.Series(row_shares, index=result.index)
+        return result.assign(**allocated)
+
+    def aggregate(
+        self,
+        data: pd.DataFrame,
+        code_col_name: str,
+        value_cols: str | list[str],
+        func: str | Callable[..., Any] = "sum",
+        new_col_name: str | None = None,
+    ) -> pd.DataFrame:
+        """Explode the data onto the mapped codes, then aggregate the values per mapped code.
+
+        Every row is counted in full for each of its mapped codes, aggregating through the inverse() of a split
+        gathers the parts again. Use allocate() to divide the values between the mapped codes instead.
+
+        Args:
+            data: The dataframe, it is not changed.
+            code_col_name: The column in the data with the codes.
+            value_cols: The column or columns to aggregate.
+            func: The aggregation, anything DataFrame.groupby().agg() takes.
+            new_col_name: The name of the column with the mapped codes, defaults to the name of the code column.
+
+        Returns:
+            pd.DataFrame: One row per mapped code, with the aggregated values.
+        """
+        new_col_name = new_col_name or code_col_name
+        cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        exploded = self.explode(
+            data[[code_col_name, *cols]].rename(
+                columns={code_col_name: f"_{code_col_name}"}
+            ),
+            f"_{code_col_name}",
+            new_col_name,
+            keep_missing=False,
+        )
+        return exploded.groupby(new_col_name, sort=True)[cols].agg(func).reset_index()
+
+    def to_frame(
+        self, key_name: str = "key", value_name: str = "value"
+    ) -> pd.DataFrame:
+        """Get the pairs of the multimap as a long dataframe.
+
+        Args:
+            key_name: The name of the column with the keys.
+            value_name: The name of the column with the values.
+
+        Returns:
+            pd.DataFrame: One row per pair.
+        """
+        return pd.DataFrame(
+            {
+                key_name: np.repeat(self._keys, self.sizes),
+                value_name: self._values,
+            },
+            dtype="string[pyarrow]",
+        )
+
+
+def multimap_from_frame(
+    data: pd.DataFrame,
+    key: str,
+    value: str,
+    remove_na: bool = True,
+    select_level: int | None = None,
+) -> KlassMultiMap:
+    """Build a multimap from two columns of a dataframe, like to_dict(), but keeping all values per key.
+
+    Args:
+        data: The dataframe, like the .data of a KlassCorrespondence.
+        key: The column with the codes to map from.
+        value: The column with the codes to map to.
+        remove_na: Leave out rows where the key or value is NA or empty.
+        select_level: Keep only a specific level.
+
+    Returns:
+        KlassMultiMap: The multimap.
+    """
+    keys, values = mapping_columns(data, key, value, remove_na, select_level)
+    return KlassMultiMap.from_pairs(keys, values)
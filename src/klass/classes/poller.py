@@ -0,0 +1,243 @@
+import functools
+import logging
+import threading
+from collections.abc import Callable
+from collections.abc import Hashable
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+
+import requests
+
+from ..requests.klass_requests import classification_by_id
+from ..requests.klass_requests import classifications
+from ..requests.klass_types import ChangedClassificationType
+from ..requests.klass_types import ChangeReportType
+from ..requests.metadata_cache import KlassMetadataCache
+from ..requests.metadata_cache import metadata_cache
+from ..utility.object_cache import KlassObjectCache
+from ..utility.object_cache import object_cache
+from .variant import KlassVariant
+from .version import KlassVersion
+
+logger = logging.getLogger(__name__)
+
+ChangeSubscriber = Callable[[ChangeReportType], None]
+# Keep the reports of about a day of hourly polls
+HISTORY_LENGTH: int = 24
+# Ask for changes a bit before the last sync, so a clock running ahead of the API's does not hide changes
+SYNC_OVERLAP: timedelta = timedelta(minutes=1)
+# Metadata cache entries listing the classifications and their families, outdated by any change
+LISTING_PREFIXES: tuple[str, ...] = ("classifications-", "classificationfamilies-")
+
+
+def _id_from_links(part: dict[str, Any]) -> str:
+    return str(part["_links"]["self"]["href"].split("/")[-1])
+
+
+class KlassChangePoller:
+    """Ask KLASS which classifications changed since the last poll, and drop exactly those from the local caches.
+
+    Each poll is a single request to the classifications-endpoint with changedSince.
+    For each changed classification, the cached KlassVersion objects of its versions are invalidated,
+    along with the cached KlassVariant objects listed on them, or recreated if refresh is set.
+    When anything changed, the cached listings of classifications and families are dropped from the metadata cache too.
+    Subscribers are called with the report of every poll, to update their own snapshots,
+    like a saved catalog manifest or a search index.
+
+    Poll on demand with poll(), or in a background thread with start() and stop().
+
+    Example:
+        poller = KlassChangePoller()
+        poller.subscribe(lambda report: print(report["changed"]))
+        poller.start(interval=3600)
+
+    Args:
+        since: Report changes after this time, "YYYY-MM-DD" or a datetime, naive times are taken as local time. Defaults to now.
+        cache: The object cache to invalidate, defaults to the one shared by the process.
+        refresh: Get fresh copies of the invalidated objects right away, instead of on the next use.
+        metadata: The metadata cache to drop the listings from, defaults to the one shared by the process.
+    """
+
+    def __init__(
+        self,
+        since: str | datetime | None = None,
+        cache: KlassObjectCache = object_cache,
+        refresh: bool = False,
+        metadata: KlassMetadataCache = metadata_cache,
+    ) -> None:
+        if isinstance(since, str):
+            since = datetime.fromisoformat(since)
+        # Kept in UTC, and sent with its offset, so the API compares it correctly all year round
+        self.last_sync: datetime = (
+            since.astimezone(timezone.utc) if since else datetime.now(timezone.utc)
+        )
+        self.cache = cache
+        self.refresh = refresh
+        self.metadata = metadata
+        self.history: list[ChangeReportType] = []
+        self._subscribers: list[ChangeSubscriber] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Get a string representation of the poller, with the time of the last sync."""
+        return f"KlassChangePoller(since='{self.last_sync.isoformat()}', refresh={self.refresh})"
+
+    def subscribe(self, callback: ChangeSubscriber) -> ChangeSubscriber:
+        """Call the callback with the report of every poll, can be used as a decorator.
+
+        Args:
+            callback: Takes the report of the poll.
+
+        Returns:
+            ChangeSubscriber: The callback, unchanged.
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: ChangeSubscriber) -> None:
+        """Stop calling the callback on polls.
+
+        Args:
+            callback: A callback added with subscribe().
+        """
+        self._subscribers.remove(callback)
+
+    def changed_classifications(self) -> list[ChangedClassificationType]:
+        """Ask the API which classifications changed since the last sync, without invalidating anything.
+
+        Returns:
+            list[ChangedClassificationType]: The ID, name and time of the last change of each classification.
+        """
+        result = classifications(
+            changed_since=(self.last_sync - SYNC_OVERLAP).isoformat()
+        )
+        return [
+            {
+                "classification_id": _id_from_links(dict(part)),
+                "name": part["name"],
+                "lastModified": part["lastModified"],
+            }
+            for part in result.get("_embedded", {}).get("classifications", [])
+        ]
+
+    def poll(self) -> ChangeReportType:
+        """Find the classifications changed since the last poll, invalidate them in the cache and tell the subscribers.
+
+        The time of the last sync is only moved forward if the request for changes succeeds.
+
+        Returns:
+            ChangeReportType: What changed, and how many cached objects were invalidated and refreshed.
+        """
+        with self._lock:
+            checked_at = datetime.now(timezone.utc)
+            changed = self.changed_classifications()
+            invalidated = 0
+            refreshed = 0
+            for classification in changed:
+                removed, recreated = self._invalidate_classification(
+                    classification["classification_id"]
+                )
+                invalidated += removed
+                refreshed += recreated
+            if changed:
+                for prefix in LISTING_PREFIXES:
+                    self.metadata.invalidate_prefix(prefix)
+            report: ChangeReportType = {
+                "since": self.last_sync.isoformat(),
+                "checked_at": checked_at.isoformat(),
+                "changed": changed,
+                "invalidated": invalidated,
+                "refreshed": refreshed,
+            }
+            self.last_sync = checked_at
+            self.history = [*self.history, report][-HISTORY_LENGTH:]
+        logger.info(
+            "%s classifications changed since %s, invalidated %s cached objects",
+            len(changed),
+            report["since"],
+            invalidated,
+        )
+        for callback in list(self._subscribers):
+            try:
+                callback(report)
+            except Exception as e:
+                logger.exception(f"Subscriber {callback} failed on change report: {e}")
+        return report
+
+    def _invalidate_classification(self, classification_id: str) -> tuple[int, int]:
+        """Drop the cached versions of a classification, and the variants listed on them."""
+        try:
+            versions = classification_by_id(classification_id)["versions"]
+        except requests.HTTPError as e:
+            logger.warning(
+                f"Could not get the versions of changed classification {classification_id}: {e}"
+            )
+            return 0, 0
+        removed_versions = self.cache.pop_objects(
+            "version", [_id_from_links(dict(version)) for version in versions]
+        )
+        variant_ids = {
+            _id_from_links(dict(variant))
+            for _, version in removed_versions
+            for variant in getattr(version, "classificationVariants", [])
+        }
+        removed_variants = self.cache.pop_objects("variant", variant_ids)
+        refreshed = 0
+        if self.refresh:
+            refreshed += self._recreate(KlassVersion, removed_versions)
+            refreshed += self._recreate(KlassVariant, removed_variants)
+        return len(removed_versions) + len(removed_variants), refreshed
+
+    def _recreate(
+        self,
+        factory: Callable[..., Any],
+        removed: list[tuple[tuple[Hashable, ...], Any]],
+    ) -> int:
+        """Put fresh objects in the poller's cache, under the keys of the removed ones, created with the same parameters."""
+        recreated = 0
+        for key, _ in removed:
+            try:
+                self.cache.get_or_create(key, functools.partial(factory, *key[1:]))
+                recreated += 1
+            except requests.HTTPError as e:
+                logger.warning(f"Could not refresh {key}: {e}")
+        return recreated
+
+    def start(self, interval: float = 3600) -> None:
+        """Poll in a background thread, until stop() is called.
+
+        Failing polls are logged, and retried on the next interval.
+
+        Args:
+            interval: The seconds between each poll.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="klass-change-poller", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.exception(f"Polling KLASS for changes failed: {e}")
+
+    def stop(self) -> None:
+        """Stop polling in the background, waiting for a running poll to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the poller is polling in the background."""
+        return self._thread is not None and self._thread.is_alive()
@@ -5,6 +5,7 @@ from ..requests.klass_requests import classificationfamilies
 from ..requests.klass_types import ClassificationFamiliesPartWithNumberType
 from ..requests.klass_types import ClassificationSearchResultsPartType
 from ..requests.klass_types import Language
+from ..utility.profiling import profiled
 from .classification import KlassClassification
 from .family import KlassFamily
 
@@ -20,6 +21,7 @@ class KlassSearchClassifications:
             (Usually caused by languages showing up multiple times)
     """
 
+    @profiled("KlassSearchClassifications")
     def __init__(
         self,
         query: str = "",
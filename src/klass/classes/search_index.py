@@ -0,0 +1,430 @@
+import heapq
+import json
+import logging
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+import requests
+from typing_extensions import Self
+
+from ..requests.klass_requests import classification_by_id
+from ..requests.klass_requests import classificationfamilies
+from ..requests.klass_requests import classificationfamilies_by_id
+from ..requests.klass_requests import codes_at
+from ..requests.klass_requests import version_by_id
+from ..requests.klass_types import Language
+from ..requests.klass_types import SearchIndexDocumentType
+from ..utility.naming import tokenize
+
+logger = logging.getLogger(__name__)
+
+SearchKind = Literal["classification", "variant", "code"]
+RESULT_COLUMNS: list[str] = [
+    "score",
+    "kind",
+    "classification_id",
+    "classification_name",
+    "item_id",
+    "item_name",
+]
+# How much a match in each field counts, names count more than descriptions
+FIELD_WEIGHTS: dict[str, float] = {
+    "name": 3.0,
+    "code": 3.0,
+    "shortName": 2.0,
+    "description": 1.0,
+    "notes": 0.5,
+}
+# Words only matching the start of an indexed word count less than whole words
+PREFIX_WEIGHT: float = 0.5
+
+
+class KlassSearchIndex:
+    """A local full-text index over classifications, their variants and their codes.
+
+    Searching the index does not call the KLASS-API, so results come back in milliseconds,
+    and you can search inside the codelists, which the API's search-endpoint can not do.
+    Build the index from the API with from_catalog(), store it with save(), and load() the snapshot later.
+
+    Matches in names weigh more than matches in short names, descriptions and notes.
+    The last word of the query also matches as a prefix, so "akva" finds "Akvakultur".
+
+    Example:
+        index = KlassSearchIndex.from_catalog(ssbsection="426")
+        index.search("akvakultur", kind="code")
+    """
+
+    def __init__(self) -> None:
+        self.documents: list[SearchIndexDocumentType] = []
+        self._postings: defaultdict[str, dict[int, float]] = defaultdict(dict)
+        self._removed: set[int] = set()
+        self._vocabulary: list[str] | None = None
+
+    def __len__(self) -> int:
+        """Get the amount of searchable documents in the index."""
+        return len(self.documents) - len(self._removed)
+
+    def __str__(self) -> str:
+        """Print a summary of what the index contains."""
+        counts: defaultdict[str, int] = defaultdict(int)
+        for doc in self._active_documents():
+            counts[doc["kind"]] += 1
+        return f"""Local KLASS search index
+        Classifications: {counts["classification"]}
+        Variants: {counts["variant"]}
+        Codes: {counts["code"]}
+        Unique words: {len(self._postings)}
+        """
+
+    def __repr__(self) -> str:
+        """Get a representation of the object, it has to be rebuilt or loaded to be recreated."""
+        return f"KlassSearchIndex() # {len(self)} documents"
+
+    @classmethod
+    def from_catalog(
+        cls,
+        classification_ids: Iterable[str | int] | None = None,
+        date: str | None = None,
+        ssbsection: str = "",
+        include_codes: bool = True,
+        include_variants: bool = False,
+        language: Language = "nb",
+    ) -> Self:
+        """Build an index by getting classifications, and optionally their codes and variants, from the KLASS-API.
+
+        Is slow, as it does at least one request per classification, but only has to be run once.
+        Save the result with save() to avoid rebuilding it.
+
+        Args:
+            classification_ids: The classifications to index. If None, indexes all classifications in all families.
+            date: The date the indexed codelists should be valid at. "YYYY-MM-DD". Defaults to today.
+            ssbsection: Limit the classifications found through the families to a section, when no IDs are given.
+            include_codes: Whether to index the codes valid at the date.
+            include_variants: Whether to index the names of the variants on the latest version of each classification.
+            language: The language of the names. "nb", "nn" or "en".
+
+        Returns:
+            Self: The built index.
+        """
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+        if classification_ids is None:
+            classification_ids = cls._catalog_classification_ids(ssbsection, language)
+        index = cls()
+        for classification_id in classification_ids:
+            index.add_from_api(
+                classification_id,
+                date=date,
+                include_codes=include_codes,
+                include_variants=include_variants,
+                language=language,
+            )
+        return index
+
+    @staticmethod
+    def _catalog_classification_ids(ssbsection: str, language: Language) -> list[str]:
+        """Find the IDs of all classifications through the families, in the order they are found, without duplicates."""
+        families = classificationfamilies(ssbsection=ssbsection, language=language)
+        ids: dict[str, None] = {}
+        for family in families.get("_embedded", {}).get("classificationFamilies", []):
+            family_id = family["_links"]["self"]["href"].split("/")[-1]
+            result = classificationfamilies_by_id(
+                family_id, ssbsection=ssbsection, language=language
+            )
+            for cl in result["classifications"]:
+                ids[cl["_links"]["self"]["href"].split("/")[-1]] = None
+        return list(ids)
+
+    def add_from_api(
+        self,
+        classification_id: str | int,
+        date: str | None = None,
+        include_codes: bool = True,
+        include_variants: bool = False,
+        language: Language = "nb",
+    ) -> Self:
+        """Get a single classification from the KLASS-API and add it to the index.
+
+        Args:
+            classification_id: The ID of the classification.
+            date: The date the indexed codelist should be valid at. "YYYY-MM-DD". Defaults to today.
+            include_codes: Whether to index the codes valid at the date.
+            include_variants: Whether to index the names of the variants on the latest version.
+            language: The language of the names. "nb", "nn" or "en".
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+        result = classification_by_id(classification_id, language=language)
+        name = result.get("name", "")
+        self.add_classification(classification_id, name, result.get("description", ""))
+        versions = result.get("versions", [])
+        if include_variants and versions:
+            latest = sorted(versions, key=lambda x: x["validFrom"])[-1]
+            version = version_by_id(
+                latest["_links"]["self"]["href"].split("/")[-1], language=language
+            )
+            self.add_variants(
+                classification_id,
+                name,
+                {
+                    v["_links"]["self"]["href"].split("/")[-1]: v["name"]
+                    for v in version.get("classificationVariants", [])
+                },
+            )
+        if include_codes:
+            try:
+                data = codes_at(classification_id, date=date, language=language)
+            except requests.HTTPError as e:
+                logger.warning(
+                    "No codes indexed for classification %s at %s: %s",
+                    classification_id,
+                    date,
+                    e,
+                )
+            else:
+                self.add_codes(classification_id, name, data)
+        return self
+
+    def add_classification(
+        self, classification_id: str | int, name: str, description: str = ""
+    ) -> Self:
+        """Add the name and description of a classification to the index.
+
+        Args:
+            classification_id: The ID of the classification.
+            name: The name of the classification.
+            description: The description of the classification.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        self._add_document(
+            {
+                "kind": "classification",
+                "classification_id": int(classification_id),
+                "classification_name": name,
+                "item_id": str(classification_id),
+                "item_name": name,
+                "fields": {"name": name, "description": description},
+            }
+        )
+        return self
+
+    def add_variants(
+        self,
+        classification_id: str | int,
+        classification_name: str,
+        variants: dict[str, str],
+    ) -> Self:
+        """Add variant names to the index, in the shape returned by KlassVersion.variants_simple().
+
+        Args:
+            classification_id: The ID of the classification owning the variants.
+            classification_name: The name of the classification owning the variants.
+            variants: Variant IDs as keys, and variant names as values.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        for variant_id, variant_name in variants.items():
+            self._add_document(
+                {
+                    "kind": "variant",
+                    "classification_id": int(classification_id),
+                    "classification_name": classification_name,
+                    "item_id": str(variant_id),
+                    "item_name": variant_name,
+                    "fields": {"name": variant_name},
+                }
+            )
+        return self
+
+    def add_codes(
+        self,
+        classification_id: str | int,
+        classification_name: str,
+        data: pd.DataFrame,
+    ) -> Self:
+        """Add the codes of a codelist to the index, like the .data on KlassCodes or KlassVersion.
+
+        Args:
+            classification_id: The ID of the classification owning the codes.
+            classification_name: The name of the classification owning the codes.
+            data: A dataframe with at least the columns "code" and "name".
+                The columns "shortName" and "notes" are also indexed, if they exist.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        text_cols = [c for c in ["shortName", "notes"] if c in data.columns]
+        cols = [data["code"], data["name"]] + [data[c] for c in text_cols]
+        for code, name, *texts in zip(*cols, strict=True):
+            fields = {"code": str(code), "name": name or ""}
+            for col, text in zip(text_cols, texts, strict=True):
+                if isinstance(text, str) and text:
+                    fields[col] = text
+            self._add_document(
+                {
+                    "kind": "code",
+                    "classification_id": int(classification_id),
+                    "classification_name": classification_name,
+                    "item_id": str(code),
+                    "item_name": name or "",
+                    "fields": fields,
+                }
+            )
+        return self
+
+    def remove_classification(self, classification_id: str | int) -> Self:
+        """Remove a classification, and its variants and codes, from the search results.
+
+        Args:
+            classification_id: The ID of the classification to remove.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        classification_id = int(classification_id)
+        for i, doc in enumerate(self.documents):
+            if doc["classification_id"] == classification_id:
+                self._removed.add(i)
+        return self
+
+    def _add_document(self, doc: SearchIndexDocumentType) -> None:
+        doc_id = len(self.documents)
+        self.documents.append(doc)
+        for field, text in doc["fields"].items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for token in tokenize(text):
+                postings = self._postings[token]
+                postings[doc_id] = postings.get(doc_id, 0.0) + weight
+        self._vocabulary = None
+
+    def _active_documents(self) -> Iterator[SearchIndexDocumentType]:
+        for i, doc in enumerate(self.documents):
+            if i not in self._removed:
+                yield doc
+
+    def _matching_terms(self, token: str, prefix: bool) -> list[tuple[str, float]]:
+        """Find the indexed words matching a query word, with how much each match should weigh."""
+        terms = [(token, 1.0)] if token in self._postings else []
+        if prefix:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+            vocab = self._vocabulary
+            i = bisect_left(vocab, token)
+            while i < len(vocab) and vocab[i].startswith(token):
+                if vocab[i] != token:
+                    terms.append((vocab[i], PREFIX_WEIGHT))
+                i += 1
+        return terms
+
+    def search(
+        self,
+        query: str,
+        kind: SearchKind | None = None,
+        classification_id: str | int | None = None,
+        top_k: int = 20,
+    ) -> pd.DataFrame:
+        """Search the index, ranking the results by how well they match.
+
+        Words that are rare in the index count more than common ones,
+        and results matching all the words in the query rank above results matching only some.
+
+        Args:
+            query: The words to search for.
+            kind: Limit the results to "classification", "variant" or "code".
+            classification_id: Limit the results to a single classification.
+            top_k: The maximum amount of results to return.
+
+        Returns:
+            pd.DataFrame: The best matches, with the columns "score", "kind", "classification_id",
+            "classification_name", "item_id" and "item_name". For codes, the item_id is the code.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not len(self):
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        scores: defaultdict[int, float] = defaultdict(float)
+        matched: defaultdict[int, int] = defaultdict(int)
+        for i, token in enumerate(tokens):
+            seen: set[int] = set()
+            for term, factor in self._matching_terms(
+                token, prefix=i == len(tokens) - 1
+            ):
+                postings = self._postings[term]
+                idf = math.log(1 + len(self) / len(postings))
+                for doc_id, weight in postings.items():
+                    scores[doc_id] += factor * idf * weight
+                    seen.add(doc_id)
+            for doc_id in seen:
+                matched[doc_id] += 1
+
+        wanted_id = int(classification_id) if classification_id is not None else None
+
+        def keep(doc_id: int) -> bool:
+            doc = self.documents[doc_id]
+            return (
+                doc_id not in self._removed
+                and (kind is None or doc["kind"] == kind)
+                and (wanted_id is None or doc["classification_id"] == wanted_id)
+            )
+
+        ranked = heapq.nlargest(
+            top_k,
+            (
+                (score * matched[doc_id] / len(tokens), doc_id)
+                for doc_id, score in scores.items()
+                if keep(doc_id)
+            ),
+        )
+        return pd.DataFrame(
+            [
+                {
+                    "score": round(score, 4),
+                    **{
+                        col: self.documents[doc_id][col]  # type: ignore[literal-required]
+                        for col in RESULT_COLUMNS[1:]
+                    },
+                }
+                for score, doc_id in ranked
+            ],
+            columns=RESULT_COLUMNS,
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Store the indexed documents as a json-snapshot, that can be loaded again with load().
+
+        Args:
+            path: The file to write to.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"documents": list(self._active_documents())}, f, ensure_ascii=False
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> Self:
+        """Rebuild an index from a json-snapshot written by save().
+
+        Args:
+            path: The file to read from.
+
+        Returns:
+            Self: The rebuilt index.
+        """
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        index = cls()
+        for doc in snapshot["documents"]:
+            index._add_document(doc)
+        return index
@@ -1,6 +1,9 @@
 from collections import defaultdict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING
 
 import pandas as pd
+from typing_extensions import Self
 
 from ..requests.klass_requests import variant
 from ..requests.klass_requests import variant_at
@@ -8,8 +11,17 @@ from ..requests.klass_requests import variants_by_id
 from ..requests.klass_types import CorrespondenceTablesType
 from ..requests.klass_types import Language
 from ..requests.klass_types import VariantsByIdType
-from ..utility.filters import apply_presentation_name_fallback
-from ..utility.filters import limit_na_level
+from ..utility.dtypes import compact_dtypes
+from ..utility.filters import MappingMemo
+from ..utility.object_cache import object_cache
+from ..utility.profiling import phase
+from ..utility.profiling import profiled
+from .lookup import KlassLookup
+from .multimap import KlassMultiMap
+from .multimap import multimap_from_frame
+
+if TYPE_CHECKING:
+    import polars as pl
 
 
 class KlassVariant:
@@ -30,6 +42,7 @@ class KlassVariant:
         language: The language of the variant to select. For example: 'nb'.
     """
 
+    @profiled("KlassVariant")
     def __init__(
         self,
         variant_id: str | int,
@@ -39,13 +52,14 @@ class KlassVariant:
         self.variant_id = variant_id
         self.select_level = select_level
         self.language: Language = language
+        self._mappings = MappingMemo()
 
         self.get_variant()
 
     def get_variant(self, select_level: int = 0) -> None:
         """Get the data from the API, setting it as attributes on the object.
 
-        The codes are put into the .data attribute.
+        The codes are put into the .data attribute, parsed when it is first accessed.
         Other keys are added dynamically to the object, like classificationItems.
 
         Args:
@@ -77,13 +91,28 @@ class KlassVariant:
         ]
         self._links: dict[str, dict[str, str]] = result["_links"]
 
-        df = pd.json_normalize(self.classificationItems)
         if not select_level and self.select_level:
             select_level = self.select_level
-        if select_level:
-            self.data = df[df["level"] == str(select_level)]
-        else:
-            self.data = df
+        # The codes are normalized into .data on first access, metadata-only use skips the work
+        self._data_select_level = select_level
+        self._data: pd.DataFrame | None = None
+        self._mappings.clear()
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The codes of the variant as a dataframe, built from the classificationItems the first time it is accessed."""
+        if self._data is None:
+            with phase("normalize"):
+                df = pd.json_normalize(self.classificationItems)
+                if self._data_select_level:
+                    df = df[df["level"] == str(self._data_select_level)]
+            self._data = df
+        return self._data
+
+    @data.setter
+    def data(self, value: pd.DataFrame) -> None:
+        self._data = value
+        self._mappings.clear()
 
     def __repr__(self) -> str:
         """Get a string representation of how to recreate the current object, including set parameters."""
@@ -101,6 +130,32 @@ class KlassVariant:
         result += f"\nPreview of the .data (5 first rows):\n{self.data[self.data.columns[:5]].head(5)}"
         return result
 
+    def compact_dtypes(self) -> Self:
+        """Convert the .data to dtypes using less memory, levels to small integers, dates to datetime64 and codes to categoricals.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        self.data = compact_dtypes(self.data)
+        return self
+
+    def to_polars(self) -> "pl.DataFrame":
+        """Get the codes as a Polars DataFrame, needs the optional dependency polars.
+
+        If the .data has not been built yet, the Polars DataFrame is built straight from the classificationItems,
+        skipping pandas altogether.
+
+        Returns:
+            pl.DataFrame: The codes of the variant.
+        """
+        from ..io.polars_frames import pandas_to_polars
+        from ..io.polars_frames import records_to_polars
+
+        if self._data is not None:
+            return pandas_to_polars(self._data)
+        return records_to_polars(self.classificationItems, self._data_select_level)
+
+    @profiled("KlassVariant.to_dict")
     def to_dict(
         self,
         key: str = "code",
@@ -112,6 +167,7 @@ class KlassVariant:
         """Extract two columns from the data, turning them into a dict.
 
         If you specify a value for "other", returns a defaultdict instead.
+        The mapping is built once per combination of parameters, later calls get their own copy, until .data is replaced, refetched or edited.
 
         Args:
             key: The name of the column with the values you want as keys.
@@ -123,12 +179,91 @@ class KlassVariant:
         Returns:
             dict[str, str] | defaultdict[str, str]: The extracted columns as a dict or defaultdict.
         """
-        data, value_col = apply_presentation_name_fallback(self.data, value)
-        limit_data = limit_na_level(data, key, value_col, remove_na, select_level)
-        mapping = dict(zip(limit_data[key], limit_data[value_col], strict=False))
+        mapping = self._mappings.mapping(self.data, key, value, remove_na, select_level)
         if other:
-            mapping = defaultdict(lambda: other, mapping)
-        return mapping
+            return defaultdict(lambda: other, mapping)
+        return dict(mapping)
+
+    def to_lookup(
+        self,
+        key: str = "code",
+        value: str = "parentCode",
+        other: str | None = None,
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> KlassLookup:
+        """Extract two columns from the data into a compact, immutable lookup, cheap to send to other processes.
+
+        Takes the same parameters as to_dict().
+
+        Args:
+            key: The name of the column with the values you want as keys.
+            value: The name of the column with the values you want as values.
+            other: The value the lookup maps missing codes to.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+            select_level: Usually you want level 2, not level 1, as level 1 just defines the variants codes / groups.
+
+        Returns:
+            KlassLookup: The lookup, backed by sorted numpy arrays.
+        """
+        return KlassLookup.from_mapping(
+            self.to_dict(key, value, remove_na=remove_na, select_level=select_level),
+            other=other,
+        )
+
+    def to_multimap(
+        self,
+        key: str = "code",
+        value: str = "parentCode",
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> KlassMultiMap:
+        """Extract two columns from the data, keeping every value of a code, unlike to_dict().
+
+        Use inverse() on the result to go from each parent code to all of its codes.
+
+        Args:
+            key: The name of the column with the codes to map from.
+            value: The name of the column with the codes to map to.
+            remove_na: Set to False if you want to keep empty mappings over the key and value columns.
+            select_level: Keep only a specific level.
+
+        Returns:
+            KlassMultiMap: The codes of the key column, each with all of its codes in the value column.
+        """
+        return multimap_from_frame(self.data, key, value, remove_na, select_level)
+
+
+def cached_variant(
+    variant_id: str | int,
+    select_level: int | None = None,
+    language: Language = "nb",
+) -> KlassVariant:
+    """Get a KlassVariant from the object cache, only asking the API the first time the variant is requested.
+
+    The object is shared with everyone else requesting the same variant with the same parameters.
+
+    Args:
+        variant_id: The variant_id of the variant.
+        select_level: The level of the dataset to keep.
+        language: The language of the variant.
+
+    Returns:
+        KlassVariant: The cached, or newly created, variant.
+    """
+    return object_cache.get_or_create(
+        variant_cache_key(variant_id, select_level, language),
+        lambda: KlassVariant(variant_id, select_level, language),
+    )
+
+
+def variant_cache_key(
+    variant_id: str | int,
+    select_level: int | None = None,
+    language: Language = "nb",
+) -> tuple[Hashable, ...]:
+    """Get the key cached_variant() stores the variant under in the object cache."""
+    return ("variant", str(variant_id), select_level, language)
 
 
 class KlassVariantSearchByName(KlassVariant):
@@ -158,6 +293,7 @@ class KlassVariantSearchByName(KlassVariant):
         include_future: Whether to include future codes. Defaults to False.
     """
 
+    @profiled("KlassVariantSearchByName")
     def __init__(
         self,
         classification_id: str | int,
@@ -179,6 +315,7 @@ class KlassVariantSearchByName(KlassVariant):
         self.presentation_name_pattern = presentation_name_pattern
         self.language = language
         self.include_future = include_future
+        self._mappings = MappingMemo()
         self.get_variant()
 
     def get_variant(self, select_level: int | None = None) -> None:
@@ -209,6 +346,7 @@ class KlassVariantSearchByName(KlassVariant):
                 language=self.language,
                 include_future=self.include_future,
             )
+        self._mappings.clear()
 
     def __repr__(self) -> str:
         """Get a string representation of how to recreate the current object, including set parameters."""
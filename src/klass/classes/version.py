@@ -1,14 +1,33 @@
+import itertools
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+from typing import Any
+
 import pandas as pd
 from typing_extensions import Self
 from typing_extensions import overload
 
+from ..io.partitions import apply_mappings
+from ..io.partitions import map_partitions
+from ..requests.klass_requests import correspondence_table_by_id_call
+from ..requests.klass_requests import variants_by_id_call
 from ..requests.klass_requests import version_by_id
 from ..requests.klass_types import CorrespondenceTablesType
 from ..requests.klass_types import Language
 from ..requests.klass_types import VersionByIDType
+from ..requests.session import prefetch
+from ..utility.dtypes import compact_dtypes
 from ..utility.naming import create_shortname
+from ..utility.object_cache import object_cache
+from ..utility.profiling import phase
+from ..utility.profiling import profiled
 from .correspondence import KlassCorrespondence
 from .variant import KlassVariant
+from .variant import cached_variant
+from .variant import variant_cache_key
+
+if TYPE_CHECKING:
+    import polars as pl
 
 
 class KlassVersion:
@@ -23,6 +42,7 @@ class KlassVersion:
         include_future: If the version should include future versions. Defaults to False.
     """
 
+    @profiled("KlassVersion")
     def __init__(
         self,
         version_id: str | int,
@@ -69,7 +89,19 @@ class KlassVersion:
         ]
         self.links: dict[str, dict[str, str]] = result["_links"]
 
-        self.get_classification_codes()
+        # The codes are normalized into .data on first access, metadata-only use skips the work
+        self._data: pd.DataFrame | None = None
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The codelist of the version as a dataframe, built from the classificationItems the first time it is accessed."""
+        if self._data is None:
+            self.get_classification_codes()
+        return self._data  # type: ignore[return-value]
+
+    @data.setter
+    def data(self, value: pd.DataFrame) -> None:
+        self._data = value
 
     def __repr__(self) -> str:
         """Get a string representation of how to recreate the object, including its set parameters."""
@@ -117,7 +149,7 @@ class KlassVersion:
     def get_classification_codes(self, select_level: int | None = None) -> Self:
         """Get the codelists of the version. Inserts the result into the KlassVersions .data attribute, instead of returning it.
 
-        Run as a part of the class initialization.
+        Run the first time .data is accessed, run it again to select a different level.
 
         Args:
             select_level: The level of the version to keep in the data. Setting to 0 keeps all levels.
@@ -126,19 +158,50 @@ class KlassVersion:
             Self: Returns self to make the method more easily chainable.
         """
         select_level = select_level if select_level else self.select_level
-        data = pd.json_normalize(self.classificationItems)
+        with phase("normalize"):
+            data = pd.json_normalize(self.classificationItems)
+            level_map = {
+                str(item["levelNumber"]): item["levelName"] for item in self.levels
+            }
+            data.insert(
+                data.columns.to_list().index("level") + 1,
+                "levelName",
+                data["level"].astype(str).map(level_map),
+            )
+            if select_level:
+                data = data[data["level"].astype(str) == str(select_level)]
+        self.data = data
+        return self
+
+    def compact_dtypes(self) -> Self:
+        """Convert the .data to dtypes using less memory, levels to small integers, dates to datetime64 and codes to categoricals.
+
+        Returns:
+            Self: Returns self to make the method more easily chainable.
+        """
+        self.data = compact_dtypes(self.data)
+        return self
+
+    def to_polars(self) -> "pl.DataFrame":
+        """Get the codelist as a Polars DataFrame, needs the optional dependency polars.
+
+        If the .data has not been built yet, the Polars DataFrame is built straight from the classificationItems,
+        skipping pandas altogether.
+
+        Returns:
+            pl.DataFrame: The codes of the version, with their levelName.
+        """
+        from ..io.polars_frames import map_codes
+        from ..io.polars_frames import pandas_to_polars
+        from ..io.polars_frames import records_to_polars
+
+        if self._data is not None:
+            return pandas_to_polars(self._data)
         level_map = {
             str(item["levelNumber"]): item["levelName"] for item in self.levels
         }
-        data.insert(
-            data.columns.to_list().index("level") + 1,
-            "levelName",
-            data["level"].astype(str).map(level_map),
-        )
-        if select_level:
-            data = data[data["level"].astype(str) == str(select_level)]
-        self.data = data
-        return self
+        frame = records_to_polars(self.classificationItems, self.select_level)
+        return map_codes(frame, "level", level_map, "levelName")
 
     def variants_simple(self) -> dict[str, str]:
         """Get a simplifed dictionary of the variants, ids as keys, names as values."""
@@ -172,7 +235,7 @@ class KlassVersion:
         if variant_id is None and not search_term:
             raise ValueError("You need to specify either variant_id or a search-term.")
         if variant_id is not None:
-            return KlassVariant(variant_id, select_level, language)
+            return cached_variant(variant_id, select_level, language)
         if not isinstance(search_term, str):
             raise ValueError(
                 "Hey, did you notice the new search_term parameter? Send in select_level as a keyword argument instead..."
@@ -186,19 +249,27 @@ class KlassVersion:
         if len(found_variants) != 1:
             err_msg = f"When searching for a variant that matches your search, we did not find a single match. If you got multiple matches, be more specific in your search term: {list(found_variants.values())}"
             raise ValueError(err_msg)
-        return KlassVariant(next(iter(found_variants.keys())), select_level, language)
+        return cached_variant(next(iter(found_variants.keys())), select_level, language)
 
     def get_all_variants(self) -> list[KlassVariant]:
         """Get all variants of version as a list of KlassVariants.
 
-        Can be quite slow, as it is doing a request to the KLASS-API for every variant.
+        The variants not already in the object cache are requested together,
+        through the get_many() of the transport, which sends them concurrently.
 
         Returns:
             list[KlassVariant]: List of the variants we found.
 
         """
-        return [KlassVariant(variant_id) for variant_id in self.variants_simple()]
-
+        variant_ids = list(self.variants_simple())
+        with prefetch(
+            variants_by_id_call(variant_id)
+            for variant_id in variant_ids
+            if variant_cache_key(variant_id) not in object_cache
+        ):
+            return [cached_variant(variant_id) for variant_id in variant_ids]
+
+    @profiled("KlassVersion.join_all_variants_on_data")
     def join_all_variants_on_data(
         self,
         shortname_len: int = 3,
@@ -209,6 +280,7 @@ class KlassVersion:
         """Join the variants codes onto the main codes of the version.
 
         Can be quite slow, as it is doing a request to the KLASS-API for every variant.
+        Raises a ValueError if similar column names show up, suggesting using more elements to create the column names.
 
         Args:
             shortname_len: Amount of words from the variants that the new column names will be constructed from.
@@ -219,20 +291,38 @@ class KlassVersion:
 
         Returns:
             pd.DataFrame: The joined pandas dataframe.
-
-        Raises:
-            ValueError: If similar column names show up, raises and error, and suggests using more elements to create the column names.
         """
         if isinstance(data_left, pd.DataFrame):
             data = data_left.copy()
         else:
             data = self.data.copy()
+        mappings = self.variant_mappings(shortname_len, include_cols, data.columns)
+        return apply_mappings(data, mappings, code_col_name)
+
+    def variant_mappings(
+        self,
+        shortname_len: int = 3,
+        include_cols: list[str] | None = None,
+        existing_cols: Iterable[str] = (),
+    ) -> dict[str, dict[str, str]]:
+        """Get the mappings of all the variants on the version, keyed by the column names they are joined on as.
+
+        Can be quite slow, as it is doing a request to the KLASS-API for every variant.
 
-        # Remove all empty columns
-        data.isna().all()
-        all_variants = self.get_all_variants()
-        col_seen = list(data.columns)
-        for variant in all_variants:
+        Args:
+            shortname_len: Amount of words from the variants that the new column names will be constructed from.
+            include_cols: Columns from the variants to make mappings for, in addition to the "parentCode".
+            existing_cols: Column names already in the data, that the new columns can not reuse.
+
+        Returns:
+            dict[str, dict[str, str]]: The new column names as keys, and mappings from the codes as values.
+
+        Raises:
+            ValueError: If similar column names show up, raises and error, and suggests using more elements to create the column names.
+        """
+        col_seen = list(existing_cols)
+        mappings: dict[str, dict[str, str]] = {}
+        for variant in self.get_all_variants():
             shortname = create_shortname(variant, shortname_len=shortname_len)
             if shortname in col_seen:
                 raise ValueError(
@@ -241,14 +331,14 @@ class KlassVersion:
             else:
                 col_seen += [shortname]
 
-            data[shortname] = data[code_col_name].map(variant.to_dict(remove_na=True))
+            mappings[shortname] = variant.to_dict(remove_na=True)
             if include_cols:
                 for col in include_cols:
                     if col in variant.data.columns:
-                        data[f"{shortname}_{col}"] = data[code_col_name].map(
-                            variant.to_dict(value=col, remove_na=True)
+                        mappings[f"{shortname}_{col}"] = variant.to_dict(
+                            value=col, remove_na=True
                         )
-        return data
+        return mappings
 
     def correspondences_simple(self) -> dict[str, dict[str, str]]:
         """Get a simple dictionary of the correspondences.
@@ -338,15 +428,23 @@ class KlassVersion:
     def get_all_correspondences(self) -> list[KlassCorrespondence]:
         """Get all correspondences of version as a list of KlassCorrespondences.
 
+        The correspondence tables are requested together, through the get_many() of the transport.
+
         Returns:
             list[KlassCorrespondence]: List of the correspondences we found.
 
         """
-        return [
-            KlassCorrespondence(correspondence_id)
-            for correspondence_id in self.correspondences_simple()
-        ]
+        correspondence_ids = list(self.correspondences_simple())
+        with prefetch(
+            correspondence_table_by_id_call(correspondence_id)
+            for correspondence_id in correspondence_ids
+        ):
+            return [
+                KlassCorrespondence(correspondence_id)
+                for correspondence_id in correspondence_ids
+            ]
 
+    @profiled("KlassVersion.join_all_correspondences_on_data")
     def join_all_correspondences_on_data(
         self,
         shortname_len: int = 3,
@@ -357,6 +455,7 @@ class KlassVersion:
         """Join the correspondences codes onto the main codes of the version.
 
         Can be quite slow, as it is doing a request to the KLASS-API for every correspondence.
+        Raises a ValueError if similar column names show up, suggesting using more elements to create the column names.
 
         Args:
             shortname_len: Amount of words from the correspondences that the new column names will be constructed from.
@@ -367,19 +466,40 @@ class KlassVersion:
 
         Returns:
             pd.DataFrame: The joined pandas dataframe.
-
-        Raises:
-            ValueError: If similar column names show up, raises and error, and suggests using more elements to create the column names.
         """
         if isinstance(data_left, pd.DataFrame):
             data = data_left.copy()
         else:
             data = self.data.copy()
-        # Remove all empty columns
-        data.isna().all()
-        all_correspondences = self.get_all_correspondences()
-        col_seen = list(data.columns)
-        for correspondence in all_correspondences:
+        mappings = self.correspondence_mappings(
+            shortname_len, include_cols, data.columns
+        )
+        return apply_mappings(data, mappings, code_col_name)
+
+    def correspondence_mappings(
+        self,
+        shortname_len: int = 3,
+        include_cols: list[str] | None = None,
+        existing_cols: Iterable[str] = (),
+    ) -> dict[str, dict[str, str | None]]:
+        """Get the mappings of all the correspondences on the version, keyed by the column names they are joined on as.
+
+        Can be quite slow, as it is doing a request to the KLASS-API for every correspondence.
+
+        Args:
+            shortname_len: Amount of words from the correspondences that the new column names will be constructed from.
+            include_cols: Columns from the correspondences to make mappings for, in addition to the "targetCode".
+            existing_cols: Column names already in the data, that the new columns can not reuse.
+
+        Returns:
+            dict[str, dict[str, str | None]]: The new column names as keys, and mappings from the codes as values.
+
+        Raises:
+            ValueError: If similar column names show up, raises and error, and suggests using more elements to create the column names.
+        """
+        col_seen = list(existing_cols)
+        mappings: dict[str, dict[str, str | None]] = {}
+        for correspondence in self.get_all_correspondences():
             shortname = create_shortname(correspondence, shortname_len=shortname_len)
             if shortname in col_seen:
                 raise ValueError(
@@ -387,18 +507,16 @@ class KlassVersion:
                 )
             else:
                 col_seen += [shortname]
-            data[shortname] = data[code_col_name].map(
-                correspondence.to_dict(remove_na=True)
-            )
+            mappings[shortname] = correspondence.to_dict(remove_na=True)
             if include_cols:
                 for col in include_cols:
                     if col in correspondence.data.columns:
-                        data[f"{shortname}_{col}"] = data[code_col_name].map(
-                            correspondence.to_dict(value=col, remove_na=True)
+                        mappings[f"{shortname}_{col}"] = correspondence.to_dict(
+                            value=col, remove_na=True
                         )
+        return mappings
 
-        return data
-
+    @profiled("KlassVersion.join_all_variants_correspondences_on_data")
     def join_all_variants_correspondences_on_data(
         self,
         shortname_len: int = 3,
@@ -426,3 +544,81 @@ class KlassVersion:
         return self.join_all_correspondences_on_data(
             shortname_len, data, code_col_name, include_cols
         )
+
+    def join_all_variants_correspondences_on_partitions(
+        self,
+        data: Any,
+        shortname_len: int = 3,
+        code_col_name: str = "code",
+        include_cols: list[str] | None = None,
+        max_workers: int | None = None,
+        categorical: bool = False,
+    ) -> Any:
+        """Join both variants and correspondences onto partitioned data, too big for join_all_variants_correspondences_on_data.
+
+        The mappings are requested and built once, then applied to every partition in parallel.
+        Dask DataFrames get the new columns lazily, through map_partitions.
+        An iterator of pandas DataFrames is spread over a pool of processes, yielding the chunks in order.
+
+        Args:
+            data: A Dask DataFrame, or an iterable of pandas DataFrames (like pd.read_csv(..., chunksize=...)).
+            shortname_len: Amount of words from the correspondences and variants that the new column names will be constructed from.
+            code_col_name: The column in the data to join the code on.
+            include_cols: A list of the columns from the correspondences and variants you want to include when adding to the data.
+            max_workers: The amount of processes used for pandas chunks. Defaults to the amount of cores.
+            categorical: Store the joined columns as categoricals, to use bytes instead of strings per row.
+
+        Returns:
+            Any: A Dask DataFrame, or an iterator of pandas DataFrames, with the variants and correspondences joined on.
+        """
+        existing_cols: list[str] = []
+        if hasattr(data, "columns"):
+            existing_cols = list(data.columns)
+        else:
+            # Peek at the first chunk for its column names, then put it back in front
+            data = iter(data)
+            first = next(data, None)
+            if first is None:
+                return iter([])
+            existing_cols = list(first.columns)
+            data = itertools.chain([first], data)
+        mappings: dict[str, dict[str, Any]] = {}
+        mappings.update(
+            self.variant_mappings(shortname_len, include_cols, existing_cols)
+        )
+        mappings.update(
+            self.correspondence_mappings(
+                shortname_len, include_cols, [*existing_cols, *mappings]
+            )
+        )
+        return map_partitions(data, mappings, code_col_name, max_workers, categorical)
+
+
+def cached_version(
+    version_id: str | int,
+    select_level: int | None = None,
+    language: Language = "nb",
+    include_future: bool = False,
+) -> KlassVersion:
+    """Get a KlassVersion from the object cache, only asking the API the first time the version is requested.
+
+    The object is shared with everyone else requesting the same version with the same parameters.
+
+    Args:
+        version_id: The ID of the version.
+        select_level: The level in the codelist-data to keep.
+        language: The language of the version.
+        include_future: If the version should include future versions.
+
+    Returns:
+        KlassVersion: The cached, or newly created, version.
+    """
+    return object_cache.get_or_create(
+        ("version", str(version_id), select_level, language, include_future),
+        lambda: KlassVersion(
+            version_id,
+            select_level=select_level,
+            language=language,
+            include_future=include_future,
+        ),
+    )
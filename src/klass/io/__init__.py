@@ -0,0 +1,5 @@
+"""The io module streams files too large for memory through the mappings from KLASS.
+
+Files are read in record batches with pyarrow, the mappings are applied to each batch,
+and the result is written out batch by batch, so only a batch at a time is held in memory.
+"""
@@ -0,0 +1,263 @@
+from collections.abc import Mapping
+from typing import Any
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from ..requests.klass_requests import changes
+from ..requests.klass_types import OptionalLanguage
+from .streaming import ArrowMapping
+
+# The tables behind the macros, filled by register_codes() and register_mapping()
+NAMES_TABLE: str = "klass_names"
+MAPS_TABLE: str = "klass_maps"
+
+NAMES_SCHEMA = pa.schema(
+    [
+        ("classification_id", pa.string()),
+        ("code", pa.string()),
+        ("name", pa.string()),
+        ("valid_from", pa.timestamp("ns")),
+        ("valid_to", pa.timestamp("ns")),
+    ]
+)
+MAPS_SCHEMA = pa.schema(
+    [("mapping", pa.string()), ("code", pa.string()), ("value", pa.string())]
+)
+
+# Written as aggregating subqueries, so DuckDB decorrelates them into hash joins over the whole column
+MACROS: tuple[str, ...] = (
+    f"""
+    CREATE OR REPLACE MACRO klass_name(class_id, item_code, at_date) AS (
+        SELECT max_by(n.name, n.valid_from)
+        FROM {NAMES_TABLE} AS n
+        WHERE n.classification_id = CAST(class_id AS VARCHAR)
+            AND n.code = CAST(item_code AS VARCHAR)
+            AND (n.valid_from IS NULL OR n.valid_from <= CAST(at_date AS TIMESTAMP))
+            AND (n.valid_to IS NULL OR CAST(at_date AS TIMESTAMP) < n.valid_to)
+    )
+    """,
+    f"""
+    CREATE OR REPLACE MACRO klass_map(mapping_name, item_code) AS (
+        SELECT any_value(m.value)
+        FROM {MAPS_TABLE} AS m
+        WHERE m.mapping = CAST(mapping_name AS VARCHAR)
+            AND m.code = CAST(item_code AS VARCHAR)
+    )
+    """,
+)
+
+
+def to_arrow(data: pd.DataFrame | Any) -> pa.Table:
+    """Convert the .data of a KLASS-object, or a dataframe, to an Arrow table for DuckDB to scan.
+
+    Arrow-backed string columns, as pandas 3 makes them, become part of the table as they are.
+    Object-columns, which older versions of pandas use for strings, are converted into new Arrow arrays.
+
+    Args:
+        data: A dataframe, or an object with a .data attribute, like KlassCodes, KlassVariant or KlassCorrespondence.
+
+    Returns:
+        pa.Table: The data as an Arrow table.
+    """
+    if not isinstance(data, pd.DataFrame):
+        data = data.data
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def _timestamps(data: pd.DataFrame, col: str, default: str | None) -> pd.Series:
+    if col in data.columns:
+        return pd.to_datetime(data[col], errors="coerce")
+    return pd.Series(
+        pd.NaT if default is None else pd.Timestamp(default),
+        index=data.index,
+        dtype="datetime64[ns]",
+    )
+
+
+class KlassDuckDB:
+    """Register KLASS codes, variants, correspondences and changes as tables in DuckDB, to join on in SQL.
+
+    The data is registered as Arrow tables, which DuckDB scans in place, without loading it into the database.
+    Two macros look up codes in SQL, from what has been registered:
+    klass_name(classification_id, code, date) gets the name of a code valid at the date,
+    and klass_map(mapping, code) maps a code through a correspondence, or another mapping, by its registered name.
+
+    Example:
+        db = KlassDuckDB()
+        db.register_codes("kommuner", KlassCodes(131, "2020-01-01", "2024-01-01"))
+        db.sql("SELECT *, klass_name(131, kommune, dato) AS navn FROM 'data.parquet'")
+
+    Args:
+        connection: The DuckDB-connection to register the tables on, defaults to a new in-memory database.
+    """
+
+    def __init__(self, connection: duckdb.DuckDBPyConnection | None = None) -> None:
+        self.connection = connection if connection is not None else duckdb.connect()
+        self._names: dict[str, pa.Table] = {}
+        self._maps: dict[str, pa.Table] = {}
+        self._registered: dict[str, pa.Table] = {}
+        self.connection.register(NAMES_TABLE, NAMES_SCHEMA.empty_table())
+        self.connection.register(MAPS_TABLE, MAPS_SCHEMA.empty_table())
+        for macro in MACROS:
+            self.connection.execute(macro)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the object, with the names of the registered tables."""
+        return (
+            f"KlassDuckDB(tables={list(self._registered)}, mappings={list(self._maps)})"
+        )
+
+    def register(self, name: str, data: pd.DataFrame | Any) -> duckdb.DuckDBPyRelation:
+        """Register a dataframe, or the .data of a KLASS-object, as a table.
+
+        Registering a new table with the same name replaces the old one.
+
+        Args:
+            name: The name of the table in SQL.
+            data: A dataframe, or an object with a .data attribute.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The registered table.
+        """
+        table = to_arrow(data)
+        self.connection.register(name, table)
+        self._registered[name] = table
+        return self.connection.table(name)
+
+    def register_codes(
+        self, name: str, codes: Any, classification_id: str | int | None = None
+    ) -> duckdb.DuckDBPyRelation:
+        """Register the codes of a KlassCodes as a table, and add their names to the klass_name macro.
+
+        Registering codes again under the same name replaces their names, instead of adding them twice.
+
+        Args:
+            name: The name of the table in SQL.
+            codes: A KlassCodes, or another object with a .data, like a KlassVersion.
+            classification_id: The ID to look up the names by in klass_name(),
+                defaults to the classification_id of the codes.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The registered table.
+
+        Raises:
+            ValueError: If the classification_id is not set, and the codes do not have one.
+        """
+        classification_id = classification_id or getattr(
+            codes, "classification_id", None
+        )
+        if classification_id is None:
+            raise ValueError(
+                f"Set a classification_id to look up the names of {name} by."
+            )
+        relation = self.register(name, codes)
+        data = codes.data
+        names = pd.DataFrame(
+            {
+                "classification_id": str(classification_id),
+                "code": data["code"].astype("string"),
+                "name": data["name"].astype("string"),
+                "valid_from": _timestamps(
+                    data, "validFrom", getattr(codes, "from_date", None)
+                ),
+                "valid_to": _timestamps(
+                    data, "validTo", getattr(codes, "to_date", None)
+                ),
+            }
+        )
+        self._names[name] = pa.Table.from_pandas(
+            names, schema=NAMES_SCHEMA, preserve_index=False
+        )
+        self.connection.register(
+            NAMES_TABLE, pa.concat_tables(list(self._names.values()))
+        )
+        return relation
+
+    def register_variant(self, name: str, variant: Any) -> duckdb.DuckDBPyRelation:
+        """Register the codes of a KlassVariant as a table, and its code-to-parentCode mapping for klass_map().
+
+        Args:
+            name: The name of the table in SQL, and of the mapping in klass_map().
+            variant: The KlassVariant.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The registered table.
+        """
+        self.register_mapping(name, variant.to_dict())
+        return self.register(name, variant)
+
+    def register_correspondence(
+        self, name: str, correspondence: Any
+    ) -> duckdb.DuckDBPyRelation:
+        """Register a KlassCorrespondence as a table, and its sourceCode-to-targetCode mapping for klass_map().
+
+        Args:
+            name: The name of the table in SQL, and of the mapping in klass_map().
+            correspondence: The KlassCorrespondence.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The registered table.
+        """
+        self.register_mapping(name, correspondence.to_dict())
+        return self.register(name, correspondence)
+
+    def register_changes(
+        self,
+        name: str,
+        classification_id: str | int,
+        from_date: str,
+        to_date: str | None = None,
+        language: OptionalLanguage = "nb",
+    ) -> duckdb.DuckDBPyRelation:
+        """Get the code changes of a classification from the API, and register them as a table.
+
+        Args:
+            name: The name of the table in SQL.
+            classification_id: The classification ID.
+            from_date: The start of the period to get changes in. "YYYY-MM-DD".
+            to_date: The end of the period to get changes in. "YYYY-MM-DD".
+            language: The language of the names.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The registered table, with a row per changed code.
+        """
+        data = changes(classification_id, from_date, to_date, language)
+        if "changeOccurred" in data.columns:
+            data["changeOccurred"] = pd.to_datetime(data["changeOccurred"])
+        return self.register(name, data)
+
+    def register_mapping(self, name: str, mapping: Mapping[str, Any] | Any) -> None:
+        """Make a mapping available to klass_map() by its name.
+
+        Registering a new mapping with the same name replaces the old one.
+
+        Args:
+            name: The name of the mapping in klass_map().
+            mapping: A dict like the ones from to_dict(), a KlassLookup, or an object with a to_dict() method.
+        """
+        arrow_mapping = ArrowMapping(mapping)
+        self._maps[name] = pa.table(
+            {
+                "mapping": pa.array([name] * len(arrow_mapping), type=pa.string()),
+                "code": arrow_mapping.keys,
+                "value": arrow_mapping.values,
+            },
+            schema=MAPS_SCHEMA,
+        )
+        self.connection.register(
+            MAPS_TABLE,
+            pa.concat_tables([MAPS_SCHEMA.empty_table(), *self._maps.values()]),
+        )
+
+    def sql(self, query: str) -> duckdb.DuckDBPyRelation:
+        """Run a query on the connection, with the registered tables and macros available.
+
+        Args:
+            query: The SQL.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The result, lazily evaluated by DuckDB.
+        """
+        return self.connection.sql(query)
@@ -0,0 +1,125 @@
+import logging
+import os
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+
+from ..utility.profiling import phase
+
+logger = logging.getLogger(__name__)
+
+# New column names as keys, the mappings from codes to values as values
+ColumnMappings = Mapping[str, Mapping[Any, Any]]
+
+# Set once in each worker process by the initializer, instead of being sent along with every chunk
+_worker_mappings: ColumnMappings = {}
+
+
+def apply_mappings(
+    data: pd.DataFrame,
+    mappings: ColumnMappings,
+    code_col_name: str = "code",
+    categorical: bool = False,
+) -> pd.DataFrame:
+    """Add a column per mapping to a dataframe, mapping from the column with codes.
+
+    Args:
+        data: The dataframe, it is not changed.
+        mappings: The new column names as keys, with dicts from codes to values as values.
+        code_col_name: The column in the data with the codes.
+        categorical: Store the mapped columns as categoricals, a small integer per row instead of a string.
+
+    Returns:
+        pd.DataFrame: A copy of the data, with the mapped columns added.
+    """
+    with phase("pandas"):
+        codes = data[code_col_name]
+        if categorical and not isinstance(codes.dtype, pd.CategoricalDtype):
+            # Mapping the distinct codes once, then expanding, is cheaper than mapping every row
+            codes = codes.astype("category")
+        mapped = {new_col: codes.map(mapping) for new_col, mapping in mappings.items()}
+        if categorical:
+            mapped = {col: values.astype("category") for col, values in mapped.items()}
+        return data.assign(**mapped)
+
+
+def _init_worker(mappings: ColumnMappings) -> None:
+    global _worker_mappings
+    _worker_mappings = mappings
+
+
+def _apply_in_worker(
+    chunk: pd.DataFrame, code_col_name: str, categorical: bool
+) -> pd.DataFrame:
+    return apply_mappings(chunk, _worker_mappings, code_col_name, categorical)
+
+
+def _is_dask_dataframe(data: Any) -> bool:
+    return type(data).__module__.split(".")[0] == "dask" and hasattr(
+        data, "map_partitions"
+    )
+
+
+def map_partitions(
+    data: Any,
+    mappings: ColumnMappings,
+    code_col_name: str = "code",
+    max_workers: int | None = None,
+    categorical: bool = False,
+) -> Any:
+    """Apply the same precomputed mappings to every partition of a dataset, in parallel.
+
+    A Dask DataFrame gets the mappings added lazily with map_partitions, the mappings are put in the graph once,
+    and Dask decides where the partitions run.
+    An iterator of pandas dataframes is spread over a pool of processes, the mappings are sent once to each process.
+    The chunks are read a few at a time, and the results are yielded in the same order,
+    so the whole dataset does not have to fit in memory.
+
+    Args:
+        data: A Dask DataFrame, or an iterable of pandas DataFrames.
+        mappings: The new column names as keys, with dicts from codes to values as values.
+        code_col_name: The column in the data with the codes.
+        max_workers: The amount of processes for pandas chunks. Defaults to the amount of cores.
+        categorical: Store the mapped columns as categoricals.
+
+    Returns:
+        Any: A Dask DataFrame with the new columns, or an iterator of the pandas chunks with the new columns.
+    """
+    if _is_dask_dataframe(data):
+        import dask
+
+        shared = dask.delayed(dict(mappings), pure=True)
+        meta = apply_mappings(data._meta, mappings, code_col_name, categorical)
+        return data.map_partitions(
+            apply_mappings, shared, code_col_name, categorical, meta=meta
+        )
+    return _map_chunks(data, mappings, code_col_name, max_workers, categorical)
+
+
+def _map_chunks(
+    chunks: Iterable[pd.DataFrame],
+    mappings: ColumnMappings,
+    code_col_name: str,
+    max_workers: int | None,
+    categorical: bool,
+) -> Iterator[pd.DataFrame]:
+    """Apply the mappings to the chunks in a process pool, keeping a bounded amount of chunks in flight."""
+    max_workers = max_workers or os.cpu_count() or 1
+    in_flight: deque[Future[pd.DataFrame]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(mappings,)
+    ) as executor:
+        for chunk in chunks:
+            in_flight.append(
+                executor.submit(_apply_in_worker, chunk, code_col_name, categorical)
+            )
+            if len(in_flight) >= 2 * max_workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+from typing import TypeVar
+
+import pandas as pd
+import polars as pl
+
+from ..classes.lookup import KlassLookup
+
+FrameT = TypeVar("FrameT", pl.DataFrame, pl.LazyFrame)
+
+
+def records_to_polars(
+    records: Sequence[Mapping[str, Any]], select_level: int | str | None = None
+) -> pl.DataFrame:
+    """Build a Polars DataFrame straight from the records returned by the API, without going through pandas.
+
+    Nested fields are flattened to columns joined with ".", like pd.json_normalize does.
+
+    Args:
+        records: The parsed JSON-records, like the classificationItems of a variant.
+        select_level: Keep only the records on this level.
+
+    Returns:
+        pl.DataFrame: The records as a dataframe.
+    """
+    if not records:
+        return pl.DataFrame()
+    frame = pl.json_normalize(list(records), infer_schema_length=None)
+    if select_level and "level" in frame.columns:
+        frame = frame.filter(pl.col("level").cast(pl.Utf8) == str(select_level))
+    return frame
+
+
+def pandas_to_polars(data: pd.DataFrame) -> pl.DataFrame:
+    """Convert the .data of a KLASS-object to Polars through Arrow.
+
+    Strings stored in Arrow, the default from pandas 3, are handed over without copying.
+    On older versions of pandas, the .data holds its strings in object-columns, which are copied into Arrow.
+
+    Args:
+        data: The pandas dataframe.
+
+    Returns:
+        pl.DataFrame: The same data in Polars.
+    """
+    return pl.from_pandas(data)
+
+
+def _as_dict(mapping: Mapping[str, Any] | Any) -> tuple[dict[str, Any], str | None]:
+    """Accept dicts, KlassLookups, and objects with a to_dict() method, like KlassCorrespondence.
+
+    Also get the value for codes missing from the mapping, the other of a KlassLookup, or the default of a defaultdict.
+    """
+    if not isinstance(mapping, Mapping):
+        mapping = mapping.to_dict()
+    other = None
+    if isinstance(mapping, KlassLookup):
+        other = mapping.other
+    elif isinstance(mapping, defaultdict) and mapping.default_factory is not None:
+        other = mapping.default_factory()
+    return {str(k): v for k, v in mapping.items()}, other
+
+
+def map_codes(
+    frame: FrameT,
+    code_col_name: str,
+    mapping: Mapping[str, Any] | Any,
+    new_col_name: str | None = None,
+    other: str | None = None,
+) -> FrameT:
+    """Map a column of codes through a KLASS mapping, the Polars counterpart of Series.map(dict).
+
+    Runs as a Polars expression, so it is multi-threaded, and works lazily on LazyFrames.
+
+    Example:
+        map_codes(data, "kommune", get_codes(131, "2024-01-01"), "kommune_navn")
+
+    Args:
+        frame: The data with the codes.
+        code_col_name: The column with the codes, cast to strings before mapping.
+        mapping: A dict like the ones from to_dict(), a KlassLookup, or an object with a to_dict() method.
+        new_col_name: The column to put the mapped values in, defaults to replacing the column with codes.
+        other: The value for codes missing from the mapping.
+            Defaults to the other of a KlassLookup, or the default of a defaultdict, null if there is none.
+
+    Returns:
+        FrameT: The data with the mapped column.
+    """
+    codes, default = _as_dict(mapping)
+    mapped = (
+        pl.col(code_col_name)
+        .cast(pl.Utf8)
+        .replace_strict(
+            codes, default=default if other is None else other, return_dtype=pl.Utf8
+        )
+    )
+    return frame.with_columns(mapped.alias(new_col_name or code_col_name))
+
+
+def mapping_frame(
+    mapping: Mapping[str, Any] | Any, key_name: str = "code", value_name: str = "value"
+) -> pl.DataFrame:
+    """Turn a KLASS mapping into a two-column Polars DataFrame, to join on.
+
+    Args:
+        mapping: A dict like the ones from to_dict(), a KlassLookup, or an object with a to_dict() method.
+        key_name: The name of the column with the codes.
+        value_name: The name of the column with the values.
+
+    Returns:
+        pl.DataFrame: One row per code.
+    """
+    codes, _ = _as_dict(mapping)
+    return pl.DataFrame(
+        {key_name: list(codes.keys()), value_name: list(codes.values())},
+        schema={key_name: pl.Utf8, value_name: pl.Utf8},
+    )
+
+
+def join_codes(
+    frame: FrameT,
+    code_col_name: str,
+    mappings: Mapping[str, Mapping[str, Any] | Any],
+) -> FrameT:
+    """Add a column per mapping with left joins, for mappings too large to inline in an expression.
+
+    Codes missing from a mapping get the other of a KlassLookup, or the default of a defaultdict, null if there is none.
+
+    Args:
+        frame: The data with the codes.
+        code_col_name: The column with the codes, cast to strings before joining.
+        mappings: The new column names as keys, with the mappings as values.
+
+    Returns:
+        FrameT: The data with a column added per mapping, in the same row order.
+    """
+    key = f"_{code_col_name}_key"
+    found = f"_{code_col_name}_found"
+    result = frame.with_columns(pl.col(code_col_name).cast(pl.Utf8).alias(key))
+    for new_col_name, mapping in mappings.items():
+        codes, other = _as_dict(mapping)
+        right = mapping_frame(codes, key, new_col_name)
+        if other is not None:
+            right = right.with_columns(pl.lit(True).alias(found))
+        if isinstance(result, pl.LazyFrame):
+            result = result.join(
+                right.lazy(), on=key, how="left", maintain_order="left"
+            )
+        else:
+            result = result.join(right, on=key, how="left", maintain_order="left")
+        if other is not None:
+            # Only the codes missing from the mapping get the other, codes mapping to a missing value stay null
+            result = result.with_columns(
+                pl.when(pl.col(found).is_null())
+                .then(pl.lit(other, dtype=pl.Utf8))
+                .otherwise(pl.col(new_col_name))
+                .alias(new_col_name)
+            ).drop(found)
+    return result.drop(key)
@@ -0,0 +1,244 @@
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+from typing import Literal
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from ..classes.lookup import KlassLookup
+
+logger = logging.getLogger(__name__)
+
+FileFormat = Literal["parquet", "csv"]
+# Around 64 MB of codes per batch for typical register files
+DEFAULT_BATCH_SIZE: int = 1_000_000
+
+
+class ArrowMapping:
+    """A mapping from codes to values, prepared once as two arrow arrays, for applying to many record batches.
+
+    Args:
+        mapping: A dict like the ones from to_dict(), a KlassLookup,
+            or an object with a to_dict() method, like KlassCodes, KlassVariant or KlassCorrespondence.
+        other: The value for codes not in the mapping. Missing codes become null if not set.
+            Defaults to the other of a KlassLookup, or the default of a defaultdict, if one is sent in.
+    """
+
+    def __init__(
+        self, mapping: Mapping[str, Any] | Any, other: str | None = None
+    ) -> None:
+        if not isinstance(mapping, Mapping):
+            mapping = mapping.to_dict()
+        if other is None and isinstance(mapping, KlassLookup):
+            other = mapping.other
+        elif (
+            other is None
+            and isinstance(mapping, defaultdict)
+            and mapping.default_factory is not None
+        ):
+            other = mapping.default_factory()
+        self.other = other
+        self.keys = pa.array([str(k) for k in mapping.keys()], type=pa.string())
+        self.values = pa.array(
+            [None if pd.isna(v) else str(v) for v in mapping.values()],
+            type=pa.string(),
+        )
+
+    def __len__(self) -> int:
+        """Get the amount of codes in the mapping."""
+        return len(self.keys)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the mapping, with its size."""
+        return f"ArrowMapping(<{len(self)} codes>, other={self.other!r})"
+
+    def apply(self, column: pa.Array | pa.ChunkedArray) -> pa.Array | pa.ChunkedArray:
+        """Map a column of codes to their values.
+
+        Args:
+            column: The codes, cast to strings before looking them up.
+
+        Returns:
+            pa.Array | pa.ChunkedArray: The values, null or other where the code is missing from the mapping.
+        """
+        codes = pc.cast(column, pa.string())
+        indices = pc.index_in(codes, value_set=self.keys)
+        result = pc.take(self.values, indices)
+        if self.other is not None:
+            result = pc.if_else(pc.is_null(indices), self.other, result)
+        return result
+
+
+MappingsType = Mapping[str, tuple[str, Mapping[str, Any] | ArrowMapping | Any]]
+
+
+def _prepare_mappings(mappings: MappingsType) -> dict[str, tuple[str, ArrowMapping]]:
+    """Turn every mapping into arrow arrays once, instead of once per batch."""
+    return {
+        new_col: (
+            code_col,
+            mapping if isinstance(mapping, ArrowMapping) else ArrowMapping(mapping),
+        )
+        for new_col, (code_col, mapping) in mappings.items()
+    }
+
+
+def map_batches(
+    batches: Iterable[pa.RecordBatch], mappings: MappingsType
+) -> Iterator[pa.RecordBatch]:
+    """Apply KLASS mappings to a stream of record batches, adding a column per mapping.
+
+    Args:
+        batches: The record batches, for example from pyarrow.parquet.ParquetFile.iter_batches().
+        mappings: The new column names as keys, with tuples of (the column with codes, the mapping) as values.
+            For example {"kommune_navn": ("kommune", codes.to_dict())}.
+            A mapping to an existing column name replaces the column.
+
+    Yields:
+        pa.RecordBatch: The batches with the mapped columns.
+
+    Raises:
+        KeyError: If a column with codes is not in the batches.
+    """
+    prepared = _prepare_mappings(mappings)
+    for batch in batches:
+        for new_col, (code_col, mapping) in prepared.items():
+            code_idx = batch.schema.get_field_index(code_col)
+            if code_idx == -1:
+                raise KeyError(
+                    f"Column {code_col} is not in the data: {batch.schema.names}"
+                )
+            mapped = mapping.apply(batch.column(code_idx))
+            new_idx = batch.schema.get_field_index(new_col)
+            if new_idx == -1:
+                batch = batch.append_column(new_col, mapped)
+            else:
+                batch = batch.set_column(new_idx, new_col, mapped)
+        yield batch
+
+
+def _infer_format(path: Path, file_format: FileFormat | None) -> FileFormat:
+    """Use the file format given, or guess it from the suffix of the path."""
+    if file_format:
+        return file_format
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return "parquet"
+    if path.suffix.lower() in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(
+        f"Can not tell the format of {path} from its suffix, set it to 'parquet' or 'csv'."
+    )
+
+
+def read_batches(
+    path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    file_format: FileFormat | None = None,
+    string_columns: Iterable[str] = (),
+    delimiter: str = ",",
+) -> Iterator[pa.RecordBatch]:
+    """Read a Parquet or CSV file as a stream of record batches.
+
+    Args:
+        path: The file to read.
+        batch_size: The amount of rows per batch for Parquet, CSV is read in blocks of about the same size.
+        file_format: "parquet" or "csv", guessed from the suffix if not set.
+        string_columns: Columns in CSV-files to read as strings, so codes like "0301" keep their leading zeros.
+        delimiter: The delimiter in CSV-files.
+
+    Yields:
+        pa.RecordBatch: The batches of the file.
+    """
+    path = Path(path)
+    if _infer_format(path, file_format) == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+        return
+    reader = pa_csv.open_csv(
+        path,
+        # Guess the block size in bytes from the amount of rows, assuming short rows
+        read_options=pa_csv.ReadOptions(block_size=max(batch_size * 64, 1 << 20)),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=dict.fromkeys(string_columns, pa.string())
+        ),
+    )
+    yield from reader
+
+
+def map_file(
+    source: str | Path,
+    destination: str | Path,
+    mappings: MappingsType,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    source_format: FileFormat | None = None,
+    destination_format: FileFormat | None = None,
+    delimiter: str = ",",
+) -> int:
+    """Stream a Parquet or CSV file through KLASS mappings, writing the result batch by batch.
+
+    Only a batch is held in memory at a time, so the file can be larger than the memory available.
+    The columns with codes are read as strings from CSV-files, to keep leading zeros.
+
+    Example:
+        map_file(
+            "register.parquet",
+            "register_mapped.parquet",
+            {
+                "kommune_navn": ("kommune", get_codes(131, "2024-01-01")),
+                "naering_gruppe": ("nace", variant.to_dict()),
+            },
+        )
+
+    Args:
+        source: The file to read.
+        destination: The file to write, overwritten if it exists.
+        mappings: The new column names as keys, with tuples of (the column with codes, the mapping) as values.
+            The mappings can be dicts, KlassLookups, or objects with a to_dict() method.
+        batch_size: The amount of rows to read and write at a time.
+        source_format: "parquet" or "csv", guessed from the suffix if not set.
+        destination_format: "parquet" or "csv", guessed from the suffix if not set.
+        delimiter: The delimiter in CSV-files, used for both reading and writing.
+
+    Returns:
+        int: The amount of rows written.
+    """
+    source, destination = Path(source), Path(destination)
+    destination_format = _infer_format(destination, destination_format)
+    batches = map_batches(
+        read_batches(
+            source,
+            batch_size=batch_size,
+            file_format=source_format,
+            string_columns={code_col for code_col, _ in mappings.values()},
+            delimiter=delimiter,
+        ),
+        mappings,
+    )
+    rows = 0
+    writer: pq.ParquetWriter | pa_csv.CSVWriter | None = None
+    try:
+        for batch in batches:
+            if writer is None:
+                if destination_format == "parquet":
+                    writer = pq.ParquetWriter(destination, batch.schema)
+                else:
+                    writer = pa_csv.CSVWriter(
+                        destination,
+                        batch.schema,
+                        write_options=pa_csv.WriteOptions(delimiter=delimiter),
+                    )
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            logger.debug("Wrote %s rows to %s", rows, destination)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
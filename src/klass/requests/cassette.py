@@ -0,0 +1,182 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .klass_types import CassetteMode
+from .session import get_session
+from .transport import KlassTransport
+from .transport import ParamsType
+from .transport import RequestsTransport
+from .transport import TransportResponse
+from .transport import request_key
+
+logger = logging.getLogger(__name__)
+
+# Bumped if the layout of the cassette-files changes
+CASSETTE_VERSION: int = 1
+
+
+def _encode_body(content: bytes) -> dict[str, str]:
+    try:
+        return {"body": content.decode("utf-8"), "encoding": "utf-8"}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(content).decode("ascii"), "encoding": "base64"}
+
+
+def _decode_body(interaction: dict[str, Any]) -> bytes:
+    if interaction.get("encoding") == "base64":
+        return base64.b64decode(interaction["body"])
+    return str(interaction["body"]).encode("utf-8")
+
+
+class CassetteTransport(KlassTransport):
+    """Record the responses from the KLASS API to a file, and replay them later without the network.
+
+    The responses are stored by the URL and its parameters, normalized so their order does not matter,
+    with the body, the headers and the time the response took.
+    Replaying the recorded latency makes benchmarks of crawlers and joins reproduce
+    the request patterns from production, without depending on the API.
+
+    Example:
+        with CassetteTransport("crawl.json", mode="new") as cassette, use_transport(cassette):
+            KlassCatalogCrawler().crawl()
+
+    Args:
+        path: The JSON-file to record to, and replay from.
+        mode: "replay" only answers from the file, and raises on unrecorded requests,
+            "record" sends every request and records the response, replacing earlier recordings,
+            "new" replays what is recorded, and sends and records the rest.
+        transport: The transport to send requests through when recording, defaults to the shared requests-session.
+        replay_latency: Wait as long as the recorded response took, before returning it on replay.
+        latency_scale: Multiply the recorded latencies with this, to simulate a faster or slower network.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: CassetteMode = "replay",
+        transport: KlassTransport | None = None,
+        replay_latency: bool = False,
+        latency_scale: float = 1.0,
+    ) -> None:
+        self.path = Path(path)
+        self.mode: CassetteMode = mode
+        self.transport = transport
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.interactions: dict[str, dict[str, Any]] = {}
+        self.played = 0
+        self.recorded = 0
+        self._changed = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def __repr__(self) -> str:
+        """Get a string representation of the cassette, with its file, mode and amount of recorded responses."""
+        return f"CassetteTransport('{self.path}', mode='{self.mode}') # {len(self.interactions)} recorded"
+
+    def __len__(self) -> int:
+        """Get the amount of recorded responses."""
+        return len(self.interactions)
+
+    def load(self) -> None:
+        """Read the recorded responses from the file, if it exists.
+
+        Raises:
+            ValueError: If the file was written by a newer, incompatible, version of the package.
+        """
+        if not self.path.exists():
+            return
+        stored = json.loads(self.path.read_text(encoding="utf-8"))
+        if stored.get("version", CASSETTE_VERSION) > CASSETTE_VERSION:
+            raise ValueError(
+                f"The cassette {self.path} has version {stored['version']}, this package reads up to {CASSETTE_VERSION}."
+            )
+        with self._lock:
+            self.interactions = dict(stored.get("interactions", {}))
+            self._changed = False
+
+    def save(self) -> None:
+        """Write the recorded responses to the file, if anything was recorded since it was read."""
+        with self._lock:
+            if not self._changed:
+                return
+            content = json.dumps(
+                {"version": CASSETTE_VERSION, "interactions": self.interactions},
+                indent=1,
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+            self._changed = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        tmp.replace(self.path)
+
+    def get(self, url: str, params: ParamsType | None = None) -> TransportResponse:
+        """Replay the recorded response to the request, or send and record it, depending on the mode.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters to send to the endpoint.
+
+        Returns:
+            TransportResponse: The recorded, or fresh, response.
+
+        Raises:
+            KeyError: In replay-mode, if the request was never recorded.
+        """
+        key = request_key(url, params)
+        with self._lock:
+            interaction = self.interactions.get(key)
+        if interaction is not None and self.mode != "record":
+            return self._replay(key, interaction)
+        if self.mode == "replay":
+            raise KeyError(
+                f"No recorded response for {key} in the cassette {self.path}, record it with mode='new'."
+            )
+        return self._record(key, url, params)
+
+    def _replay(self, key: str, interaction: dict[str, Any]) -> TransportResponse:
+        latency = float(interaction.get("latency", 0.0))
+        if self.replay_latency and latency > 0:
+            time.sleep(latency * self.latency_scale)
+        with self._lock:
+            self.played += 1
+        return TransportResponse(
+            int(interaction["status_code"]),
+            _decode_body(interaction),
+            interaction.get("headers", {}),
+            key,
+            latency,
+        )
+
+    def _record(
+        self, key: str, url: str, params: ParamsType | None
+    ) -> TransportResponse:
+        if self.transport is None:
+            self.transport = RequestsTransport(get_session())
+        start = time.perf_counter()
+        response = self.transport.get(url, params)
+        latency = response.elapsed or time.perf_counter() - start
+        interaction = {
+            "status_code": response.status_code,
+            "headers": response.headers,
+            "latency": latency,
+            **_encode_body(response.content),
+        }
+        with self._lock:
+            self.interactions[key] = interaction
+            self.recorded += 1
+            self._changed = True
+        logger.debug("Recorded %s in %.3f seconds", key, latency)
+        return response
+
+    def close(self) -> None:
+        """Write the recordings to the file, the transport recorded through is left open."""
+        self.save()
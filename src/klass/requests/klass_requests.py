@@ -1,13 +1,12 @@
 import logging
+from collections.abc import Iterable
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from functools import lru_cache
 from typing import Any
 
-import dateutil.parser
 import pandas as pd
-import requests
-from dateutil.parser import ParserError
 
 from .. import config
 from ..requests.klass_types import ClassificationFamiliesByIdType
@@ -23,50 +22,44 @@ from ..requests.klass_types import ParamsAfterType
 from ..requests.klass_types import ParamsBeforeType
 from ..requests.klass_types import VariantsByIdType
 from ..requests.klass_types import VersionByIDType
+from ..requests.klass_types import VersionPartType
+from ..requests.metadata_cache import metadata_cache
 from ..requests.sections import sections_dict
+from ..requests.session import get_json
+from ..requests.validate import parse_datestring
 from ..requests.validate import validate_params
+from ..utility.profiling import phase
+from ..utility.versions import VersionIndex
 
 # ##########
 # Types #
 # ##########
 
 URL_PART_CLASS = "classifications/"
+# Listings of classifications and families are refreshed in the background after an hour
+LISTING_TTL: float = 60 * 60
 logger = logging.getLogger(__name__)
 
 
-def get_json(url: str, params: ParamsAfterType) -> Any:
-    """Simplify getting the JSON out of a GET request to the KLASS API.
-
-    Used in most of the following functions.
-
-    Args:
-        url: The URL to the endpoint.
-        params: The parameters to send to the endpoint.
+def convert_datestring(date: str | datetime, return_type: str = "isoklass") -> str:
+    """Parse the date with the same cached parser as the validate-functions, and convert it to the expected string format of the API.
 
-    Returns:
-        Any: The JSON response from the endpoint, hard to type because all endpoints have differently structured responses.
+    Strings are parsed by parse_datestring, which tries YYYY-MM-DD, then dateutil, then fromisoformat.
+    Conversions of strings are cached, as the same dates are often converted many times in a row.
     """
-    req = requests.Request("GET", url=url, headers=config.HEADERS, params=params)
-    logger.debug("Full URL: %s", req.prepare().url)
-    response = requests.Session().send(req.prepare())
-    response.raise_for_status()
-    result: Any = response.json()
-    return result
+    if isinstance(date, str):
+        return _convert_datestring(date, return_type)
+    return _format_datetime(date, return_type)
 
 
-def convert_datestring(date: str | datetime, return_type: str = "isoklass") -> str:
-    """First try dateutil to guess the format of a simple time sent in, secondary try the fromisoformat.
+@lru_cache(maxsize=4096)
+def _convert_datestring(date: str, return_type: str) -> str:
+    return _format_datetime(parse_datestring(date), return_type)
 
-    Convert it to the expected string format of the API.
-    """
-    if isinstance(date, str):
-        try:
-            date_time: datetime = dateutil.parser.parse(date)
-        except ParserError:
-            date_time = datetime.fromisoformat(date)
-    else:
-        date_time = date
-    date_time = date_time.replace(tzinfo=timezone(timedelta(hours=1)))
+
+def _format_datetime(date_time: datetime, return_type: str) -> str:
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=timezone(timedelta(hours=1)))
     if return_type == "isoklass":
         # We only want 3 digits of milliseconds.
         utc_offset = date_time.strftime("%z")
@@ -81,7 +74,7 @@ def convert_datestring(date: str | datetime, return_type: str = "isoklass") -> s
         )
     elif return_type == "yyyy-mm-dd":
         return date_time.strftime("%Y-%m-%d")
-    raise ValueError(f"Unrecognized datetimestring return type: {date}")
+    raise ValueError(f"Unrecognized datetimestring return type: {return_type}")
 
 
 def convert_section(section: str) -> str:
@@ -111,8 +104,15 @@ def classifications(
         params["changedSince"] = convert_datestring(
             date=changed_since, return_type="isoklass"
         )
+        # Asking for changes only makes sense against the live API
+        changes: ClassificationsType = get_json(url, validate_params(params))
+        return changes
     params_final: ParamsAfterType = validate_params(params)
-    result: ClassificationsType = get_json(url, params_final)
+    result: ClassificationsType = metadata_cache.get(
+        f"classifications-{include_codelists}",
+        lambda: get_json(url, params_final),
+        ttl=LISTING_TTL,
+    )
     return result
 
 
@@ -134,17 +134,28 @@ def classification_search(
     return result
 
 
-def classification_by_id(
+def classification_by_id_call(
     classification_id: str | int,
     language: Language = "nb",
     include_future: bool = False,
-) -> ClassificationsByIdType:
-    """Get from the classification-by-id-endpoint."""
+) -> tuple[str, ParamsAfterType]:
+    """Get the URL and parameters of a request to the classification-by-id-endpoint, to send in a batch with prefetch()."""
     url = config.BASE_URL + URL_PART_CLASS + str(classification_id)
     params: ParamsAfterType = validate_params(
         {"language": language, "includeFuture": include_future}
     )
-    result: ClassificationsByIdType = get_json(url, params)
+    return url, params
+
+
+def classification_by_id(
+    classification_id: str | int,
+    language: Language = "nb",
+    include_future: bool = False,
+) -> ClassificationsByIdType:
+    """Get from the classification-by-id-endpoint."""
+    result: ClassificationsByIdType = get_json(
+        *classification_by_id_call(classification_id, language, include_future)
+    )
     return result
 
 
@@ -159,6 +170,31 @@ def codes(
     include_future: bool = False,
 ) -> pd.DataFrame:
     """Get from the codes-endpoint."""
+    records = codes_records(
+        classification_id,
+        from_date,
+        to_date,
+        select_codes,
+        select_level,
+        presentation_name_pattern,
+        language,
+        include_future,
+    )
+    with phase("normalize"):
+        return pd.json_normalize(records)
+
+
+def codes_records(
+    classification_id: str | int,
+    from_date: str,
+    to_date: str | None = None,
+    select_codes: str | None = None,
+    select_level: int | None = None,
+    presentation_name_pattern: str | None = None,
+    language: OptionalLanguage = "nb",
+    include_future: bool = False,
+) -> list[dict[str, Any]]:
+    """Get from the codes-endpoint, the codes as the parsed JSON-records, before they are normalized into a dataframe."""
     url = config.BASE_URL + URL_PART_CLASS + str(classification_id) + "/codes"
     from_date = convert_datestring(from_date, "yyyy-mm-dd")
     params: ParamsBeforeType = {
@@ -177,7 +213,8 @@ def codes(
     if include_future:
         params["includeFuture"] = include_future
     params_final: ParamsAfterType = validate_params(params)
-    return pd.json_normalize(get_json(url, params_final)["codes"])
+    records: list[dict[str, Any]] = get_json(url, params_final)["codes"]
+    return records
 
 
 def codes_at(
@@ -190,6 +227,29 @@ def codes_at(
     include_future: bool = False,
 ) -> pd.DataFrame:
     """Get from the codesAt-endpoint."""
+    records = codes_at_records(
+        classification_id,
+        date,
+        select_codes,
+        select_level,
+        presentation_name_pattern,
+        language,
+        include_future,
+    )
+    with phase("normalize"):
+        return pd.json_normalize(records)
+
+
+def codes_at_records(
+    classification_id: str | int,
+    date: str,
+    select_codes: str | None = None,
+    select_level: int | None = None,
+    presentation_name_pattern: str | None = None,
+    language: OptionalLanguage = "nb",
+    include_future: bool = False,
+) -> list[dict[str, Any]]:
+    """Get from the codesAt-endpoint, the codes as the parsed JSON-records, before they are normalized into a dataframe."""
     url = config.BASE_URL + URL_PART_CLASS + str(classification_id) + "/codesAt"
     date = convert_datestring(date, "yyyy-mm-dd")
     params: ParamsBeforeType = {"date": date}
@@ -204,15 +264,78 @@ def codes_at(
     if include_future:
         params["includeFuture"] = include_future
     params_final: ParamsAfterType = validate_params(params)
-    return pd.json_normalize(get_json(url, params_final)["codes"])
+    records: list[dict[str, Any]] = get_json(url, params_final)["codes"]
+    return records
 
 
-def version_by_id(
+def codes_at_many(
+    classification_id: str | int,
+    dates: Iterable[str],
+    select_codes: str | None = None,
+    select_level: int | None = None,
+    presentation_name_pattern: str | None = None,
+    language: OptionalLanguage = "nb",
+    include_future: bool = False,
+    versions: list[VersionPartType] | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Get the codes valid at many dates, only asking the codesAt-endpoint once per distinct version.
+
+    The dates are placed in the versions of the classification using their validFrom and validTo,
+    and dates in the same version share the codelist of the first of them.
+    Dates outside all the versions are requested one by one.
+
+    Args:
+        classification_id: The ID of the classification.
+        dates: The dates to get codes for.
+        select_codes: Limit the result to codes matching this pattern.
+        select_level: The level of the codes to keep.
+        presentation_name_pattern: Used to build an alternative presentation name for the codes.
+        language: The language of the names. "nb", "nn" or "en".
+        include_future: Whether to include future versions.
+        versions: The versions of the classification, like KlassClassification.versions.
+            If None, they are requested from the classification-by-id-endpoint.
+
+    Returns:
+        dict[str, pd.DataFrame]: The dates as "YYYY-MM-DD" as keys, and their codes as values.
+            Dates in the same version share the same DataFrame.
+    """
+    if versions is None:
+        versions = classification_by_id(
+            classification_id,
+            language=language if language else "nb",
+            include_future=include_future,
+        ).get("versions", [])
+    version_index = VersionIndex(versions)
+
+    # Group the dates by the version they are valid in
+    groups: dict[int | str, list[str]] = {}
+    for date in dates:
+        day = convert_datestring(date, "yyyy-mm-dd")
+        version_id = version_index.version_id_at(day)
+        groups.setdefault(day if version_id is None else version_id, []).append(day)
+
+    result: dict[str, pd.DataFrame] = {}
+    for days in groups.values():
+        data = codes_at(
+            classification_id,
+            days[0],
+            select_codes=select_codes,
+            select_level=select_level,
+            presentation_name_pattern=presentation_name_pattern,
+            language=language,
+            include_future=include_future,
+        )
+        for day in days:
+            result[day] = data
+    return result
+
+
+def version_by_id_call(
     version_id: str | int,
     language: Language = "nb",
     include_future: bool = False,
-) -> VersionByIDType:
-    """Get from the version-by-id-endpoint."""
+) -> tuple[str, ParamsAfterType]:
+    """Get the URL and parameters of a request to the version-by-id-endpoint, to send in a batch with prefetch()."""
     url = config.BASE_URL + "versions/" + str(version_id)
     params: ParamsAfterType = validate_params(
         {
@@ -220,7 +343,18 @@ def version_by_id(
             "includeFuture": include_future,
         }
     )
-    result: VersionByIDType = get_json(url, params)
+    return url, params
+
+
+def version_by_id(
+    version_id: str | int,
+    language: Language = "nb",
+    include_future: bool = False,
+) -> VersionByIDType:
+    """Get from the version-by-id-endpoint."""
+    result: VersionByIDType = get_json(
+        *version_by_id_call(version_id, language, include_future)
+    )
     return result
 
 
@@ -257,7 +391,9 @@ def variant(
     if include_future:
         params["includeFuture"] = include_future
     params_final: ParamsAfterType = validate_params(params)
-    result: pd.DataFrame = pd.json_normalize(get_json(url, params_final)["codes"])
+    records = get_json(url, params_final)["codes"]
+    with phase("normalize"):
+        result: pd.DataFrame = pd.json_normalize(records)
     return result
 
 
@@ -292,17 +428,26 @@ def variant_at(
         params["includeFuture"] = include_future
 
     params_final: ParamsAfterType = validate_params(params)
-    result: pd.DataFrame = pd.json_normalize(get_json(url, params_final)["codes"])
+    records = get_json(url, params_final)["codes"]
+    with phase("normalize"):
+        result: pd.DataFrame = pd.json_normalize(records)
     return result
 
 
+def variants_by_id_call(
+    variant_id: str | int, language: Language = "nb"
+) -> tuple[str, ParamsAfterType]:
+    """Get the URL and parameters of a request to the variants-endpoint, to send in a batch with prefetch()."""
+    url = config.BASE_URL + "variants/" + str(variant_id)
+    params: ParamsAfterType = validate_params({"language": language})
+    return url, params
+
+
 def variants_by_id(
     variant_id: str | int, language: Language = "nb"
 ) -> VariantsByIdType:
     """Get from the variants-endpoint."""
-    url = config.BASE_URL + "variants/" + str(variant_id)
-    params: ParamsAfterType = validate_params({"language": language})
-    result: VariantsByIdType = get_json(url, params)
+    result: VariantsByIdType = get_json(*variants_by_id_call(variant_id, language))
     return result
 
 
@@ -365,14 +510,24 @@ def corresponds_at(
     return result
 
 
+def correspondence_table_by_id_call(
+    correspondence_id: str | int,
+    language: Language = "nb",
+) -> tuple[str, ParamsAfterType]:
+    """Get the URL and parameters of a request to the correspondence-table-by-id-endpoint, to send in a batch with prefetch()."""
+    url = config.BASE_URL + "correspondencetables/" + str(correspondence_id)
+    params: ParamsAfterType = validate_params({"language": language})
+    return url, params
+
+
 def correspondence_table_by_id(
     correspondence_id: str | int,
     language: Language = "nb",
 ) -> CorrespondenceTableIdType:
     """Get from the correspondence-table-by-id-endpoint."""
-    url = config.BASE_URL + "correspondencetables/" + str(correspondence_id)
-    params: ParamsAfterType = validate_params({"language": language})
-    result_json: CorrespondenceTableIdType = get_json(url, params)
+    result_json: CorrespondenceTableIdType = get_json(
+        *correspondence_table_by_id_call(correspondence_id, language)
+    )
     return result_json
 
 
@@ -398,7 +553,9 @@ def changes(
     if include_future:
         params["includeFuture"] = include_future
     params_final: ParamsAfterType = validate_params(params)
-    result: pd.DataFrame = pd.json_normalize(get_json(url, params_final)["codeChanges"])
+    records = get_json(url, params_final)["codeChanges"]
+    with phase("normalize"):
+        result: pd.DataFrame = pd.json_normalize(records)
     return result
 
 
@@ -416,17 +573,21 @@ def classificationfamilies(
     if ssbsection:
         params["ssbSection"] = convert_section(ssbsection)
     params_final: ParamsAfterType = validate_params(params)
-    result: ClassificationFamiliesType = get_json(url, params_final)
+    result: ClassificationFamiliesType = metadata_cache.get(
+        f"classificationfamilies-{params_final}",
+        lambda: get_json(url, params_final),
+        ttl=LISTING_TTL,
+    )
     return result
 
 
-def classificationfamilies_by_id(
+def classificationfamilies_by_id_call(
     classificationfamily_id: str | int,
     ssbsection: str | None = None,
     include_codelists: bool = False,
     language: Language = "nb",
-) -> ClassificationFamiliesByIdType:
-    """Get from the classificationsfamilies-endpoint with id."""
+) -> tuple[str, ParamsAfterType]:
+    """Get the URL and parameters of a request to the classificationsfamilies-endpoint with id, to send in a batch with prefetch()."""
     url = config.BASE_URL + "classificationfamilies/" + str(classificationfamily_id)
     params: ParamsBeforeType = {
         "includeCodelists": include_codelists,
@@ -434,6 +595,22 @@ def classificationfamilies_by_id(
     }
     if ssbsection:
         params["ssbSection"] = convert_section(ssbsection)
-    params_final: ParamsAfterType = validate_params(params)
-    result: ClassificationFamiliesByIdType = get_json(url, params_final)
+    return url, validate_params(params)
+
+
+def classificationfamilies_by_id(
+    classificationfamily_id: str | int,
+    ssbsection: str | None = None,
+    include_codelists: bool = False,
+    language: Language = "nb",
+) -> ClassificationFamiliesByIdType:
+    """Get from the classificationsfamilies-endpoint with id."""
+    url, params = classificationfamilies_by_id_call(
+        classificationfamily_id, ssbsection, include_codelists, language
+    )
+    result: ClassificationFamiliesByIdType = metadata_cache.get(
+        f"classificationfamilies-{classificationfamily_id}-{params}",
+        lambda: get_json(url, params),
+        ttl=LISTING_TTL,
+    )
     return result
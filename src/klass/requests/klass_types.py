@@ -6,6 +6,12 @@ from typing_extensions import TypedDict
 
 Language: TypeAlias = Literal["nb", "nn", "en"]
 OptionalLanguage: TypeAlias = Language | Literal[""] | None
+PeriodFrequency: TypeAlias = Literal["quarter", "month"]
+CassetteMode: TypeAlias = Literal["replay", "record", "new"]
+ProfilePhase: TypeAlias = Literal["network", "json", "normalize", "pandas"]
+CatalogNodeKind: TypeAlias = Literal[
+    "family", "classification", "version", "variant", "correspondence"
+]
 
 # Keeping these two as non-class, declarative, as the API operates with the parameter "from", which is a reserved keyword in Python
 ParamsBeforeType = TypedDict(
@@ -232,3 +238,51 @@ class ClassificationFamiliesByIdType(TypedDict):
     name: str
     classifications: list[ClassificationPartWithType]
     _links: dict[str, dict[str, str]]
+
+
+class SearchIndexDocumentType(TypedDict):
+    """A single document in the local search index, a classification, a variant or a code."""
+
+    kind: Literal["classification", "variant", "code"]
+    classification_id: int
+    classification_name: str
+    item_id: str
+    item_name: str
+    fields: dict[str, str]
+
+
+class CatalogNodeType(TypedDict):
+    """A single node found by the catalog crawler, a family, classification, version, variant or correspondence."""
+
+    kind: CatalogNodeKind
+    id: str
+    name: str
+    parent: str
+    attributes: dict[str, str]
+
+
+class ChangedClassificationType(TypedDict):
+    """A classification changed since the last poll, found by KlassChangePoller."""
+
+    classification_id: str
+    name: str
+    lastModified: str
+
+
+class ChangeReportType(TypedDict):
+    """What a single poll by KlassChangePoller found and did."""
+
+    since: str
+    checked_at: str
+    changed: list[ChangedClassificationType]
+    invalidated: int
+    refreshed: int
+
+
+class ProfiledCallType(TypedDict):
+    """The time and memory a single profiled call to the package spent, split into phases."""
+
+    name: str
+    seconds: float
+    phases: dict[str, float]
+    peak_memory: int | None
@@ -0,0 +1,199 @@
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Set to a directory to persist the metadata there, or to an empty string to only keep it in memory
+CACHE_DIR_ENV: str = "KLASS_CACHE_DIR"
+# Sections and the listings of classifications and families change a few times a year at most
+DEFAULT_TTL: float = 24 * 60 * 60
+
+
+def default_cache_dir() -> Path | None:
+    """Get the directory to persist metadata in, from the environment variable KLASS_CACHE_DIR, or ~/.cache/klass.
+
+    Returns:
+        Path | None: The directory, or None if KLASS_CACHE_DIR is set to an empty string.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir is None:
+        return Path.home() / ".cache" / "klass"
+    return Path(cache_dir) if cache_dir else None
+
+
+class KlassMetadataCache:
+    """A cache for small, rarely changing listings from the KLASS API, like the ssbsections, kept for a time-to-live.
+
+    Entries are kept in memory and written as JSON-files to the cache_dir, so new processes skip the request.
+    When an entry is older than its time-to-live, the old value is still returned at once,
+    while a background thread gets a fresh one (stale-while-revalidate).
+    Only the first use of an entry, in a process without a persisted copy, waits for the API.
+
+    Args:
+        cache_dir: The directory to persist the entries in, None keeps them in memory only.
+        ttl: The seconds an entry is fresh for.
+    """
+
+    def __init__(
+        self, cache_dir: str | Path | None = None, ttl: float = DEFAULT_TTL
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Get a string representation of the cache, with its directory and amount of entries."""
+        return f"KlassMetadataCache(cache_dir={self.cache_dir}, ttl={self.ttl}) # {len(self._entries)} entries"
+
+    def _path(self, name: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        return self.cache_dir / f"metadata-{safe_name}.json"
+
+    def _load(self, name: str) -> tuple[float, Any] | None:
+        """Read a persisted entry, None if it is missing or unreadable."""
+        path = self._path(name)
+        if path is None or not path.exists():
+            return None
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+            return float(stored["fetched_at"]), stored["value"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable cached metadata in {path}: {e}")
+            return None
+
+    def _store(self, name: str, value: Any) -> None:
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[name] = (fetched_at, value)
+        path = self._path(name)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"fetched_at": fetched_at, "value": value}), encoding="utf-8"
+            )
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not persist metadata to {path}: {e}")
+
+    def get(self, name: str, fetch: Callable[[], T], ttl: float | None = None) -> T:
+        """Get an entry, fetching it if it is not cached, and refreshing it in the background if it is stale.
+
+        Args:
+            name: The name of the entry, including any parameters that change its content.
+            fetch: Gets the value from the API, it must be JSON-serializable.
+            ttl: The seconds the entry is fresh for, defaults to the ttl of the cache.
+
+        Returns:
+            T: A copy of the cached value, so changing it does not change the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            entry = self._load(name)
+            if entry is not None:
+                with self._lock:
+                    self._entries[name] = entry
+        if entry is None:
+            return copy.deepcopy(self.refresh(name, fetch))
+        fetched_at, value = entry
+        if time.time() - fetched_at > (self.ttl if ttl is None else ttl):
+            self._refresh_in_background(name, fetch)
+        result: T = copy.deepcopy(value)
+        return result
+
+    def refresh(self, name: str, fetch: Callable[[], T]) -> T:
+        """Fetch an entry from the API now, and store it.
+
+        Args:
+            name: The name of the entry.
+            fetch: Gets the value from the API.
+
+        Returns:
+            T: The fresh value.
+        """
+        value = fetch()
+        self._store(name, value)
+        return value
+
+    def _refresh_in_background(self, name: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+
+        def run() -> None:
+            try:
+                self.refresh(name, fetch)
+            except Exception as e:
+                # The stale value is kept, and the refresh is tried again on the next get
+                logger.warning(f"Could not refresh the cached metadata {name}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(name)
+
+        threading.Thread(target=run, name=f"klass-refresh-{name}", daemon=True).start()
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Remove an entry, or all entries, from memory and disk.
+
+        Args:
+            name: The entry to remove, None removes all of them.
+        """
+        with self._lock:
+            names = list(self._entries) if name is None else [name]
+            for entry_name in names:
+                self._entries.pop(entry_name, None)
+        paths: list[Path] = []
+        if name is not None:
+            path = self._path(name)
+            paths = [path] if path else []
+        elif self.cache_dir is not None and self.cache_dir.exists():
+            paths = list(self.cache_dir.glob("metadata-*.json"))
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Remove every entry with a name starting with the prefix, from memory and disk.
+
+        Args:
+            prefix: The start of the names to remove, like "classifications-" for all the listings of classifications.
+
+        Returns:
+            int: The amount of entries removed from memory.
+        """
+        with self._lock:
+            names = [name for name in self._entries if name.startswith(prefix)]
+            for name in names:
+                del self._entries[name]
+        if self.cache_dir is not None and self.cache_dir.exists():
+            safe_prefix = re.sub(r"[^A-Za-z0-9_.-]+", "_", prefix)
+            for path in self.cache_dir.glob(f"metadata-{safe_prefix}*.json"):
+                path.unlink(missing_ok=True)
+        return len(names)
+
+
+# Shared by the whole process, the sections are also needed by the validate-functions
+metadata_cache = KlassMetadataCache(default_cache_dir())
+
+
+def clear_metadata_cache() -> None:
+    """Remove the cached sections and listings of classifications and families, from memory and disk."""
+    metadata_cache.invalidate()
@@ -1,20 +1,24 @@
-from functools import lru_cache
-
-import requests
-
 import klass.config as config
 
+from ..requests.metadata_cache import metadata_cache
+from ..requests.session import get_json
+
 # As these functions are used by the validate functions also,
 # they are in their own file to avoid circular imports
 
 
-@lru_cache(maxsize=1)
+def _fetch_sections() -> list[str]:
+    response = get_json(config.BASE_URL + "ssbsections")
+    return [x["name"] for x in response["_embedded"]["ssbSections"]]
+
+
 def sections_list() -> list[str]:
-    """Get the sections that are registered in KLASS-api. Unlikely to change often, so we cache this."""
-    url: str = config.BASE_URL + "/ssbsections"
-    response = requests.get(url).json()
-    sections = [x["name"] for x in response["_embedded"]["ssbSections"]]
-    return sections
+    """Get the sections that are registered in KLASS-api.
+
+    Unlikely to change often, so they are kept in the metadata cache, persisted between processes,
+    and refreshed in the background once a day.
+    """
+    return metadata_cache.get("ssbsections", _fetch_sections)
 
 
 def sections_dict() -> dict[str, str]:
@@ -0,0 +1,147 @@
+import logging
+import threading
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import requests
+
+from .. import config
+from ..requests.klass_types import ParamsAfterType
+from ..utility.profiling import phase
+from .transport import KlassTransport
+from .transport import ParamsType
+from .transport import RequestsTransport
+from .transport import TransportResponse
+from .transport import request_key
+
+logger = logging.getLogger(__name__)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_transport: KlassTransport | None = None
+# Responses sent ahead in a batch by prefetch(), by their request_key(), for get_json() to answer from
+_prefetched: ContextVar[dict[str, TransportResponse] | None] = ContextVar(
+    "klass_prefetched", default=None
+)
+
+
+def get_session() -> requests.Session:
+    """Get the session shared by all requests to the KLASS API, so connections are reused between requests.
+
+    Returns:
+        requests.Session: The shared session, created on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(config.HEADERS)
+        return _session
+
+
+def get_transport() -> KlassTransport:
+    """Get the transport sending the requests to the KLASS API.
+
+    Returns:
+        KlassTransport: The transport set with set_transport(), or one sending through the shared session.
+    """
+    global _transport
+    with _session_lock:
+        if _transport is not None:
+            return _transport
+    return RequestsTransport(get_session())
+
+
+def set_transport(transport: KlassTransport | None) -> KlassTransport | None:
+    """Send all requests to the KLASS API through another transport, like HttpxTransport or MemoryTransport.
+
+    Args:
+        transport: The transport to use, None goes back to the shared requests-session.
+
+    Returns:
+        KlassTransport | None: The transport that was set before, to set back later.
+    """
+    global _transport
+    with _session_lock:
+        previous = _transport
+        _transport = transport
+    return previous
+
+
+@contextmanager
+def use_transport(transport: KlassTransport) -> Iterator[KlassTransport]:
+    """Send the requests to the KLASS API through a transport within a with-block, setting back the previous one after.
+
+    Args:
+        transport: The transport to use in the with-block.
+
+    Yields:
+        KlassTransport: The transport.
+    """
+    previous = set_transport(transport)
+    try:
+        yield transport
+    finally:
+        set_transport(previous)
+
+
+def get_json(url: str, params: ParamsAfterType | None = None) -> Any:
+    """Simplify getting the JSON out of a GET request to the KLASS API.
+
+    Used in most of the request functions. The request is sent through the transport from get_transport(),
+    unless it was already sent in a batch by prefetch().
+
+    Args:
+        url: The URL to the endpoint.
+        params: The parameters to send to the endpoint.
+
+    Returns:
+        Any: The JSON response from the endpoint, hard to type because all endpoints have differently structured responses.
+    """
+    prefetched = _prefetched.get()
+    response = prefetched.get(request_key(url, params)) if prefetched else None
+    if response is None:
+        with phase("network"):
+            response = get_transport().get(url, params or {})
+    response.raise_for_status()
+    with phase("json"):
+        result: Any = response.json()
+    return result
+
+
+@contextmanager
+def prefetch(
+    calls: Iterable[tuple[str, ParamsType | None]],
+    max_concurrent: int | None = None,
+) -> Iterator[int]:
+    """Send a batch of requests together through the get_many() of the transport, answering get_json() from them in the with-block.
+
+    Code building objects one at a time, like a version getting each of its variants,
+    gets its requests sent concurrently this way, by the transports that can.
+    Error-responses are kept, and raised by get_json() as usual.
+    If the batch fails as a whole, like on a lost connection, nothing is prefetched, and the requests are sent one by one instead.
+
+    Args:
+        calls: Tuples of the URL and the parameters of each request, as the request functions will send them.
+        max_concurrent: The most requests in flight at once.
+
+    Yields:
+        int: The amount of requests sent in the batch.
+    """
+    unique = {request_key(url, params): (url, params) for url, params in calls}
+    responses: dict[str, TransportResponse] = {}
+    if unique:
+        try:
+            with phase("network"):
+                sent = get_transport().get_many(list(unique.values()), max_concurrent)
+            responses = dict(zip(unique, sent, strict=True))
+        except requests.RequestException as e:
+            logger.warning(f"Prefetching {len(unique)} requests failed: {e}")
+    token = _prefetched.set({**(_prefetched.get() or {}), **responses})
+    try:
+        yield len(responses)
+    finally:
+        _prefetched.reset(token)
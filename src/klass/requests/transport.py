@@ -0,0 +1,458 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import TracebackType
+from typing import Any
+from urllib.parse import urlencode
+
+import requests
+from typing_extensions import Self
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+ParamsType = Mapping[str, Any]
+# Enough requests in flight to fill a few multiplexed connections, without flooding the API
+MAX_CONCURRENT_REQUESTS: int = 32
+# Threads sending requests at once through a requests.Session, its connection pool keeps 10 connections per host
+MAX_REQUESTS_THREADS: int = 8
+
+
+def request_key(url: str, params: ParamsType | None = None) -> str:
+    """Normalize a URL and its parameters into a single string, the same no matter the order of the parameters.
+
+    Args:
+        url: The URL to the endpoint.
+        params: The parameters sent to the endpoint.
+
+    Returns:
+        str: The URL, with the parameters sorted and encoded as the query string.
+    """
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return f"{url}?{query}" if query else url
+
+
+class TransportResponse:
+    """The parts of a response from the KLASS API that the package uses, the same for every transport.
+
+    Args:
+        status_code: The HTTP status code.
+        content: The body of the response.
+        headers: The headers of the response.
+        url: The full URL that was requested.
+        elapsed: The seconds from sending the request until the response arrived.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        content: bytes,
+        headers: Mapping[str, str] | None = None,
+        url: str = "",
+        elapsed: float = 0.0,
+    ) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers: dict[str, str] = dict(headers or {})
+        self.url = url
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        """Get a string representation of the response, with its status and URL."""
+        return f"TransportResponse(status_code={self.status_code}, url='{self.url}')"
+
+    @property
+    def ok(self) -> bool:
+        """Whether the status code is below 400."""
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        """Parse the body as JSON.
+
+        Returns:
+            Any: The parsed body.
+        """
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        """Raise an error for responses with a status code of 400 and above.
+
+        Raises:
+            requests.HTTPError: From requests, so code catching errors does not depend on the transport.
+        """
+        if not self.ok:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}",
+                response=self.to_requests_response(),
+            )
+
+    def to_requests_response(self) -> requests.Response:
+        """Convert to a requests.Response, for code expecting one.
+
+        Returns:
+            requests.Response: A response with the same status, headers, body and URL.
+        """
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = self.content
+        response.headers.update(self.headers)
+        response.url = self.url
+        return response
+
+
+class KlassTransport(ABC):
+    """Sends the GET requests to the KLASS API, subclasses implement get() for a specific HTTP-stack.
+
+    Transports can be used as context managers, closing their connections on exit.
+    """
+
+    @abstractmethod
+    def get(self, url: str, params: ParamsType | None = None) -> TransportResponse:
+        """Send a GET request.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters to send to the endpoint.
+
+        Returns:
+            TransportResponse: The response.
+        """
+
+    def get_many(
+        self,
+        calls: Iterable[tuple[str, ParamsType | None]],
+        max_concurrent: int | None = None,
+    ) -> list[TransportResponse]:
+        """Send many GET requests, one after the other unless the transport can run them concurrently.
+
+        Args:
+            calls: Tuples of the URL and the parameters of each request.
+            max_concurrent: The most requests in flight at once, for transports sending them concurrently.
+
+        Returns:
+            list[TransportResponse]: The responses, in the same order as the calls.
+        """
+        return [self.get(url, params) for url, params in calls]
+
+    def close(self) -> None:
+        """Close any open connections."""
+        return None
+
+    def __enter__(self) -> Self:
+        """Use the transport in a with-block, closing it after."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the transport at the end of the with-block."""
+        self.close()
+
+
+class RequestsTransport(KlassTransport):
+    """Send requests through a pooled requests.Session, reusing its connections between requests.
+
+    get_many() sends the requests from a few threads sharing the session.
+
+    Args:
+        session: The session to send through, defaults to a new session with the headers the API expects.
+        max_workers: The threads sending requests at once in get_many().
+    """
+
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        max_workers: int = MAX_REQUESTS_THREADS,
+    ) -> None:
+        if session is None:
+            session = requests.Session()
+            session.headers.update(config.HEADERS)
+        self.session = session
+        self.max_workers = max_workers
+
+    def __repr__(self) -> str:
+        """Get a string representation of the transport."""
+        return "RequestsTransport()"
+
+    def get(self, url: str, params: ParamsType | None = None) -> TransportResponse:
+        """Send a GET request through the session.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters to send to the endpoint.
+
+        Returns:
+            TransportResponse: The response.
+        """
+        req = requests.Request(
+            "GET", url=url, headers=config.HEADERS, params=dict(params or {})
+        )
+        prepared = self.session.prepare_request(req)
+        logger.debug("Full URL: %s", prepared.url)
+        start = time.perf_counter()
+        response = self.session.send(prepared)
+        return TransportResponse(
+            response.status_code,
+            response.content,
+            response.headers,
+            response.url or prepared.url or url,
+            time.perf_counter() - start,
+        )
+
+    def get_many(
+        self,
+        calls: Iterable[tuple[str, ParamsType | None]],
+        max_concurrent: int | None = None,
+    ) -> list[TransportResponse]:
+        """Send many GET requests through the session from a pool of threads.
+
+        Args:
+            calls: Tuples of the URL and the parameters of each request.
+            max_concurrent: The most requests in flight at once, defaults to max_workers.
+
+        Returns:
+            list[TransportResponse]: The responses, in the same order as the calls.
+        """
+        calls = list(calls)
+        workers = min(max_concurrent or self.max_workers, len(calls))
+        if workers <= 1:
+            return super().get_many(calls)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="klass-requests"
+        ) as executor:
+            return list(executor.map(lambda call: self.get(*call), calls))
+
+    def close(self) -> None:
+        """Close the connections of the session."""
+        self.session.close()
+
+
+@contextmanager
+def _requests_errors() -> Iterator[None]:
+    """Raise the errors of httpx as the matching errors from requests, which the rest of the package catches.
+
+    Yields:
+        None: Runs the with-block.
+
+    Raises:
+        requests.Timeout: If the request timed out.
+        requests.ConnectionError: If the connection failed, or was lost.
+        requests.RequestException: On other errors sending the request.
+    """
+    import httpx
+
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.ConnectionError(str(e)) from e
+    except httpx.RequestError as e:
+        raise requests.RequestException(str(e)) from e
+
+
+class HttpxTransport(KlassTransport):
+    """Send requests with httpx, multiplexing them over a few HTTP/2 connections, needs the optional dependency httpx.
+
+    get() sends a single request with a sync client, while get_many() and aget_many()
+    send all the requests concurrently over an async client.
+    Errors sending the requests are raised as the errors from requests, like with the other transports.
+
+    Example:
+        with HttpxTransport() as transport, use_transport(transport):
+            variants = [KlassVariant(variant_id) for variant_id in variant_ids]
+
+    Args:
+        http2: Use HTTP/2, needs httpx installed with the http2 extra.
+        max_concurrent: The most requests in flight at once in get_many() and aget_many().
+        timeout: The seconds to wait for a response.
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        timeout: float = 30.0,
+    ) -> None:
+        import httpx
+
+        self.http2 = http2
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.client = httpx.Client(http2=http2, headers=config.HEADERS, timeout=timeout)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the transport, with its settings."""
+        return (
+            f"HttpxTransport(http2={self.http2}, max_concurrent={self.max_concurrent})"
+        )
+
+    @staticmethod
+    def _response(response: Any, elapsed: float) -> TransportResponse:
+        return TransportResponse(
+            response.status_code,
+            response.content,
+            response.headers,
+            str(response.url),
+            elapsed,
+        )
+
+    def get(self, url: str, params: ParamsType | None = None) -> TransportResponse:
+        """Send a GET request with the sync client.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters to send to the endpoint.
+
+        Returns:
+            TransportResponse: The response.
+        """
+        start = time.perf_counter()
+        with _requests_errors():
+            response = self.client.get(url, params=dict(params or {}))
+        logger.debug("Full URL: %s", response.url)
+        return self._response(response, time.perf_counter() - start)
+
+    async def aget_many(
+        self,
+        calls: Iterable[tuple[str, ParamsType | None]],
+        max_concurrent: int | None = None,
+    ) -> list[TransportResponse]:
+        """Send many GET requests concurrently, sharing the connections of a single async client.
+
+        Args:
+            calls: Tuples of the URL and the parameters of each request.
+            max_concurrent: The most requests in flight at once, defaults to the max_concurrent of the transport.
+
+        Returns:
+            list[TransportResponse]: The responses, in the same order as the calls.
+        """
+        import httpx
+
+        semaphore = asyncio.Semaphore(max_concurrent or self.max_concurrent)
+        with _requests_errors():
+            async with httpx.AsyncClient(
+                http2=self.http2, headers=config.HEADERS, timeout=self.timeout
+            ) as client:
+
+                async def fetch(
+                    url: str, params: ParamsType | None
+                ) -> TransportResponse:
+                    async with semaphore:
+                        start = time.perf_counter()
+                        response = await client.get(url, params=dict(params or {}))
+                        elapsed = time.perf_counter() - start
+                    return self._response(response, elapsed)
+
+                return list(
+                    await asyncio.gather(*(fetch(url, params) for url, params in calls))
+                )
+
+    def get_many(
+        self,
+        calls: Iterable[tuple[str, ParamsType | None]],
+        max_concurrent: int | None = None,
+    ) -> list[TransportResponse]:
+        """Send many GET requests concurrently, running aget_many() to completion.
+
+        Called from a running event loop, like in a notebook, the requests are run in a loop of their own in another thread.
+        Async code can await aget_many() directly instead.
+
+        Args:
+            calls: Tuples of the URL and the parameters of each request.
+            max_concurrent: The most requests in flight at once, defaults to the max_concurrent of the transport.
+
+        Returns:
+            list[TransportResponse]: The responses, in the same order as the calls.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aget_many(calls, max_concurrent))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(
+                asyncio.run, self.aget_many(calls, max_concurrent)
+            ).result()
+
+    def close(self) -> None:
+        """Close the connections of the sync client."""
+        self.client.close()
+
+
+class MemoryTransport(KlassTransport):
+    """Answer requests from responses held in memory, for tests and offline use, without touching the network.
+
+    Requests are matched on the URL and the parameters, in any order.
+    Requests without a matching response get a 404.
+
+    Example:
+        transport = MemoryTransport()
+        transport.add(BASE_URL + "ssbsections", json_body={"_embedded": {"ssbSections": []}})
+
+    Args:
+        responses: Responses to start with, keyed by request_key() of the URL and parameters.
+    """
+
+    def __init__(
+        self, responses: Mapping[str, TransportResponse] | None = None
+    ) -> None:
+        self.responses: dict[str, TransportResponse] = dict(responses or {})
+        self.calls: list[str] = []
+
+    def __repr__(self) -> str:
+        """Get a string representation of the transport, with the amount of responses it holds."""
+        return f"MemoryTransport(<{len(self.responses)} responses>)"
+
+    def add(
+        self,
+        url: str,
+        params: ParamsType | None = None,
+        json_body: Any = None,
+        status_code: int = 200,
+        content: bytes | None = None,
+    ) -> None:
+        """Add the response to give to a request.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters of the request.
+            json_body: The body of the response, serialized to JSON.
+            status_code: The HTTP status code of the response.
+            content: The raw body of the response, used instead of json_body.
+        """
+        key = request_key(url, params)
+        if content is None:
+            content = json.dumps(json_body).encode("utf-8")
+        self.responses[key] = TransportResponse(
+            status_code, content, {"Content-Type": "application/json"}, key
+        )
+
+    def get(self, url: str, params: ParamsType | None = None) -> TransportResponse:
+        """Find the response to the request.
+
+        Args:
+            url: The URL to the endpoint.
+            params: The parameters of the request.
+
+        Returns:
+            TransportResponse: The added response, or a 404 if there is none.
+        """
+        key = request_key(url, params)
+        self.calls.append(key)
+        response = self.responses.get(key)
+        if response is None:
+            logger.debug("No response in memory for %s", key)
+            return TransportResponse(404, b"{}", url=key)
+        return response
@@ -1,8 +1,11 @@
 import datetime
 import logging
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
 from typing import cast
 
-import dateutil
+import dateutil.parser
 
 from .. import config
 from ..requests.klass_types import Language
@@ -13,59 +16,42 @@ from ..requests.sections import sections_dict
 logger = logging.getLogger(__name__)
 
 
-def validate_params(params: ParamsBeforeType) -> ParamsAfterType:
-    """Links parameters to their validate-functions."""
-    new_params: ParamsAfterType = {}
-    if "language" in params:
-        new_params["language"] = validate_language(params["language"])
-    if "includeFuture" in params:
-        new_params["includeFuture"] = validate_bool(params["includeFuture"])
-    if "from" in params:
-        new_params["from"] = validate_date(params["from"])
-    if "to" in params:
-        new_params["to"] = validate_date(params["to"])
-    if "date" in params:
-        new_params["date"] = validate_date(params["date"])
-    if "selectCodes" in params:
-        new_params["selectCodes"] = validate_select_codes(params["selectCodes"])
-    if "selectLevel" in params:
-        new_params["selectLevel"] = validate_whole_number(params["selectLevel"])
-    if "level" in params:
-        new_params["level"] = validate_whole_number(params["level"])
-    if "presentationNamePattern" in params:
-        new_params["presentationNamePattern"] = validate_presentation_name_patterns(
-            params["presentationNamePattern"]
-        )
-    if "variantName" in params:
-        new_params["variantName"] = validate_alnum_spaces(params["variantName"])
-    if "targetClassificationId" in params:
-        new_params["targetClassificationId"] = validate_whole_number(
-            params["targetClassificationId"]
-        )
-    if "ssbSection" in params:
-        new_params["ssbSection"] = validate_ssb_section(params["ssbSection"])
-    if "includeCodelists" in params:
-        new_params["includeCodelists"] = validate_bool(params["includeCodelists"])
-    if "changedSince" in params:
-        new_params["changedSince"] = validate_time_iso8601(params["changedSince"])
-    if "query" in params:
-        new_params["query"] = validate_alnum_spaces(params["query"])
+@lru_cache(maxsize=4096)
+def parse_datestring(date: str) -> datetime.datetime:
+    """Parse a date-string into a datetime, shared by convert_datestring and validate_date.
 
-    return new_params
+    Tries the API's own format (YYYY-MM-DD) first, as it is the most common and the fastest to parse,
+    then lets dateutil guess the format, and finally tries datetime.fromisoformat.
+    The results are cached, so the same date-string is only parsed once per process.
+
+    Args:
+        date: The date-string to parse.
+
+    Returns:
+        datetime.datetime: The parsed date and time.
+    """
+    if len(date) == 10:
+        try:
+            return datetime.datetime.strptime(date, r"%Y-%m-%d")
+        except ValueError:
+            pass
+    try:
+        return dateutil.parser.parse(date)
+    except (ValueError, OverflowError):
+        return datetime.datetime.fromisoformat(date)
 
 
 def validate_date(date: str) -> str:
     """Validate a date-string against the expected format."""
     try:
-        new_date: str = datetime.datetime.strptime(date, r"%Y-%m-%d").strftime(
-            r"%Y-%m-%d"
-        )
-    except ValueError as e:
-        try:
-            new_date = dateutil.parser.parse(date).strftime(r"%Y-%m-%d")
-        except ValueError:
-            raise ValueError("Incorrect data format, should be YYYY-MM-DD") from e
-    return new_date
+        return _format_date(date)
+    except (ValueError, OverflowError) as e:
+        raise ValueError("Incorrect data format, should be YYYY-MM-DD") from e
+
+
+@lru_cache(maxsize=4096)
+def _format_date(date: str) -> str:
+    return parse_datestring(date).strftime(r"%Y-%m-%d")
 
 
 def validate_language(language: str) -> Language:
@@ -162,3 +148,39 @@ def validate_ssb_section(section: str) -> str:
     if section not in [*sections.keys(), *sections.values()]:
         raise ValueError(f"Cant find specified ssb-section {section}")
     return section
+
+
+# Links parameters to their validate-functions, the order decides the order of the parameters in the URL
+VALIDATORS: dict[str, Callable[[Any], str]] = {
+    "language": validate_language,
+    "includeFuture": validate_bool,
+    "from": validate_date,
+    "to": validate_date,
+    "date": validate_date,
+    "selectCodes": validate_select_codes,
+    "selectLevel": validate_whole_number,
+    "level": validate_whole_number,
+    "presentationNamePattern": validate_presentation_name_patterns,
+    "variantName": validate_alnum_spaces,
+    "targetClassificationId": validate_whole_number,
+    "ssbSection": validate_ssb_section,
+    "includeCodelists": validate_bool,
+    "changedSince": validate_time_iso8601,
+    "query": validate_alnum_spaces,
+}
+
+
+def validate_params(params: ParamsBeforeType) -> ParamsAfterType:
+    """Links parameters to their validate-functions.
+
+    Parameters without a validate-function are left out.
+    The parameters are validated on every call, only the date-parsing behind them is cached.
+    """
+    return cast(
+        ParamsAfterType,
+        {
+            key: validate(params[key])  # type: ignore[literal-required]
+            for key, validate in VALIDATORS.items()
+            if key in params
+        },
+    )
@@ -0,0 +1,53 @@
+from collections.abc import Iterable
+
+import pandas as pd
+
+# Columns repeating a few distinct values down the rows, stored once per value as categoricals
+CATEGORY_COLUMNS: tuple[str, ...] = (
+    "code",
+    "parentCode",
+    "levelName",
+    "sourceCode",
+    "targetCode",
+)
+DATE_COLUMNS: tuple[str, ...] = (
+    "validFrom",
+    "validTo",
+    "validFromInRequestedRange",
+    "validToInRequestedRange",
+    "changeOccurred",
+)
+LEVEL_COLUMNS: tuple[str, ...] = ("level",)
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    category_cols: Iterable[str] = CATEGORY_COLUMNS,
+    date_cols: Iterable[str] = DATE_COLUMNS,
+    level_cols: Iterable[str] = LEVEL_COLUMNS,
+) -> pd.DataFrame:
+    """Convert the columns of a KLASS-dataframe to dtypes using less memory.
+
+    Levels become small nullable integers, dates become datetime64, and codes become categoricals.
+    Columns missing from the dataframe are skipped.
+
+    Args:
+        df: The dataframe, like the .data on KlassCodes, KlassVersion, KlassVariant or KlassCorrespondence. It is not changed.
+        category_cols: The columns to store as categoricals.
+        date_cols: The columns to parse as dates, values that are not dates become NaT.
+        level_cols: The columns with level numbers, stored as UInt8.
+
+    Returns:
+        pd.DataFrame: A new dataframe with the compact dtypes.
+    """
+    conversions: dict[str, pd.Series] = {}
+    for col in level_cols:
+        if col in df.columns:
+            conversions[col] = pd.to_numeric(df[col], errors="coerce").astype("UInt8")
+    for col in date_cols:
+        if col in df.columns:
+            conversions[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in category_cols:
+        if col in df.columns:
+            conversions[col] = df[col].astype("category")
+    return df.assign(**conversions)
@@ -1,13 +1,283 @@
 import logging
+import threading
+from typing import Any
 from typing import Final
 from typing import Literal
 from typing import cast
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 
+from .profiling import phase
+
 STRING_DTYPE: Final[Literal["string[pyarrow]"]] = "string[pyarrow]"
 logger = logging.getLogger(__name__)
 
+MaskKey = tuple[str, str, bool, int | None]
+
+
+def _copy_on_write() -> bool:
+    """Check if pandas gives a column new memory when it is written to, always from pandas 3, opt-in before."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def _column_token(column: pd.Series, copy_on_write: bool) -> int:
+    """Identify the values in a column.
+
+    Under Copy-on-Write this is the memory behind the column, which is replaced when values in the column are written to.
+    Without it, writes keep the memory, so the values themselves are hashed.
+    """
+    if not copy_on_write:
+        hashed = pd.util.hash_pandas_object(column, index=False).to_numpy()
+        return hash(hashed.tobytes())
+    if isinstance(column.dtype, np.dtype):
+        return int(column.to_numpy().__array_interface__["data"][0])
+    return id(column.array)
+
+
+class FrameMemo:
+    """Remember masks computed from the .data of a KLASS-object, kept on the object itself.
+
+    The masks are forgotten when the memo is handed a different dataframe, or when the remembered one has changed:
+    its length, its index, its columns, or the values in a column.
+    Changed values are noticed through Copy-on-Write, always on from pandas 3,
+    which gives a column new memory when it is written to, while the memo holds on to the old one.
+    On older versions of pandas, without Copy-on-Write turned on, the values in the columns are hashed instead.
+    """
+
+    def __init__(self) -> None:
+        self._data: pd.DataFrame | None = None
+        self._index: pd.Index | None = None
+        self._length = 0
+        self._columns: list[pd.Series] = []
+        self._tokens: list[int] = []
+        self._masks: dict[MaskKey, npt.NDArray[np.bool_]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Get the amount of remembered masks."""
+        return len(self._masks)
+
+    def fresh(self, df: pd.DataFrame) -> bool:
+        """Check that the dataframe is the remembered one, unchanged, starting over with it if not.
+
+        Args:
+            df: The .data of the owning object.
+
+        Returns:
+            bool: True if what was remembered from the dataframe is still valid.
+        """
+        with self._lock:
+            copy_on_write = _copy_on_write()
+            if (
+                self._data is df
+                and self._index is df.index
+                and self._length == len(df)
+                and [column.name for column in self._columns] == list(df.columns)
+                and self._tokens
+                == [_column_token(df[name], copy_on_write) for name in df.columns]
+            ):
+                return True
+            self._masks.clear()
+            self._data = df
+            self._index = df.index
+            self._length = len(df)
+            # Holding on to the columns makes Copy-on-Write give them new memory when written to
+            self._columns = [df[name] for name in df.columns]
+            self._tokens = [
+                _column_token(column, copy_on_write) for column in self._columns
+            ]
+            return False
+
+    def get(self, df: pd.DataFrame, key: MaskKey) -> npt.NDArray[np.bool_] | None:
+        """Get a remembered mask for the dataframe, None if it was not computed yet, or the dataframe changed.
+
+        Args:
+            df: The dataframe the mask was computed from.
+            key: The parameters the mask was computed with.
+
+        Returns:
+            npt.NDArray[np.bool_] | None: The mask, or None.
+        """
+        with self._lock:
+            if not self.fresh(df):
+                return None
+            return self._masks.get(key)
+
+    def set(self, df: pd.DataFrame, key: MaskKey, mask: npt.NDArray[np.bool_]) -> None:
+        """Remember a mask for the dataframe.
+
+        Args:
+            df: The dataframe the mask was computed from.
+            key: The parameters the mask was computed with.
+            mask: The mask to remember.
+        """
+        with self._lock:
+            self.fresh(df)
+            self._masks[key] = mask
+
+    def clear(self) -> None:
+        """Forget the masks, and the dataframe they were computed from."""
+        with self._lock:
+            self._masks.clear()
+            self._data = None
+            self._index = None
+            self._length = 0
+            self._columns = []
+            self._tokens = []
+
+
+class MappingMemo:
+    """Remember the dicts built by to_dict() on an object, for as long as its .data is unchanged.
+
+    The owning object should clear() the memo from its .data-setter and wherever it refetches its data.
+    Edits made directly to the dataframe, like dropping rows in place or assigning to cells,
+    are noticed through the same checks FrameMemo uses before reusing its masks.
+    """
+
+    def __init__(self) -> None:
+        self._mappings: dict[MaskKey, dict[Any, Any]] = {}
+        self.masks = FrameMemo()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the amount of remembered mappings."""
+        return len(self._mappings)
+
+    def mapping(
+        self,
+        df: pd.DataFrame,
+        key: str,
+        value: str,
+        remove_na: bool = True,
+        select_level: int | None = None,
+    ) -> dict[Any, Any]:
+        """Get the mapping from the key column to the value column, building it the first time it is asked for.
+
+        The dict returned is shared between the calls, so the owning object hands out copies of it:
+        copying a built dict is far cheaper than building it again, and callers may change their copy freely.
+
+        Args:
+            df: The .data of the owning object.
+            key: Column name used as dictionary keys.
+            value: Column name used as dictionary values.
+            remove_na: Whether to remove rows where key/value are NA or empty strings.
+            select_level: Optional classification level to filter on.
+
+        Returns:
+            dict[Any, Any]: The mapping.
+        """
+        memo_key: MaskKey = (key, value, remove_na, select_level)
+        with self._lock:
+            if not self.masks.fresh(df):
+                self._mappings.clear()
+            if memo_key not in self._mappings:
+                with phase("pandas"):
+                    keys, values = mapping_columns(
+                        df, key, value, remove_na, select_level, self.masks
+                    )
+                    self._mappings[memo_key] = dict(zip(keys, values, strict=False))
+            return self._mappings[memo_key]
+
+    def clear(self) -> None:
+        """Forget all the mappings, and the dataframe they were built from."""
+        with self._lock:
+            self._mappings.clear()
+            self.masks.clear()
+
+
+def _non_empty(column: pd.Series) -> npt.NDArray[np.bool_]:
+    """Find the values that are neither NA, nor empty when seen as strings."""
+    as_string = column.astype(STRING_DTYPE)
+    return cast(
+        npt.NDArray[np.bool_],
+        (as_string.notna() & (as_string.fillna("") != "")).to_numpy(dtype=bool),
+    )
+
+
+def na_level_mask(
+    df: pd.DataFrame,
+    key: str,
+    value: pd.Series | str,
+    remove_na: bool = True,
+    select_level: int | None = None,
+) -> npt.NDArray[np.bool_]:
+    """Compute which rows limit_na_level would keep, as a boolean array, without copying the dataframe.
+
+    Args:
+        df: The input DataFrame.
+        key: Column name used as dictionary keys in downstream mapping.
+        value: Column name, or the column itself, used as dictionary values in downstream mapping.
+        remove_na: Whether to remove rows where key/value are NA or empty strings.
+        select_level: Optional classification level to filter on.
+
+    Returns:
+        npt.NDArray[np.bool_]: True for the rows to keep.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if remove_na:
+        values = df[value] if isinstance(value, str) else value
+        mask &= _non_empty(df[key]) & _non_empty(values)
+    if select_level:
+        level = df["level"].astype(STRING_DTYPE) == str(select_level)
+        mask &= level.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def mapping_columns(
+    df: pd.DataFrame,
+    key: str,
+    value: str,
+    remove_na: bool = True,
+    select_level: int | None = None,
+    masks: FrameMemo | None = None,
+) -> tuple[pd.Series, pd.Series]:
+    """Get the key and value columns to build a mapping from, filtered like limit_na_level, without copying the dataframe.
+
+    Empty presentation names fall back to the names, like in apply_presentation_name_fallback.
+
+    Args:
+        df: The input DataFrame, like the .data on KlassCodes, KlassVariant or KlassCorrespondence.
+        key: Column name used as dictionary keys.
+        value: Column name used as dictionary values.
+        remove_na: Whether to remove rows where key/value are NA or empty strings.
+        select_level: Optional classification level to filter on.
+        masks: The memo of the object owning the dataframe, to compute the mask once per combination of parameters.
+
+    Returns:
+        tuple[pd.Series, pd.Series]: The filtered key column and value column.
+    """
+    values = presentation_name_values(df, value)
+    memo_key: MaskKey = (key, value, remove_na, select_level)
+    mask = masks.get(df, memo_key) if masks is not None else None
+    if mask is None:
+        mask = na_level_mask(df, key, values, remove_na, select_level)
+        if masks is not None:
+            masks.set(df, memo_key, mask)
+    return df[key][mask], values[mask]
+
+
+def presentation_name_values(
+    df: pd.DataFrame, value: str, fallback: str = "name"
+) -> pd.Series:
+    """Get the value column, where empty presentation names are filled from the fallback column.
+
+    Args:
+        df: Input DataFrame.
+        value: The value column name requested.
+        fallback: The fallback column name to use when presentation names are empty.
+
+    Returns:
+        pd.Series: The value column, only a new series if presentation names are filled.
+    """
+    if value != "presentationName" or fallback not in df.columns:
+        return df[value]
+    names = df["presentationName"].astype(STRING_DTYPE).fillna("")
+    return names.mask(names == "", df[fallback].astype(STRING_DTYPE))
+
 
 def limit_na_level(
     df: pd.DataFrame,
@@ -39,22 +309,9 @@ def limit_na_level(
     Returns:
         pd.DataFrame: A filtered copy of the input DataFrame.
     """
-    limit_data = df.copy()
-    if remove_na:
-        logger.debug(f"Columns used in NA filtering: {key}, {value}")
-        non_empty = (
-            limit_data[[key, value]].astype(STRING_DTYPE).fillna("") != ""
-        ).all(axis=1)
-        mask = cast(pd.Series, limit_data[[key, value]].notna().all(axis=1) & non_empty)
-        limit_data = limit_data.loc[mask]
-        logger.debug(f"Filtered DataFrame: \n {limit_data}")
-    if select_level:
-        level_mask = cast(
-            pd.Series,
-            limit_data["level"].astype(STRING_DTYPE) == str(select_level),
-        )
-        limit_data = limit_data.loc[level_mask]
-    return limit_data
+    logger.debug(f"Columns used in NA filtering: {key}, {value}")
+    with phase("pandas"):
+        return df.loc[na_level_mask(df, key, value, remove_na, select_level)]
 
 
 def apply_presentation_name_fallback(
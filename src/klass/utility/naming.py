@@ -1,5 +1,11 @@
+import re
+import unicodedata
 from typing import Any
 
+NORWEGIAN_CHARS: dict[str, str] = {"æ": "ae", "ø": "oe", "å": "aa"}
+_NORWEGIAN_TABLE = str.maketrans(NORWEGIAN_CHARS)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
 
 def create_shortname(elem: Any, shortname_len: int = 3) -> str:
     """Create a column name from an object that has a target or name attribute.
@@ -21,19 +27,22 @@ def create_shortname(elem: Any, shortname_len: int = 3) -> str:
     else:
         name = elem.name
     name = name.lower()
-    replace = {
-        k: ""
-        for k in [
-            chr(i) for i in range(33, 127) if not chr(i).isalnum() and chr(i) != "-"
-        ]
-    } | {
-        "og ": "",
-        "and ": "",
-        "æ": "ae",
-        "ø": "oe",
-        "å": "aa",
-        "-": "_",  # Overloads the one coming from the first dict
-    }
+    replace = (
+        {
+            k: ""
+            for k in [
+                chr(i) for i in range(33, 127) if not chr(i).isalnum() and chr(i) != "-"
+            ]
+        }
+        | {
+            "og ": "",
+            "and ": "",
+        }
+        | NORWEGIAN_CHARS
+        | {
+            "-": "_",  # Overloads the one coming from the first dict
+        }
+    )
     for k, v in replace.items():
         name = name.replace(k, v)
 
@@ -41,3 +50,34 @@ def create_shortname(elem: Any, shortname_len: int = 3) -> str:
     if len(parts) < shortname_len:
         shortname_len = len(parts)
     return "_".join(parts[:shortname_len]).lower()
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase a string, spell out æ, ø and å, and strip other accents.
+
+    Makes "Tromsø", "TROMSOE" and "tromsoe" compare equal,
+    the same way create_shortname spells out the Norwegian characters.
+
+    Args:
+        text: The string to normalize.
+
+    Returns:
+        str: The normalized string.
+    """
+    text = text.lower().translate(_NORWEGIAN_TABLE)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split a string into normalized alphanumeric tokens.
+
+    Args:
+        text: The string to split, None is treated as an empty string.
+
+    Returns:
+        list[str]: The tokens in the order they appear in the text.
+    """
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(normalize_text(text))
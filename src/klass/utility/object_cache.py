@@ -0,0 +1,140 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Iterable
+from typing import Any
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Parsed versions and variants are some hundred kB each, this bounds the cache to a few hundred MB at worst
+DEFAULT_MAXSIZE: int = 256
+
+
+class KlassObjectCache:
+    """A thread-safe least-recently-used cache of already parsed Klass-objects, like KlassVersion and KlassVariant.
+
+    Keys are tuples starting with the kind of object and its ID, followed by the parameters that change the content,
+    like language, include_future and select_level.
+    The cached objects are shared between everyone getting them, so changes made to one are seen by all.
+    Invalidate or clear the cache to get fresh objects from the API.
+
+    Args:
+        maxsize: The maximum amount of objects to keep, the least recently used are dropped first.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._objects: OrderedDict[tuple[Hashable, ...], Any] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Get the amount of objects in the cache."""
+        return len(self._objects)
+
+    def __contains__(self, key: object) -> bool:
+        """Whether get_or_create() would find the key in the cache, without counting a hit or a miss."""
+        with self._lock:
+            return self.enabled and key in self._objects
+
+    def __repr__(self) -> str:
+        """Get a string representation of the cache, with its size and hit-rate."""
+        return f"KlassObjectCache(<{len(self)}/{self.maxsize} objects>, hits={self.hits}, misses={self.misses})"
+
+    def get_or_create(self, key: tuple[Hashable, ...], factory: Callable[[], T]) -> T:
+        """Get the object stored under the key, creating and storing it with the factory if it is missing.
+
+        Args:
+            key: The key of the object, starting with the kind and ID of the object.
+            factory: Creates the object if it is not in the cache, usually by asking the API.
+
+        Returns:
+            T: The cached object, or the newly created one.
+        """
+        if not self.enabled:
+            return factory()
+        with self._lock:
+            if key in self._objects:
+                self.hits += 1
+                self._objects.move_to_end(key)
+                result: T = self._objects[key]
+                return result
+        # Create outside the lock, so a slow request does not block other lookups
+        obj = factory()
+        with self._lock:
+            self.misses += 1
+            self._objects[key] = obj
+            self._objects.move_to_end(key)
+            while len(self._objects) > self.maxsize:
+                self._objects.popitem(last=False)
+        return obj
+
+    def invalidate(
+        self, kind: str | None = None, obj_id: str | int | None = None
+    ) -> int:
+        """Remove objects from the cache, all objects of a kind, or all variations of a single object.
+
+        Args:
+            kind: The kind of objects to remove, like "version" or "variant". None removes every kind.
+            obj_id: The ID of the object to remove, None removes all objects of the kind.
+
+        Returns:
+            int: The amount of objects removed.
+        """
+        with self._lock:
+            remove = [
+                key
+                for key in self._objects
+                if (kind is None or key[0] == kind)
+                and (obj_id is None or key[1] == str(obj_id))
+            ]
+            for key in remove:
+                del self._objects[key]
+        logger.debug("Invalidated %s cached objects", len(remove))
+        return len(remove)
+
+    def pop_objects(
+        self, kind: str, obj_ids: Iterable[str | int]
+    ) -> list[tuple[tuple[Hashable, ...], Any]]:
+        """Remove all variations of several objects of a kind, returning what was removed.
+
+        Args:
+            kind: The kind of objects to remove, like "version" or "variant".
+            obj_ids: The IDs of the objects to remove.
+
+        Returns:
+            list[tuple[tuple[Hashable, ...], Any]]: The keys and objects removed, to recreate or inspect them.
+        """
+        ids = {str(obj_id) for obj_id in obj_ids}
+        with self._lock:
+            removed = [
+                (key, obj)
+                for key, obj in self._objects.items()
+                if key[0] == kind and key[1] in ids
+            ]
+            for key, _ in removed:
+                del self._objects[key]
+        return removed
+
+    def clear(self) -> None:
+        """Empty the cache and reset its counters."""
+        with self._lock:
+            self._objects.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by the whole process, so repeated traversals reuse the parsed objects
+object_cache = KlassObjectCache()
+
+
+def clear_object_cache() -> None:
+    """Empty the cache of parsed KlassVersion and KlassVariant objects, so the next requests get fresh data from the API."""
+    object_cache.clear()
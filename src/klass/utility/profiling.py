@@ -0,0 +1,256 @@
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import ContextDecorator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from contextvars import Token
+from types import TracebackType
+from typing import Any
+from typing import TypeVar
+from typing import cast
+
+import pandas as pd
+from typing_extensions import Self
+
+from ..requests.klass_types import ProfiledCallType
+from ..requests.klass_types import ProfilePhase
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PHASES: tuple[ProfilePhase, ...] = ("network", "json", "normalize", "pandas")
+# Phases run outside any profiled call, like to_dict() on an object made before profiling, are reported under this name
+UNATTRIBUTED: str = "(outside calls)"
+
+
+class _CallRecord:
+    """The timings of a call in progress, phases nested in other phases only count towards the innermost one."""
+
+    def __init__(self, name: str, trace_memory: bool) -> None:
+        self.name = name
+        self.phases: dict[str, float] = {}
+        self.nested: list[float] = []
+        self.trace_memory = trace_memory and tracemalloc.is_tracing()
+        self.memory_start = 0
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+
+    def finish(self) -> ProfiledCallType:
+        seconds = time.perf_counter() - self.start
+        peak_memory = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak_memory = max(tracemalloc.get_traced_memory()[1] - self.memory_start, 0)
+        return {
+            "name": self.name,
+            "seconds": seconds,
+            "phases": dict(self.phases),
+            "peak_memory": peak_memory,
+        }
+
+
+_active_profiler: ContextVar["KlassProfiler | None"] = ContextVar(
+    "klass_active_profiler", default=None
+)
+_active_call: ContextVar[_CallRecord | None] = ContextVar(
+    "klass_active_call", default=None
+)
+
+
+class KlassProfiler(ContextDecorator):
+    """Record where the time goes in calls to the package, split into network, JSON parsing, normalizing and pandas work.
+
+    Every public call made inside the with-block, like creating a KlassVersion or joining its variants,
+    is recorded with its total time, the time in each phase, and the peak memory it allocated, traced with tracemalloc.
+    Calls made by other calls are counted towards the outermost one.
+    The profiler follows the context, so work in other threads, like background refreshes, is not counted.
+
+    Can also decorate a function, profiling every run of it.
+
+    Example:
+        with KlassProfiler() as profiler:
+            KlassVersion(1954).join_all_variants_correspondences_on_data()
+        print(profiler)
+
+    Args:
+        trace_memory: Trace the memory allocated in each call with tracemalloc, which slows Python down somewhat.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.calls: list[ProfiledCallType] = []
+        self._unattributed = _CallRecord(UNATTRIBUTED, trace_memory=False)
+        self._tokens: list[Token[KlassProfiler | None]] = []
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Get a string representation of the profiler, with the amount of recorded calls."""
+        return (
+            f"KlassProfiler(trace_memory={self.trace_memory}) # {len(self.calls)} calls"
+        )
+
+    def __str__(self) -> str:
+        """Get the report as a table, to print or attach to logs."""
+        return self.report().to_string()
+
+    def __enter__(self) -> Self:
+        """Start recording the calls made in the with-block."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._tokens.append(_active_profiler.set(self))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop recording, and stop tracing memory if the profiler started it."""
+        _active_profiler.reset(self._tokens.pop())
+        if not self._tokens and self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _add(self, call: ProfiledCallType) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def reset(self) -> None:
+        """Forget the recorded calls."""
+        with self._lock:
+            self.calls = []
+            self._unattributed = _CallRecord(UNATTRIBUTED, trace_memory=False)
+
+    def _all_calls(self) -> list[ProfiledCallType]:
+        with self._lock:
+            calls = list(self.calls)
+            loose = dict(self._unattributed.phases)
+        if loose:
+            calls.append(
+                {
+                    "name": UNATTRIBUTED,
+                    "seconds": sum(loose.values()),
+                    "phases": loose,
+                    "peak_memory": None,
+                }
+            )
+        return calls
+
+    def report(self) -> pd.DataFrame:
+        """Sum up the recorded calls by their name.
+
+        Returns:
+            pd.DataFrame: A row per kind of call, with the amount of calls, their total and mean seconds,
+                the seconds in each phase, the seconds outside the phases, and the largest peak memory in MB.
+        """
+        rows = []
+        for call in self._all_calls():
+            row: dict[str, Any] = {
+                "name": call["name"],
+                "seconds": call["seconds"],
+                "peak_memory_mb": (
+                    None
+                    if call["peak_memory"] is None
+                    else call["peak_memory"] / 1024**2
+                ),
+            }
+            for phase_name in PHASES:
+                row[phase_name] = call["phases"].get(phase_name, 0.0)
+            row["other"] = max(call["seconds"] - sum(call["phases"].values()), 0.0)
+            rows.append(row)
+        columns = ["calls", "seconds", "mean_seconds", *PHASES, "other"]
+        if not rows:
+            return pd.DataFrame(
+                columns=[*columns, "peak_memory_mb"], index=pd.Index([], name="name")
+            )
+        calls = pd.DataFrame(rows)
+        grouped = calls.groupby("name", sort=False)
+        result = grouped[["seconds", *PHASES, "other"]].sum()
+        result.insert(0, "calls", grouped.size())
+        result.insert(2, "mean_seconds", result["seconds"] / result["calls"])
+        result["peak_memory_mb"] = grouped["peak_memory_mb"].max()
+        return result.sort_values("seconds", ascending=False)
+
+    def to_json(self) -> str:
+        """Get the recorded calls, and the report summing them up, as JSON.
+
+        Returns:
+            str: The JSON, with the keys "calls" and "summary".
+        """
+        summary = self.report().reset_index()
+        return json.dumps(
+            {
+                "calls": self._all_calls(),
+                "summary": json.loads(summary.to_json(orient="records")),
+            }
+        )
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Record calls to the decorated function in the active KlassProfiler, if there is one.
+
+    Calls made while another profiled call is running are counted towards that call.
+
+    Args:
+        name: The name of the call in the report.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _active_profiler.get()
+            if profiler is None or _active_call.get() is not None:
+                return func(*args, **kwargs)
+            record = _CallRecord(name, profiler.trace_memory)
+            token = _active_call.set(record)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _active_call.reset(token)
+                profiler._add(record.finish())
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+@contextmanager
+def phase(name: ProfilePhase) -> Iterator[None]:
+    """Count the time in the with-block towards a phase of the running profiled call.
+
+    Does nothing, except looking up the active profiler, when no profiling is going on.
+
+    Args:
+        name: The phase.
+
+    Yields:
+        None: Runs the with-block.
+    """
+    record = _active_call.get()
+    if record is None:
+        profiler = _active_profiler.get()
+        if profiler is None:
+            yield
+            return
+        record = profiler._unattributed
+    start = time.perf_counter()
+    record.nested.append(0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = record.nested.pop()
+        record.phases[name] = record.phases.get(name, 0.0) + elapsed - nested
+        if record.nested:
+            record.nested[-1] += elapsed
@@ -0,0 +1,96 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import date as date_type
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ..requests.klass_types import VersionPartType
+from ..requests.validate import validate_date
+
+# Versions without a validTo are valid until further notice
+OPEN_END: str = "9999-12-31"
+
+
+def version_id_from_part(version: VersionPartType) -> int:
+    """Get the ID of a version from the versions-list on a classification, from the self-link if it is not set."""
+    if "version_id" in version:
+        return version["version_id"]
+    return int(version["_links"]["self"]["href"].split("/")[-1])
+
+
+class VersionIndex:
+    """Look up which version of a classification is valid at a date, without asking the API.
+
+    The versions are kept sorted on validFrom, so single lookups are binary searches,
+    and lookups for many dates at once are vectorized with numpy.
+    A version is valid from and including its validFrom, up to but not including its validTo.
+
+    Args:
+        versions: The versions of a classification, like KlassClassification.versions.
+    """
+
+    def __init__(self, versions: Iterable[VersionPartType]) -> None:
+        ordered = sorted(versions, key=lambda v: v["validFrom"])
+        self.version_ids: list[int] = [version_id_from_part(v) for v in ordered]
+        self.starts: list[str] = [v["validFrom"][:10] for v in ordered]
+        self.ends: list[str] = [(v.get("validTo") or OPEN_END)[:10] for v in ordered]
+        self._starts = np.array(self.starts, dtype="datetime64[D]")
+        self._ends = np.array(self.ends, dtype="datetime64[D]")
+        self._ids = np.array(self.version_ids, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Get the amount of versions in the index."""
+        return len(self.version_ids)
+
+    def __repr__(self) -> str:
+        """Get a string representation of the index, listing the periods of the versions."""
+        periods = ", ".join(
+            f"{i}: {s}->{'' if e == OPEN_END else e}"
+            for i, s, e in zip(self.version_ids, self.starts, self.ends, strict=True)
+        )
+        return f"VersionIndex({periods})"
+
+    def latest(self) -> int | None:
+        """Get the ID of the version with the latest validFrom, None if there are no versions."""
+        return self.version_ids[-1] if self.version_ids else None
+
+    def version_id_at(self, date: str | datetime | date_type) -> int | None:
+        """Get the ID of the version valid at a date.
+
+        Args:
+            date: The date to look up, as a string or a date.
+
+        Returns:
+            int | None: The version ID, or None if no version is valid at the date.
+        """
+        if isinstance(date, date_type):
+            day = date.strftime("%Y-%m-%d")
+        else:
+            day = validate_date(date)
+        i = bisect_right(self.starts, day) - 1
+        if i >= 0 and day < self.ends[i]:
+            return self.version_ids[i]
+        return None
+
+    def version_ids_at(self, dates: Iterable[str | datetime | date_type]) -> pd.Series:
+        """Get the IDs of the versions valid at many dates at once.
+
+        Args:
+            dates: The dates to look up. If a pandas Series is sent in, the result keeps its index.
+
+        Returns:
+            pd.Series: The version IDs as a nullable integer series, NA where no version is valid.
+        """
+        if isinstance(dates, pd.Series):
+            index, series = dates.index, dates
+        else:
+            index, series = None, pd.Series(list(dates), dtype=object)
+        days = pd.to_datetime(series).to_numpy(dtype="datetime64[D]")
+        if not len(self):
+            return pd.Series([pd.NA] * len(days), index=index, dtype="Int64")
+        i = np.searchsorted(self._starts, days, side="right") - 1
+        clipped = np.clip(i, 0, None)
+        valid = (i >= 0) & (days < self._ends[clipped])
+        return pd.Series(self._ids[clipped], index=index, dtype="Int64").where(valid)
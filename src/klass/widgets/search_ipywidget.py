@@ -1,73 +1,159 @@
+import html
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from typing import Any
 
 import ipywidgets as widgets
-from IPython.display import HTML
-from IPython.display import display
 
 from klass.classes.search import KlassSearchClassifications
+from klass.classes.search_index import KlassSearchIndex
 from klass.requests.sections import sections_dict
+from klass.utility.object_cache import KlassObjectCache
 
 DEFAULT_CHOICE = "Choose..."
+# Wait for a pause in the typing this long before searching
+DEBOUNCE_SECONDS: float = 0.4
+# The search-endpoint returns little of use for shorter queries
+MIN_QUERY_LENGTH: int = 3
+logger = logging.getLogger(__name__)
 
+# Shared by all the widgets in the kernel, so many open widgets do not start threads each
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="klass-search")
+# The formatted results per query and section, shared by all the widgets in the kernel
+search_cache = KlassObjectCache(maxsize=128)
 
-def search_classification(no_dupes: bool = True) -> widgets.VBox:
+
+def search_html(
+    query: str,
+    ssbsection: str = "",
+    no_dupes: bool = True,
+    index: KlassSearchIndex | None = None,
+) -> str:
+    """Search for classifications and format the results for the widget, reusing earlier results of the same search.
+
+    Searches of a local index are not cached, as the index can change between searches, and answers fast on its own.
+
+    Args:
+        query: The words to search for.
+        ssbsection: Limit the search to a section, ignored when searching a local index.
+        no_dupes: To include duplicate results or not in the result.
+        index: Search this local index instead of the API.
+
+    Returns:
+        str: The formatted html-string.
+    """
+    if index is not None:
+        found = index.search(query, kind="classification")
+        return _format_classifications(
+            [
+                {"classification_id": row.classification_id, "name": row.item_name}
+                for row in found.itertuples()
+            ]
+        )
+
+    def search() -> str:
+        search_class = KlassSearchClassifications(
+            query, ssbsection=ssbsection, include_codelists=True, no_dupes=no_dupes
+        )
+        return format_classification_text(search_class)
+
+    return search_cache.get_or_create(
+        ("search", query.strip().lower(), ssbsection, no_dupes), search
+    )
+
+
+def search_classification(
+    no_dupes: bool = True,
+    index: KlassSearchIndex | None = None,
+    debounce: float = DEBOUNCE_SECONDS,
+) -> widgets.VBox:
     """Open a GUI in Jupyter Notebooks using ipywidgets.
 
     Lets you search for terms and copy sample code out,
     that'll let you get data from the classification.
 
+    The search starts when you stop typing, or press the button, and runs in a background thread,
+    so the kernel stays free while waiting for the API.
+    Results of searches still running when a newer search starts are thrown away.
+
     Args:
         no_dupes: To include duplicate results or not in the result.
             Dupes are caused by multiple languages being returned.
+        index: Search a local KlassSearchIndex instead of the API, the sections are then ignored.
+        debounce: The seconds to wait after the last keystroke before searching.
 
     Returns:
         widgets.VBox: Containing the nested ipywidgets-GUI. Jupyter will automatically display it.
     """
-    search_result: widgets.output = widgets.Output()
+    search_result: widgets.Output = widgets.Output()
     search_term: widgets.Text = widgets.Text(
-        value="", placeholder="Searchterm", description="Type searchterm:"
-    )
-    section_dropdown: widgets.Dropdown = widgets.Dropdown(
-        options=[DEFAULT_CHOICE],
-        value=DEFAULT_CHOICE,
-        description="Section:",
-        disabled=False,
+        value="",
+        placeholder="Searchterm",
+        description="Type searchterm:",
+        continuous_update=True,
     )
-
-    def do_search(btn: widgets.Button) -> None:
-        nonlocal search_term
-        nonlocal section_dropdown
-        nonlocal search_result
-
-        with search_result:
-            search_result.clear_output()
-            display("Searching...")  # type: ignore
-            # Add loading-gif?
-
-        try:
-            if section_dropdown.value != DEFAULT_CHOICE:
-                search_class = KlassSearchClassifications(
-                    search_term.value,
-                    ssbsection=section_dropdown.value,
-                    include_codelists=True,
-                    no_dupes=no_dupes,
-                )
-            else:
-                search_class = KlassSearchClassifications(
-                    search_term.value, include_codelists=True, no_dupes=no_dupes
-                )
-            search_content = format_classification_text(search_class)
-        except Exception as e:
-            search_content = str(e)
-
-        with search_result:
-            search_result.clear_output()
-            display(HTML(search_content))  # type: ignore
-
     sections = [DEFAULT_CHOICE, *list(sections_dict().keys())]
     section_dropdown = widgets.Dropdown(
         options=sections, value=sections[0], description="Section:", disabled=False
     )
+    lock = threading.Lock()
+    # The number of the newest search, the timer waiting for typing to pause, and the running search
+    latest = 0
+    timer: threading.Timer | None = None
+    running: Future[None] | None = None
+
+    def show(content: str) -> None:
+        # Replacing the outputs in one go works from any thread, and does not flicker
+        search_result.outputs = (
+            {
+                "output_type": "display_data",
+                "data": {"text/html": content, "text/plain": content},
+                "metadata": {},
+            },
+        )
+
+    def run_search(query: str, ssbsection: str, search_number: int) -> None:
+        try:
+            content = search_html(query, ssbsection, no_dupes, index)
+        except Exception as e:
+            logger.warning(f"Search for {query!r} failed: {e}")
+            content = html.escape(str(e))
+        if search_number != latest:
+            logger.debug(f"Discarding the results of the stale search for {query!r}")
+            return
+        show(content)
+
+    def do_search(*_: Any) -> None:
+        nonlocal latest, running, timer
+        query = search_term.value.strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return
+        ssbsection = (
+            section_dropdown.value if section_dropdown.value != DEFAULT_CHOICE else ""
+        )
+        with lock:
+            if timer is not None:
+                timer.cancel()
+            latest += 1
+            if running is not None:
+                # Only stops searches still waiting for a thread, running ones are discarded when done
+                running.cancel()
+            show("Searching...")
+            running = _executor.submit(run_search, query, ssbsection, latest)
+
+    def on_typing(change: dict[str, Any]) -> None:
+        nonlocal timer
+        with lock:
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(debounce, do_search)
+            timer.daemon = True
+            timer.start()
+
+    search_term.observe(on_typing, names="value")
     search_button = widgets.Button(description="Search")
     search_button.on_click(do_search)
     html_header = widgets.HTML(
@@ -91,10 +177,14 @@ def format_classification_text(search_class: KlassSearchClassifications) -> str:
     Returns:
         str: The formatted html-string.
     """
+    logger.debug(f"{search_class.classifications=}")
+    return _format_classifications(search_class.classifications)
+
+
+def _format_classifications(classifications: list[Any]) -> str:
     search_content = ""
-    print(f"{search_class.classifications=}")
-    if len(search_class.classifications):
-        for cl in search_class.classifications:
+    if len(classifications):
+        for cl in classifications:
             var_name = "".join(
                 cl["name"]
                 .split(":")[0]
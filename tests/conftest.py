@@ -4,6 +4,29 @@ import pytest
 
 import klass
 import tests.mock_request_functions as mock_returns
+from tests import mock_response_data
+
+
+@pytest.fixture(autouse=True)
+def empty_object_cache():
+    # Cached objects from one test should not leak mocked data into the next
+    klass.clear_object_cache()
+    yield
+    klass.clear_object_cache()
+
+
+@pytest.fixture(autouse=True)
+def empty_metadata_cache(tmp_path, monkeypatch):
+    # Keep persisted sections and listings out of the home directory, and away from other tests
+    monkeypatch.setattr(klass.metadata_cache, "cache_dir", tmp_path / "klass-cache")
+    klass.metadata_cache.invalidate()
+    # Converting section numbers needs the sections, keep them from reaching the network
+    sections = mock_response_data.sections_fake_content().json()
+    klass.metadata_cache.refresh(
+        "ssbsections", lambda: [s["name"] for s in sections["_embedded"]["ssbSections"]]
+    )
+    yield
+    klass.metadata_cache.invalidate()
 
 
 @pytest.fixture
@@ -37,9 +60,9 @@ def klass_classification_search_empty(test_classification_search):
 
 
 @pytest.fixture
-@mock.patch("klass.classes.codes.codes_at")
+@mock.patch("klass.classes.codes.codes_at_records")
 def klass_codes_at_success(test_codes_at):
-    test_codes_at.return_value = mock_returns.codes_at_success()
+    test_codes_at.return_value = mock_returns.codes_at_records_success()
     return klass.KlassCodes(
         36,
         from_date="2023-01-01",
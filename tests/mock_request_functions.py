@@ -39,6 +39,12 @@ def codes_at_success(mock_response):
     return klass_requests.codes_at("0", date="2023-01-01")
 
 
+@mock.patch.object(requests.Session, "send")
+def codes_at_records_success(mock_response):
+    mock_response.return_value = mock_response_data.codes_at_fake_content()
+    return klass_requests.codes_at_records("0", date="2023-01-01")
+
+
 @mock.patch.object(requests.Session, "send")
 def version_by_id_success(mock_response):
     mock_response.return_value = mock_response_data.version_by_id_fake_content()
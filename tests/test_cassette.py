@@ -0,0 +1,100 @@
+import json
+from unittest import mock
+
+import pytest
+
+import klass
+import klass.config as config
+from klass.requests.cassette import CASSETTE_VERSION
+from klass.requests.cassette import CassetteTransport
+from klass.requests.session import use_transport
+from klass.requests.transport import MemoryTransport
+from klass.requests.transport import TransportResponse
+from klass.requests.transport import request_key
+from klass.requests.validate import validate_params
+
+URL = config.BASE_URL + "classifications/36"
+PARAMS = validate_params({"language": "nb", "includeFuture": False})
+
+
+def _memory_transport():
+    transport = MemoryTransport()
+    transport.add(URL, PARAMS, json_body={"name": "Utdanning"})
+    return transport
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = tmp_path / "cassette.json"
+    with (
+        CassetteTransport(path, mode="new", transport=_memory_transport()) as cassette,
+        use_transport(cassette),
+    ):
+        assert klass.classification_by_id(36)["name"] == "Utdanning"
+    assert cassette.recorded == 1
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored["version"] == CASSETTE_VERSION
+    assert request_key(URL, PARAMS) in stored["interactions"]
+
+    replay = CassetteTransport(path)
+    with use_transport(replay):
+        assert klass.classification_by_id(36)["name"] == "Utdanning"
+    assert replay.played == 1
+    assert len(replay) == 1
+
+
+def test_replay_raises_on_unrecorded_request(tmp_path):
+    cassette = CassetteTransport(tmp_path / "empty.json")
+    with pytest.raises(KeyError):
+        cassette.get(URL, PARAMS)
+
+
+def test_new_mode_only_sends_unrecorded_requests(tmp_path):
+    transport = _memory_transport()
+    cassette = CassetteTransport(tmp_path / "c.json", mode="new", transport=transport)
+    cassette.get(URL, PARAMS)
+    cassette.get(URL, dict(reversed(list(PARAMS.items()))))
+    assert len(transport.calls) == 1
+    assert cassette.played == 1
+
+
+def test_record_mode_always_sends(tmp_path):
+    transport = _memory_transport()
+    cassette = CassetteTransport(
+        tmp_path / "c.json", mode="record", transport=transport
+    )
+    cassette.get(URL, PARAMS)
+    cassette.get(URL, PARAMS)
+    assert len(transport.calls) == 2
+
+
+def test_replay_keeps_binary_bodies_and_status(tmp_path):
+    transport = MemoryTransport(
+        {URL: TransportResponse(500, b"\xff\x00", {"X-Test": "1"}, URL, 0.25)}
+    )
+    path = tmp_path / "c.json"
+    with CassetteTransport(path, mode="new", transport=transport) as cassette:
+        cassette.get(URL)
+    response = CassetteTransport(path).get(URL)
+    assert response.status_code == 500
+    assert response.content == b"\xff\x00"
+    assert response.headers == {"X-Test": "1"}
+    assert response.elapsed == 0.25
+
+
+@mock.patch("klass.requests.cassette.time.sleep")
+def test_replay_latency_is_scaled(mock_sleep, tmp_path):
+    transport = MemoryTransport(
+        {URL: TransportResponse(200, b"{}", url=URL, elapsed=0.5)}
+    )
+    path = tmp_path / "c.json"
+    with CassetteTransport(path, mode="new", transport=transport) as cassette:
+        cassette.get(URL)
+    CassetteTransport(path, replay_latency=True, latency_scale=0.5).get(URL)
+    mock_sleep.assert_called_once_with(0.25)
+
+
+def test_newer_cassette_version_raises(tmp_path):
+    path = tmp_path / "c.json"
+    path.write_text(json.dumps({"version": CASSETTE_VERSION + 1}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        CassetteTransport(path)
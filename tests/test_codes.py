@@ -14,17 +14,24 @@ def test_codes_data_is_dataframe_has_len(
     assert isinstance(klass_codes.data, pd.DataFrame)
 
 
-@mock.patch("klass.classes.codes.codes_at")
+def test_codes_data_built_on_first_access(klass_codes_at_success):
+    assert klass_codes_at_success._data is None
+    data = klass_codes_at_success.data
+    assert klass_codes_at_success.data is data
+    assert klass_codes_at_success._records is None
+
+
+@mock.patch("klass.classes.codes.codes_at_records")
 def test_codes_auto_set_from_date(test_codes_at):
-    test_codes_at.return_value = mock_returns.codes_at_success()
+    test_codes_at.return_value = mock_returns.codes_at_records_success()
     codes = klass.KlassCodes(36)
     assert isinstance(codes.from_date, str)
     assert len(codes.from_date)
 
 
-@mock.patch("klass.classes.codes.codes_at")
+@mock.patch("klass.classes.codes.codes_at_records")
 def test_codes_change_dates(test_codes_at):
-    test_codes_at.return_value = mock_returns.codes_at_success()
+    test_codes_at.return_value = mock_returns.codes_at_records_success()
     codes = klass.KlassCodes(36)
     codes.change_dates(
         from_date="",
@@ -83,3 +90,67 @@ def test_codes_has_str_repr(klass_codes_at_success):
     assert klass_codes_at_success.__repr__()
     assert len(klass_codes_at_success.__str__())
     assert len(klass_codes_at_success.__repr__())
+
+
+def _versions(*periods):
+    return [
+        {
+            "name": f"Version {i}",
+            "validFrom": valid_from,
+            **({"validTo": valid_to} if valid_to else {}),
+            "_links": {
+                "self": {"href": f"https://data.ssb.no/api/klass/v1/versions/{i}"}
+            },
+        }
+        for i, (valid_from, valid_to) in enumerate(periods)
+    ]
+
+
+@mock.patch("klass.requests.klass_requests.codes_at")
+@mock.patch("klass.requests.klass_requests.classification_by_id")
+def test_codes_at_dates_one_request_per_version(
+    test_classification_by_id, test_codes_at, klass_codes_at_success
+):
+    test_classification_by_id.return_value = {
+        "versions": _versions(
+            ("2020-01-01", "2022-01-01"),
+            ("2022-01-01", "2024-01-01"),
+            ("2024-01-01", None),
+        )
+    }
+    test_codes_at.side_effect = (
+        lambda *args, **kwargs: klass_codes_at_success.data.copy()
+    )
+    dates = ["2020-03-01", "2021-12-31", "2022-01-01", "2023-06-01", "2030-01-01"]
+    result = klass_codes_at_success.at_dates(dates)
+    assert list(result) == dates
+    assert test_codes_at.call_count == 3
+    assert result["2020-03-01"] is result["2021-12-31"]
+    assert result["2022-01-01"] is not result["2021-12-31"]
+
+
+@mock.patch("klass.requests.klass_requests.codes_at")
+@mock.patch("klass.requests.klass_requests.classification_by_id")
+def test_codes_at_dates_outside_versions_and_long_format(
+    test_classification_by_id, test_codes_at, klass_codes_at_success
+):
+    test_classification_by_id.return_value = {
+        "versions": _versions(("2020-01-01", "2022-01-01"))
+    }
+    test_codes_at.return_value = klass_codes_at_success.data
+    result = klass_codes_at_success.at_dates(
+        ["2019-01-01", "2019-02-01", "2020-01-01"], long_format=True
+    )
+    assert test_codes_at.call_count == 3
+    assert isinstance(result, pd.DataFrame)
+    assert result.columns[0] == "date"
+    assert len(result) == 3 * len(klass_codes_at_success.data)
+
+
+@mock.patch("klass.requests.klass_requests.classification_by_id")
+def test_codes_at_no_dates(test_classification_by_id, klass_codes_at_success):
+    assert klass_codes_at_success.at_dates([]) == {}
+    result = klass_codes_at_success.at_dates(iter([]), long_format=True)
+    assert result.empty
+    assert list(result.columns) == ["date", *klass_codes_at_success.data.columns]
+    assert test_classification_by_id.call_count == 0
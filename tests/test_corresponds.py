@@ -37,3 +37,32 @@ def test_correspondence_to_dict(klass_correspondence_between_classifications_suc
     result = klass_correspondence_between_classifications_success.to_dict()
     assert isinstance(result, dict)
     assert len(result)
+
+
+def test_correspondence_period_frame(
+    klass_correspondence_between_classifications_success,
+):
+    correspondence = klass_correspondence_between_classifications_success
+    correspondence.from_date = "2021-10-01"
+    correspondence.to_date = "2022-07-01"
+    assert correspondence.periods().astype(str).tolist() == [
+        "2021Q4",
+        "2022Q1",
+        "2022Q2",
+    ]
+    frame = correspondence.period_frame("quarter")
+    oslo = frame[frame["sourceCode"] == "0300"]
+    assert oslo["period"].tolist() == ["2021Q4", "2022Q1", "2022Q2"]
+    assert oslo["sourceName"].tolist()[0] == "Oslo fylkeskommune"
+    assert len(correspondence.period_frame("month")["period"].unique()) == 9
+
+
+def test_correspondence_to_period_dicts(
+    klass_correspondence_between_classifications_success,
+):
+    correspondence = klass_correspondence_between_classifications_success
+    correspondence.to_date = "2023-07-01"
+    mappings = correspondence.to_period_dicts(other="99")
+    assert list(mappings) == ["2023Q1", "2023Q2"]
+    assert mappings["2023Q1"]["0300"] == "0301"
+    assert mappings["2023Q2"]["missing"] == "99"
@@ -0,0 +1,110 @@
+from unittest import mock
+
+import pandas as pd
+
+import klass
+import tests.mock_request_functions as mock_returns
+from klass.requests.klass_requests import classification_by_id_call
+from klass.requests.klass_requests import classificationfamilies_by_id_call
+from klass.requests.klass_requests import version_by_id_call
+from klass.requests.session import use_transport
+from klass.requests.transport import MemoryTransport
+from klass.requests.transport import request_key
+
+FAMILIES = {
+    "_embedded": {
+        "classificationFamilies": [
+            {
+                "name": "Utdanning",
+                "_links": {
+                    "self": {
+                        "href": "https://data.ssb.no/api/klass/v1/classificationfamilies/20"
+                    }
+                },
+            }
+        ]
+    }
+}
+
+
+def _transport(classification_ids=(), version_status=200):
+    transport = MemoryTransport()
+    transport.add(
+        *classificationfamilies_by_id_call("20"),
+        json_body=mock_returns.classificationfamilies_by_id_success(),
+    )
+    for classification_id in classification_ids:
+        transport.add(
+            *classification_by_id_call(classification_id),
+            json_body=mock_returns.classification_by_id_success(),
+        )
+    transport.add(
+        *version_by_id_call("0"),
+        json_body=mock_returns.version_by_id_success(),
+        status_code=version_status,
+    )
+    return transport
+
+
+@mock.patch("klass.classes.crawler.classificationfamilies")
+def test_crawler_walks_whole_tree(mock_families):
+    mock_families.return_value = FAMILIES
+    with use_transport(_transport(["36"])):
+        crawler = klass.KlassCatalogCrawler(max_workers=2)
+        manifest = crawler.crawl()
+    assert manifest["finished"]
+    assert set(crawler.nodes) == {
+        "family:20",
+        "classification:36",
+        "version:0",
+        "variant:1959",
+        "correspondence:447",
+    }
+    frame = crawler.to_frame()
+    assert isinstance(frame, pd.DataFrame)
+    assert set(frame["kind"]) >= {"family", "classification", "version", "variant"}
+    assert ("family:20", "classification:36") in crawler.edges
+    assert str(crawler)
+
+
+def test_crawler_dedupes_shared_nodes():
+    # Both classifications point to the same mocked version
+    transport = _transport(["1", "2"])
+    with use_transport(transport):
+        crawler = klass.KlassCatalogCrawler(classification_ids=[1, 2])
+        crawler.crawl()
+    assert transport.calls.count(request_key(*version_by_id_call("0"))) == 1
+    version_parents = crawler.edges_frame().query("child == 'version:0'")
+    assert set(version_parents["parent"]) == {"classification:1", "classification:2"}
+
+
+def test_crawler_sends_each_level_in_batches():
+    transport = _transport(["1", "2", "3"])
+    with (
+        use_transport(transport),
+        mock.patch.object(transport, "get_many", wraps=transport.get_many) as batches,
+    ):
+        klass.KlassCatalogCrawler(
+            classification_ids=[1, 2, 3], checkpoint_every=2
+        ).crawl()
+    assert [len(call.args[0]) for call in batches.call_args_list] == [2, 1, 1]
+    assert len(transport.calls) == 4
+
+
+def test_crawler_resume_from_checkpoint(tmp_path):
+    path = tmp_path / "catalog.json"
+    with use_transport(_transport(["1"], version_status=500)):
+        crawler = klass.KlassCatalogCrawler(
+            classification_ids=[1], checkpoint_path=path
+        )
+        crawler.crawl()
+    assert "version:0" in crawler.failed
+
+    transport = _transport()
+    with use_transport(transport):
+        resumed = klass.KlassCatalogCrawler.resume(path)
+        assert "classification:1" in resumed.nodes
+        resumed.crawl(retry_failed=True)
+    assert not resumed.failed
+    assert "version:0" in resumed.nodes
+    assert transport.calls == [request_key(*version_by_id_call("0"))]
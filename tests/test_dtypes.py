@@ -0,0 +1,45 @@
+import pandas as pd
+
+from klass.io.partitions import apply_mappings
+from klass.utility.dtypes import compact_dtypes
+
+
+def test_compact_dtypes_converts_known_columns():
+    data = pd.DataFrame(
+        {
+            "code": ["01", "01.1", "01.2"],
+            "parentCode": [None, "01", "01"],
+            "level": ["1", "2", "2"],
+            "validFrom": ["2020-01-01", "2020-01-01", ""],
+            "name": ["a", "b", "c"],
+        }
+    )
+    result = compact_dtypes(data)
+    assert isinstance(result["code"].dtype, pd.CategoricalDtype)
+    assert result["level"].dtype == "UInt8"
+    assert pd.api.types.is_datetime64_any_dtype(result["validFrom"])
+    assert result["validFrom"].isna().tolist() == [False, False, True]
+    assert result["name"].dtype == data["name"].dtype
+    assert data["level"].tolist() == ["1", "2", "2"]
+
+
+def test_codes_compact_dtypes_keeps_working(klass_codes_at_success):
+    mapping = klass_codes_at_success.to_dict(select_level=2)
+    klass_codes_at_success.compact_dtypes()
+    assert klass_codes_at_success.data["level"].dtype == "UInt8"
+    assert str(klass_codes_at_success)
+    assert klass_codes_at_success.to_dict(select_level=2) == mapping
+
+
+def test_version_compact_dtypes(klass_version_success):
+    klass_version_success.compact_dtypes()
+    assert isinstance(
+        klass_version_success.data["levelName"].dtype, pd.CategoricalDtype
+    )
+
+
+def test_apply_mappings_categorical():
+    data = pd.DataFrame({"code": ["0301", "4601", "0301", "9999"]})
+    result = apply_mappings(data, {"navn": {"0301": "Oslo"}}, categorical=True)
+    assert isinstance(result["navn"].dtype, pd.CategoricalDtype)
+    assert result["navn"].isna().tolist() == [False, True, False, True]
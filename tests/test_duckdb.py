@@ -0,0 +1,63 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from klass.io.duckdb_tables import KlassDuckDB
+
+MAPPING = {"0301": "Oslo", "4601": "Bergen"}
+
+
+def test_register_codes_and_klass_name(klass_codes_at_success):
+    db = KlassDuckDB()
+    relation = db.register_codes("kjonn", klass_codes_at_success)
+    assert len(relation.fetchall()) == len(klass_codes_at_success.data)
+    in_range = db.sql("SELECT klass_name(36, '1', DATE '2021-06-01')").fetchone()
+    after = db.sql("SELECT klass_name('36', 1, '2023-06-01')").fetchone()
+    assert in_range == ("Mann",)
+    assert after == (None,)
+
+
+def test_register_codes_again_replaces_names(klass_codes_at_success):
+    db = KlassDuckDB()
+    db.register_codes("kjonn", klass_codes_at_success)
+    db.register_codes("kjonn", klass_codes_at_success)
+    count = db.sql("SELECT count(*) FROM klass_names").fetchone()
+    assert count == (len(klass_codes_at_success.data),)
+
+
+def test_register_codes_needs_classification_id():
+    db = KlassDuckDB()
+    with pytest.raises(ValueError):
+        db.register_codes("codes", pd.DataFrame({"code": ["1"], "name": ["A"]}))
+
+
+def test_klass_map_over_a_table():
+    db = KlassDuckDB()
+    db.register_mapping("kommuner", MAPPING)
+    db.register("data", pd.DataFrame({"kommune": ["4601", "0301", "9999"]}))
+    result = db.sql(
+        "SELECT klass_map('kommuner', kommune) AS navn FROM data ORDER BY kommune"
+    ).fetchall()
+    assert result == [("Oslo",), ("Bergen",), (None,)]
+
+
+def test_register_correspondence(klass_correspondence_from_id_success):
+    db = KlassDuckDB()
+    db.register_correspondence("fylker", klass_correspondence_from_id_success)
+    source, target = next(iter(klass_correspondence_from_id_success.to_dict().items()))
+    result = db.sql(f"SELECT klass_map('fylker', '{source}')").fetchone()
+    assert result == (target,)
+
+
+@mock.patch("klass.io.duckdb_tables.changes")
+def test_register_changes(mock_changes):
+    mock_changes.return_value = pd.DataFrame(
+        {"oldCode": ["1942"], "newCode": ["1942"], "changeOccurred": ["2019-01-01"]}
+    )
+    db = KlassDuckDB()
+    relation = db.register_changes("endringer", 131, "2018-01-01")
+    assert relation.fetchall()[0][0] == "1942"
+    mock_changes.assert_called_once_with(131, "2018-01-01", None, "nb")
@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pandas as pd
+
+import tests.mock_request_functions as mock_returns
+from klass.utility.filters import FrameMemo
+from klass.utility.filters import limit_na_level
+from klass.utility.filters import mapping_columns
+
+
+def make_data() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "code": ["01", "02", "", "03", None],
+            "name": ["a", "b", "c", "d", "e"],
+            "presentationName": ["A", "", "C", None, "E"],
+            "level": ["1", "2", "1", "1", "1"],
+        }
+    )
+
+
+def test_mapping_columns_matches_limit_na_level():
+    data = make_data()
+    keys, values = mapping_columns(data, "code", "name", select_level=1)
+    expected = limit_na_level(data, "code", "name", select_level=1)
+    assert keys.tolist() == expected["code"].tolist() == ["01", "03"]
+    assert values.tolist() == ["a", "d"]
+
+
+def test_mapping_columns_falls_back_to_name():
+    keys, values = mapping_columns(make_data(), "code", "presentationName")
+    assert dict(zip(keys, values, strict=True)) == {"01": "A", "02": "b", "03": "d"}
+
+
+def test_mapping_columns_does_not_change_data():
+    data = make_data()
+    before = data.copy()
+    mapping_columns(data, "code", "presentationName", remove_na=False)
+    pd.testing.assert_frame_equal(data, before)
+
+
+def test_frame_memo_reuses_and_forgets_masks():
+    masks = FrameMemo()
+    data = make_data()
+    mapping_columns(data, "code", "name", masks=masks)
+    first = masks.get(data, ("code", "name", True, None))
+    mapping_columns(data, "code", "name", masks=masks)
+    assert masks.get(data, ("code", "name", True, None)) is first
+    assert masks.get(data, ("code", "name", False, None)) is None
+    assert len(masks) == 1
+    assert masks.get(make_data(), ("code", "name", True, None)) is None
+    assert len(masks) == 0
+
+
+def test_mapping_columns_after_drop_in_place():
+    masks = FrameMemo()
+    data = make_data()
+    mapping_columns(data, "code", "name", masks=masks)
+    data.drop(index=0, inplace=True)
+    keys, values = mapping_columns(data, "code", "name", masks=masks)
+    assert dict(zip(keys, values, strict=True)) == {"02": "b", "03": "d"}
+
+
+def test_mapping_columns_after_cell_edit():
+    masks = FrameMemo()
+    data = make_data()
+    mapping_columns(data, "code", "name", masks=masks)
+    data.loc[0, "name"] = ""
+    keys, values = mapping_columns(data, "code", "name", masks=masks)
+    assert dict(zip(keys, values, strict=True)) == {"02": "b", "03": "d"}
+
+
+def test_codes_to_dict_keeps_masks_on_object(klass_codes_at_success):
+    first = klass_codes_at_success.to_dict()
+    assert klass_codes_at_success.to_dict() == first
+    assert len(klass_codes_at_success._mappings.masks) == 1
+
+
+def test_to_dict_returns_copies(klass_codes_at_success):
+    first = klass_codes_at_success.to_dict()
+    first["new"] = "changed"
+    assert "new" not in klass_codes_at_success.to_dict()
+    assert len(klass_codes_at_success._mappings) == 1
+
+
+def test_to_dict_memo_follows_data(klass_codes_at_success):
+    klass_codes_at_success.to_dict()
+    klass_codes_at_success.data = klass_codes_at_success.data.iloc[:1]
+    assert len(klass_codes_at_success.to_dict()) == 1
+
+
+def test_setting_data_clears_to_dict_memo(klass_codes_at_success):
+    klass_codes_at_success.to_dict()
+    klass_codes_at_success.data = klass_codes_at_success.data.copy()
+    assert len(klass_codes_at_success._mappings) == 0
+
+
+def test_to_dict_after_cell_edit_in_place(klass_codes_at_success):
+    data = klass_codes_at_success.data
+    first = next(iter(klass_codes_at_success.to_dict()))
+    data.loc[data["code"] == first, "name"] = "changed"
+    assert klass_codes_at_success.to_dict()[first] == "changed"
+
+
+def test_to_dict_after_drop_in_place(klass_codes_at_success):
+    data = klass_codes_at_success.data
+    before = klass_codes_at_success.to_dict()
+    dropped = data["code"].iloc[0]
+    data.drop(index=data.index[0], inplace=True)
+    after = klass_codes_at_success.to_dict()
+    assert dropped not in after
+    assert len(after) == len(before) - 1
+
+
+@mock.patch("klass.classes.codes.codes_at_records")
+def test_get_codes_clears_to_dict_memo(test_codes_at, klass_codes_at_success):
+    test_codes_at.return_value = mock_returns.codes_at_records_success()
+    klass_codes_at_success.to_dict()
+    klass_codes_at_success.to_dict(select_level=1)
+    assert len(klass_codes_at_success._mappings) == 2
+    klass_codes_at_success.change_dates("2024-01-01")
+    assert len(klass_codes_at_success._mappings) == 0
+
+
+def test_variant_to_dict_with_other_is_defaultdict(klass_variant_success):
+    mapping = klass_variant_success.to_dict(other="99")
+    assert mapping["not a code"] == "99"
+    assert "not a code" not in klass_variant_success.to_dict()
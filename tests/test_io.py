@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import klass
+from klass.io.streaming import ArrowMapping
+
+MUNICIPALITIES = {"0301": "Oslo", "4601": "Bergen"}
+
+
+@pytest.fixture
+def register():
+    return pd.DataFrame(
+        {"kommune": ["0301", "4601", "9999", None, "0301"], "value": [1, 2, 3, 4, 5]}
+    )
+
+
+def test_arrow_mapping_other_from_defaultdict():
+    mapping = ArrowMapping(defaultdict(lambda: "Ukjent", MUNICIPALITIES))
+    result = mapping.apply(pa.array(["4601", "1111"]))
+    assert result.to_pylist() == ["Bergen", "Ukjent"]
+
+
+def test_arrow_mapping_other_from_lookup():
+    lookup = klass.KlassLookup.from_mapping(MUNICIPALITIES, other="Ukjent")
+    codes = ["0301", "9999"]
+    assert ArrowMapping(lookup).apply(pa.array(codes)).to_pylist() == list(
+        lookup.map(codes)
+    )
+    assert ArrowMapping(lookup, other="x").apply(pa.array(codes)).to_pylist() == [
+        "Oslo",
+        "x",
+    ]
+
+
+def test_map_batches_adds_and_replaces_columns(register):
+    batches = pa.Table.from_pandas(register).to_batches(max_chunksize=2)
+    result = pa.Table.from_batches(
+        list(
+            klass.map_batches(
+                batches,
+                {
+                    "kommune_navn": ("kommune", MUNICIPALITIES),
+                    "value": ("kommune", {"0301": "x"}),
+                },
+            )
+        )
+    ).to_pandas()
+    assert result["kommune_navn"].tolist()[:2] == ["Oslo", "Bergen"]
+    assert result["kommune_navn"].isna().tolist() == [False, False, True, True, False]
+    assert result["value"].tolist()[0] == "x"
+
+
+def test_map_batches_missing_column_raises(register):
+    batches = pa.Table.from_pandas(register).to_batches()
+    with pytest.raises(KeyError):
+        list(klass.map_batches(batches, {"x": ("missing", MUNICIPALITIES)}))
+
+
+def test_map_file_parquet(register, tmp_path):
+    source, destination = tmp_path / "in.parquet", tmp_path / "out.parquet"
+    register.to_parquet(source)
+    rows = klass.map_file(
+        source,
+        destination,
+        {"kommune_navn": ("kommune", klass.KlassLookup.from_mapping(MUNICIPALITIES))},
+        batch_size=2,
+    )
+    assert rows == len(register)
+    result = pq.read_table(destination).to_pandas()
+    assert result["kommune_navn"].fillna("").tolist() == [
+        "Oslo",
+        "Bergen",
+        "",
+        "",
+        "Oslo",
+    ]
+
+
+def test_map_file_csv_keeps_leading_zeros(register, tmp_path):
+    source, destination = tmp_path / "in.csv", tmp_path / "out.csv"
+    register.to_csv(source, sep=";", index=False)
+    klass.map_file(
+        source, destination, {"navn": ("kommune", MUNICIPALITIES)}, delimiter=";"
+    )
+    result = pd.read_csv(destination, sep=";", dtype=str)
+    assert result["kommune"].iloc[0] == "0301"
+    assert result["navn"].iloc[0] == "Oslo"
+
+
+def test_map_file_unknown_suffix(tmp_path):
+    with pytest.raises(ValueError):
+        klass.map_file(tmp_path / "in.xlsx", tmp_path / "out.bin", {})
@@ -0,0 +1,84 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+import klass
+
+
+@pytest.fixture
+def lookup():
+    return klass.KlassLookup.from_mapping(
+        {"03": "Oslo", "0301": "Oslo kommune", "46": "Vestland", "11": None}
+    )
+
+
+def test_lookup_behaves_like_dict(lookup):
+    assert len(lookup) == 4
+    assert lookup["46"] == "Vestland"
+    assert lookup["11"] is None
+    assert "0301" in lookup
+    assert list(lookup) == ["03", "0301", "11", "46"]
+    with pytest.raises(KeyError):
+        lookup["99"]
+    with pytest.raises(AttributeError):
+        lookup.other = "x"
+
+
+def test_lookup_map_keeps_index_and_other(lookup):
+    codes = pd.Series(["46", "99", None, "03"], index=[10, 11, 12, 13])
+    result = lookup.map(codes)
+    assert list(result.index) == [10, 11, 12, 13]
+    assert result.isna().tolist() == [False, True, True, False]
+    assert lookup.map(["99"], other="Ukjent").tolist() == ["Ukjent"]
+    assert result.tolist()[0] == codes.map(dict(lookup)).tolist()[0]
+
+
+def test_lookup_pickles_small(lookup):
+    restored = pickle.loads(pickle.dumps(lookup))
+    assert dict(restored) == dict(lookup)
+
+
+def test_lookup_shared_memory(lookup):
+    with lookup.share() as shared:
+        assert "shared_memory" in repr(shared)
+        payload = pickle.dumps(shared)
+        assert len(payload) < 200
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(shared.map, ["0301", "46"]).result()
+        assert result.tolist() == ["Oslo kommune", "Vestland"]
+
+
+def test_codes_to_lookup(klass_codes_at_success):
+    lookup = klass_codes_at_success.to_lookup()
+    assert dict(lookup) == {
+        k: v for k, v in klass_codes_at_success.to_dict().items() if isinstance(v, str)
+    }
+
+
+def test_variant_to_lookup(klass_variant_success):
+    assert len(klass_variant_success.to_lookup()) == len(
+        klass_variant_success.to_dict()
+    )
+
+
+def test_lookup_map_categorical(lookup):
+    result = lookup.map(["46", "99", "03", "46"], categorical=True)
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.isna().tolist() == [False, True, False, False]
+    assert result.tolist()[0] == "Vestland"
+    with_other = lookup.map(["99"], other="Ukjent", categorical=True)
+    assert with_other.tolist() == ["Ukjent"]
+
+
+def test_lookup_keeps_missing_values_missing(lookup):
+    codes = pd.Series(["11", "46", "99"])
+    expected = codes.map({"03": "Oslo", "46": "Vestland", "11": None})
+    result = lookup.map(codes)
+    assert result.isna().tolist() == expected.isna().tolist() == [True, False, True]
+    assert lookup.map(codes, other="Ukjent").tolist() == [pd.NA, "Vestland", "Ukjent"]
+    categorical = lookup.map(codes, other="Ukjent", categorical=True)
+    assert categorical.isna().tolist() == [True, False, False]
+    assert "Ukjent" in categorical.cat.categories
+    assert "" not in categorical.cat.categories
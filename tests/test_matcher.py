@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import klass
+from klass.classes.matcher import MATCH_COLUMNS
+
+NACE = pd.DataFrame(
+    {
+        "code": ["03.1", "03.2", "10.2", "62.0"],
+        "name": [
+            "Fiske og fangst",
+            "Akvakultur",
+            "Bearbeiding og konservering av fisk",
+            "Tjenester tilknyttet informasjonsteknologi",
+        ],
+        "shortName": ["Fiske", "Akvakultur", "Fiskeforedling", "IT-tjenester"],
+        "notes": [None, "Oppdrett av fisk", None, None],
+    }
+)
+
+
+@pytest.fixture
+def matcher():
+    return klass.KlassCodeMatcher(NACE)
+
+
+def test_matcher_tolerates_typos(matcher):
+    result = matcher.match(["akvakultr", "informasjonsteknlogi tjenster"], top_k=1)
+    assert list(result["code"]) == ["03.2", "62.0"]
+    assert (result["score"] > 0.3).all()
+
+
+def test_matcher_top_k_is_ranked(matcher):
+    result = matcher.match(["fisk"], top_k=3)
+    assert len(result) == 3
+    assert list(result["rank"]) == [1, 2, 3]
+    assert result["score"].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize("texts", [["zzzz"], [], [None]])
+def test_matcher_without_candidates(matcher, texts):
+    result = matcher.match(texts)
+    assert list(result.columns) == MATCH_COLUMNS
+    assert result.empty
+    assert matcher.best(texts).isna().all()
+    assert len(matcher.best(texts)) == len(texts)
+
+
+def test_matcher_norwegian_characters():
+    data = pd.DataFrame({"code": ["5501", "5001"], "name": ["Tromsø", "Trondheim"]})
+    result = klass.KlassCodeMatcher(data).match(["TROMSOE", "tromso"], top_k=1)
+    assert list(result["code"]) == ["5501", "5501"]
+
+
+def test_matcher_best_keeps_order_and_duplicates(matcher):
+    texts = pd.Series(["oppdrett av fisk", None, "zzzz", "oppdrett av fisk"])
+    best = matcher.best(texts, min_score=0.2)
+    assert best.iloc[0] == "03.2"
+    assert best.iloc[3] == "03.2"
+    assert best.iloc[1:3].isna().all()
+
+
+def test_matcher_many_texts(matcher):
+    texts = np.random.default_rng(0).choice(["akvakultur", "fiske", "IT"], 10_000)
+    best = matcher.best(pd.Series(texts))
+    assert len(best) == 10_000
+    assert best.notna().all()
+
+
+def test_matcher_from_codes(klass_codes_at_success):
+    result = klass_codes_at_success.get_matcher().match(["babygut"], top_k=1)
+    assert result.iloc[0]["code"] == "3"
+
+
+def test_matcher_missing_fields_raises():
+    with pytest.raises(ValueError):
+        klass.KlassCodeMatcher(NACE, fields=["missing"])
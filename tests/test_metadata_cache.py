@@ -0,0 +1,89 @@
+import threading
+from unittest import mock
+
+import requests
+
+import klass
+import tests.mock_response_data
+from klass.requests.metadata_cache import KlassMetadataCache
+
+
+def test_metadata_cache_persists_between_instances(tmp_path):
+    fetch = mock.Mock(return_value={"names": ["a", "b"]})
+    first = KlassMetadataCache(tmp_path)
+    assert first.get("listing", fetch) == {"names": ["a", "b"]}
+    second = KlassMetadataCache(tmp_path)
+    assert second.get("listing", fetch) == {"names": ["a", "b"]}
+    assert fetch.call_count == 1
+
+
+def test_metadata_cache_returns_copies():
+    cache = KlassMetadataCache()
+    cache.get("listing", lambda: ["a"]).append("changed")
+    assert cache.get("listing", lambda: ["b"]) == ["a"]
+
+
+def test_metadata_cache_serves_stale_while_refreshing(tmp_path):
+    cache = KlassMetadataCache(tmp_path, ttl=0)
+    cache.get("listing", lambda: "old")
+    refreshed = threading.Event()
+
+    def fetch_new():
+        refreshed.set()
+        return "new"
+
+    assert cache.get("listing", fetch_new) == "old"
+    assert refreshed.wait(5)
+    for _ in range(500):
+        if not cache._refreshing:
+            break
+        refreshed.wait(0.01)
+    assert cache.get("listing", lambda: "newer", ttl=60) == "new"
+
+
+def test_metadata_cache_keeps_stale_value_on_failed_refresh():
+    cache = KlassMetadataCache(ttl=0)
+    cache.get("listing", lambda: "old")
+    failing = mock.Mock(side_effect=requests.ConnectionError("offline"))
+    assert cache.get("listing", failing) == "old"
+
+
+def test_metadata_cache_invalidate(tmp_path):
+    cache = KlassMetadataCache(tmp_path)
+    cache.get("first", lambda: 1)
+    cache.get("second", lambda: 2)
+    cache.invalidate("first")
+    assert cache.get("first", lambda: 3) == 3
+    cache.invalidate()
+    assert not list(tmp_path.glob("metadata-*.json"))
+    assert cache.get("second", lambda: 4) == 4
+
+
+@mock.patch.object(requests.Session, "send")
+def test_sections_fetched_once_through_shared_session(mock_response):
+    mock_response.return_value = tests.mock_response_data.sections_fake_content()
+    klass.clear_metadata_cache()
+    sections = klass.sections_list()
+    assert klass.sections_list() == sections
+    assert mock_response.call_count == 1
+    assert klass.sections_dict()["320"] == "320 - Seksjon for befolkningsstatistikk"
+
+
+def test_metadata_cache_invalidate_prefix(tmp_path):
+    cache_dir = tmp_path / "prefix"
+    cache = KlassMetadataCache(cache_dir)
+    for name in ["classifications-True", "classifications-False", "sections"]:
+        cache.refresh(name, lambda: 1)
+    assert cache.invalidate_prefix("classifications-") == 2
+    assert [path.name for path in cache_dir.iterdir()] == ["metadata-sections.json"]
+    assert KlassMetadataCache(cache_dir).get("sections", lambda: 2) == 1
+
+
+@mock.patch.object(requests.Session, "send")
+def test_classificationfamilies_by_id_fetched_once(mock_response):
+    mock_response.return_value = (
+        tests.mock_response_data.classificationfamilies_by_id_fake_content()
+    )
+    family = klass.requests.klass_requests.classificationfamilies_by_id(20)
+    assert klass.requests.klass_requests.classificationfamilies_by_id(20) == family
+    assert mock_response.call_count == 1
@@ -0,0 +1,112 @@
+import pickle
+
+import pandas as pd
+import pytest
+
+import klass
+
+
+@pytest.fixture
+def splits():
+    return klass.KlassMultiMap.from_pairs(
+        ["0301", "1201", "1201", "1201", "5001"],
+        ["0301", "4601", "4626", "4601", "5001"],
+    )
+
+
+def test_multimap_keeps_all_values(splits):
+    assert len(splits) == 3
+    assert splits["1201"] == ("4601", "4626")
+    assert splits["0301"] == ("0301",)
+    assert not splits.is_one_to_one()
+    assert splits.counts(["1201", "9999", None]).tolist() == [2, 0, 0]
+    with pytest.raises(KeyError):
+        splits["9999"]
+
+
+def test_multimap_inverse(splits):
+    inverse = splits.inverse()
+    assert inverse["4601"] == ("1201",)
+    assert inverse.inverse().to_frame().equals(splits.to_frame())
+
+
+def test_multimap_explode(splits):
+    data = pd.DataFrame(
+        {"kommune": ["1201", "0301", "9999"], "persons": [10, 5, 1]},
+        index=[7, 8, 9],
+    )
+    result = splits.explode(data, "kommune", "kommune_ny")
+    assert result.index.tolist() == [7, 7, 8, 9]
+    assert result["kommune_ny"].fillna("").tolist() == ["4601", "4626", "0301", ""]
+    assert result["persons"].tolist() == [10, 10, 5, 1]
+    dropped = splits.explode(data, "kommune", "kommune_ny", keep_missing=False)
+    assert len(dropped) == 3
+
+
+def test_multimap_aggregate_through_inverse(splits):
+    data = pd.DataFrame({"kommune": ["4601", "4626", "5001"], "persons": [3, 4, 5]})
+    result = splits.inverse().aggregate(data, "kommune", "persons")
+    assert dict(zip(result["kommune"], result["persons"], strict=True)) == {
+        "1201": 7,
+        "5001": 5,
+    }
+
+
+def test_empty_multimap_treats_codes_as_missing():
+    empty = klass.KlassMultiMap.from_pairs([], [])
+    data = pd.DataFrame({"kommune": ["1201", None], "persons": [10, 5]})
+    assert len(empty) == 0
+    assert empty.counts(data["kommune"]).tolist() == [0, 0]
+    exploded = empty.explode(data, "kommune", "kommune_ny")
+    assert exploded["persons"].tolist() == [10, 5]
+    assert exploded["kommune_ny"].isna().all()
+    assert empty.explode(data, "kommune", "kommune_ny", keep_missing=False).empty
+    allocated = empty.allocate(data, "kommune", "persons", "kommune_ny")
+    assert allocated["persons"].tolist() == [10.0, 5.0]
+
+
+def test_multimap_pickles(splits):
+    assert dict(pickle.loads(pickle.dumps(splits))) == dict(splits)
+
+
+def test_correspondence_to_multimap(
+    klass_correspondence_between_classifications_success,
+):
+    correspondence = klass_correspondence_between_classifications_success
+    multimap = correspondence.to_multimap()
+    mapping = correspondence.to_dict()
+    assert set(multimap) == set(mapping)
+    assert all(mapping[key] in multimap[key] for key in mapping)
+    assert sum(multimap.sizes) >= len(mapping)
+
+
+def test_multimap_allocate_keeps_totals(splits):
+    data = pd.DataFrame({"kommune": ["1201", "0301", "9999"], "persons": [10, 5, 1]})
+    result = splits.allocate(data, "kommune", "persons", "kommune_ny")
+    assert result["persons"].sum() == data["persons"].sum()
+    assert result["persons"].tolist() == [5.0, 5.0, 5.0, 1.0]
+
+
+def test_multimap_allocate_with_weights(splits):
+    data = pd.DataFrame({"kommune": ["1201"], "persons": [10]})
+    weights = pd.Series({"4601": 3, "4626": 1})
+    result = splits.allocate(
+        data, "kommune", "persons", "kommune_ny", weights, share_col_name="share"
+    )
+    assert result["persons"].tolist() == [7.5, 2.5]
+    assert result["share"].tolist() == [0.75, 0.25]
+    pair_weights = pd.Series(
+        [0, 0], index=pd.MultiIndex.from_tuples([("1201", "4601"), ("1201", "4626")])
+    )
+    equal = splits.allocate(data, "kommune", "persons", "kommune_ny", pair_weights)
+    assert equal["persons"].tolist() == [5.0, 5.0]
+    with pytest.raises(ValueError):
+        splits.shares(pd.Series({"4601": -1}))
+
+
+def test_correspondence_allocate(klass_correspondence_between_classifications_success):
+    correspondence = klass_correspondence_between_classifications_success
+    codes = correspondence.data["sourceCode"].drop_duplicates()
+    data = pd.DataFrame({"sourceCode": codes, "amount": range(len(codes))})
+    result = correspondence.allocate(data, "amount")
+    assert result["amount"].sum() == pytest.approx(data["amount"].sum())
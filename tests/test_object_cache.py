@@ -0,0 +1,58 @@
+from unittest import mock
+
+import klass
+import tests.mock_request_functions as mock_returns
+from klass.utility.object_cache import KlassObjectCache
+
+
+def test_object_cache_lru_eviction():
+    cache = KlassObjectCache(maxsize=2)
+    factory = mock.Mock(side_effect=lambda: object())
+    first = cache.get_or_create(("kind", "1"), factory)
+    cache.get_or_create(("kind", "2"), factory)
+    assert cache.get_or_create(("kind", "1"), factory) is first
+    cache.get_or_create(("kind", "3"), factory)
+    assert len(cache) == 2
+    assert factory.call_count == 3
+    cache.get_or_create(("kind", "2"), factory)
+    assert factory.call_count == 4
+    assert cache.hits == 1
+
+
+def test_object_cache_invalidate():
+    cache = KlassObjectCache()
+    cache.get_or_create(("version", "1", "nb"), object)
+    cache.get_or_create(("version", "1", "en"), object)
+    cache.get_or_create(("variant", "1", "nb"), object)
+    assert cache.invalidate("version", 1) == 2
+    assert cache.invalidate() == 1
+    assert not len(cache)
+
+
+@mock.patch("klass.classes.version.version_by_id")
+@mock.patch("klass.classes.variant.variants_by_id")
+def test_get_version_and_variant_share_instances(
+    mock_variants_by_id, mock_version_by_id, klass_classification_success
+):
+    mock_version_by_id.return_value = mock_returns.version_by_id_success()
+    mock_variants_by_id.return_value = mock_returns.variants_by_id_success()
+    version = klass_classification_success.get_version()
+    assert klass_classification_success.get_version() is version
+    assert mock_version_by_id.call_count == 1
+
+    variant = version.get_variant(search_term="fagskole")
+    assert version.get_all_variants()[0] is variant
+    assert mock_variants_by_id.call_count == 1
+
+    klass.object_cache.invalidate("version")
+    assert klass_classification_success.get_version() is not version
+    assert mock_version_by_id.call_count == 2
+
+
+def test_object_cache_pop_objects():
+    cache = KlassObjectCache()
+    first = cache.get_or_create(("version", "1", "nb"), object)
+    cache.get_or_create(("version", "2", "nb"), object)
+    cache.get_or_create(("variant", "1", "nb"), object)
+    assert cache.pop_objects("version", [1, 3]) == [(("version", "1", "nb"), first)]
+    assert len(cache) == 2
@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import klass
+from klass.io.partitions import apply_mappings
+from klass.io.partitions import map_partitions
+
+MAPPINGS = {"navn": {"0301": "Oslo", "4601": "Bergen"}, "fylke": {"0301": "03"}}
+
+
+def _chunks():
+    for codes in (["0301", "4601"], ["9999"], ["0301"]):
+        yield pd.DataFrame({"code": codes})
+
+
+def test_apply_mappings_does_not_change_input():
+    data = pd.DataFrame({"code": ["0301", "4601"]})
+    result = apply_mappings(data, MAPPINGS)
+    assert list(data.columns) == ["code"]
+    assert result["navn"].tolist() == ["Oslo", "Bergen"]
+
+
+def test_map_partitions_chunks_keeps_order():
+    result = list(map_partitions(_chunks(), MAPPINGS, max_workers=2))
+    assert [len(chunk) for chunk in result] == [2, 1, 1]
+    assert result[0]["fylke"].tolist()[0] == "03"
+    assert result[2]["navn"].tolist() == ["Oslo"]
+
+
+def test_map_partitions_dask():
+    dd = pytest.importorskip("dask.dataframe")
+    data = dd.from_pandas(pd.concat(_chunks(), ignore_index=True), npartitions=2)
+    result = map_partitions(data, MAPPINGS).compute()
+    assert result["navn"].tolist()[:2] == ["Oslo", "Bergen"]
+
+
+@mock.patch.object(klass.KlassVersion, "get_all_correspondences")
+@mock.patch.object(klass.KlassVersion, "get_all_variants")
+def test_version_join_on_partitions_matches_in_memory(
+    mock_variants, mock_correspondences, klass_version_success, klass_variant_success
+):
+    mock_variants.return_value = [klass_variant_success]
+    mock_correspondences.return_value = []
+    codes = klass_variant_success.data[["code"]].reset_index(drop=True)
+    expected = klass_version_success.join_all_variants_correspondences_on_data(
+        data_left=codes
+    )
+    chunks = [codes.iloc[:2], codes.iloc[2:]]
+    result = pd.concat(
+        klass_version_success.join_all_variants_correspondences_on_partitions(
+            iter(chunks), max_workers=1
+        )
+    )
+    pd.testing.assert_frame_equal(result, expected)
+    assert mock_variants.call_count == 2
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from klass import KlassLookup
+
+pl = pytest.importorskip("polars")
+
+from klass.io.polars_frames import join_codes
+from klass.io.polars_frames import map_codes
+from klass.io.polars_frames import mapping_frame
+from klass.io.polars_frames import records_to_polars
+
+MAPPING = {"0301": "Oslo", "4601": "Bergen"}
+
+
+def test_records_to_polars_flattens_and_selects_level():
+    records = [
+        {"code": "1", "level": "1", "_links": {"self": {"href": "a"}}},
+        {"code": "11", "level": "2", "_links": {"self": {"href": "b"}}},
+    ]
+    result = records_to_polars(records, select_level=2)
+    assert result["code"].to_list() == ["11"]
+    assert "_links.self.href" in result.columns
+
+
+def test_records_to_polars_empty():
+    assert records_to_polars([]).is_empty()
+
+
+def test_map_codes_matches_pandas_map():
+    data = pl.DataFrame({"kommune": ["0301", "4601", "9999"]})
+    result = map_codes(data, "kommune", MAPPING, "navn", other="Ukjent")
+    expected = (
+        pd.Series(["0301", "4601", "9999"]).map(MAPPING).fillna("Ukjent").tolist()
+    )
+    assert result["navn"].to_list() == expected
+    assert result["kommune"].to_list() == ["0301", "4601", "9999"]
+
+
+def test_map_codes_lazy_and_lookup():
+    data = pl.DataFrame({"kommune": ["4601", "0301"]}).lazy()
+    result = map_codes(data, "kommune", KlassLookup.from_mapping(MAPPING))
+    assert isinstance(result, pl.LazyFrame)
+    assert result.collect()["kommune"].to_list() == ["Bergen", "Oslo"]
+
+
+def test_join_codes_keeps_row_order():
+    data = pl.DataFrame({"kommune": ["4601", "9999", "0301"]})
+    result = join_codes(data, "kommune", {"navn": MAPPING})
+    assert result.columns == ["kommune", "navn"]
+    assert result["navn"].to_list() == ["Bergen", None, "Oslo"]
+
+
+def test_lookup_other_for_missing_codes():
+    lookup = KlassLookup.from_mapping({**MAPPING, "1111": None}, other="Ukjent")
+    codes = ["0301", "9999", "1111"]
+    expected = lookup.map(codes).tolist()
+    data = pl.DataFrame({"kommune": codes})
+    mapped = map_codes(data, "kommune", lookup, "navn")["navn"].to_list()
+    joined = join_codes(data.lazy(), "kommune", {"navn": lookup}).collect()
+    assert mapped == ["Oslo", "Ukjent", None]
+    assert joined["navn"].to_list() == mapped
+    assert [None if pd.isna(value) else value for value in expected] == mapped
+
+
+def test_mapping_frame():
+    result = mapping_frame(MAPPING, "code", "name")
+    assert result.schema == {"code": pl.Utf8, "name": pl.Utf8}
+    assert result.height == 2
+
+
+def test_variant_to_polars_without_pandas(klass_variant_success):
+    result = klass_variant_success.to_polars()
+    assert klass_variant_success._data is None
+    assert result["code"].to_list() == klass_variant_success.data["code"].tolist()
+
+
+def test_codes_to_polars_without_pandas(klass_codes_at_success):
+    result = klass_codes_at_success.to_polars()
+    assert klass_codes_at_success._data is None
+    assert result["code"].to_list() == klass_codes_at_success.data["code"].tolist()
+
+
+def test_correspondence_to_polars(klass_correspondence_from_id_success):
+    result = klass_correspondence_from_id_success.to_polars()
+    assert result.height == len(klass_correspondence_from_id_success.data)
@@ -0,0 +1,114 @@
+from datetime import datetime
+from datetime import timezone
+from unittest import mock
+
+import klass
+import tests.mock_request_functions as mock_returns
+from klass.classes.poller import SYNC_OVERLAP
+from klass.requests.klass_requests import convert_datestring
+from klass.requests.metadata_cache import KlassMetadataCache
+from klass.utility.object_cache import KlassObjectCache
+
+
+@mock.patch("klass.classes.poller.classification_by_id")
+@mock.patch("klass.classes.poller.classifications")
+def test_poll_invalidates_changed_versions(
+    mock_classifications, mock_classification_by_id
+):
+    mock_classifications.return_value = mock_returns.classifications_success()
+    classification = mock_returns.classification_by_id_success()
+    mock_classification_by_id.return_value = classification
+    version_id = classification["versions"][0]["_links"]["self"]["href"].split("/")[-1]
+    cache = KlassObjectCache()
+    cache.get_or_create(("version", version_id, None, "nb", False), object)
+    cache.get_or_create(("version", "not changed", None, "nb", False), object)
+    reports = []
+    poller = klass.KlassChangePoller(since="2023-01-01T00:00:00+00:00", cache=cache)
+    poller.subscribe(reports.append)
+    report = poller.poll()
+    assert report["changed"][0]["classification_id"] == "0"
+    assert report["invalidated"] == 1
+    assert len(cache) == 1
+    assert reports == [report]
+    assert poller.last_sync.isoformat() == report["checked_at"]
+    mock_classifications.assert_called_once_with(
+        changed_since="2022-12-31T23:59:00+00:00"
+    )
+
+
+def test_poller_keeps_last_sync_in_utc():
+    poller = klass.KlassChangePoller(since="2023-07-01", cache=KlassObjectCache())
+    assert poller.last_sync.utcoffset().total_seconds() == 0
+    assert poller.last_sync == datetime(2023, 7, 1).astimezone(timezone.utc)
+    summer = datetime(2023, 7, 1, 12, tzinfo=timezone.utc) - SYNC_OVERLAP
+    assert convert_datestring(summer.isoformat()) == "2023-07-01T11:59:00.000+00:00"
+
+
+@mock.patch("klass.classes.poller.KlassVersion")
+@mock.patch("klass.classes.poller.classification_by_id")
+@mock.patch("klass.classes.poller.classifications")
+def test_refresh_recreates_in_the_pollers_cache(
+    mock_classifications, mock_classification_by_id, mock_version
+):
+    mock_classifications.return_value = mock_returns.classifications_success()
+    classification = mock_returns.classification_by_id_success()
+    mock_classification_by_id.return_value = classification
+    version_id = classification["versions"][0]["_links"]["self"]["href"].split("/")[-1]
+    key = ("version", version_id, 3, "en", True)
+    cache = KlassObjectCache()
+    cache.get_or_create(key, object)
+    report = klass.KlassChangePoller(cache=cache, refresh=True).poll()
+    assert report["refreshed"] == 1
+    mock_version.assert_called_once_with(version_id, 3, "en", True)
+    assert cache.get_or_create(key, object) is mock_version.return_value
+    assert len(klass.utility.object_cache.object_cache) == 0
+
+
+@mock.patch("klass.classes.poller.classifications")
+def test_poll_survives_failing_subscriber(mock_classifications):
+    mock_classifications.return_value = {"_embedded": {}}
+    poller = klass.KlassChangePoller(cache=KlassObjectCache())
+    calls = []
+
+    @poller.subscribe
+    def failing(report):
+        raise RuntimeError("broken")
+
+    poller.subscribe(calls.append)
+    report = poller.poll()
+    assert report["changed"] == []
+    assert calls == [report]
+    assert poller.history == [report]
+
+
+@mock.patch("klass.classes.poller.classifications")
+def test_poller_start_and_stop(mock_classifications):
+    mock_classifications.return_value = {"_embedded": {}}
+    poller = klass.KlassChangePoller(cache=KlassObjectCache())
+    polled = mock.Mock()
+    poller.subscribe(polled)
+    poller.start(interval=0.01)
+    assert poller.running
+    for _ in range(200):
+        if polled.called:
+            break
+        poller._stop.wait(0.01)
+    poller.stop()
+    assert not poller.running
+    assert polled.called
+
+
+@mock.patch("klass.classes.poller.classification_by_id")
+@mock.patch("klass.classes.poller.classifications")
+def test_poll_drops_cached_listings_on_changes(
+    mock_classifications, mock_classification_by_id, tmp_path
+):
+    mock_classifications.return_value = mock_returns.classifications_success()
+    mock_classification_by_id.return_value = mock_returns.classification_by_id_success()
+    metadata = KlassMetadataCache(tmp_path)
+    for name in ["classifications-False", "classificationfamilies-20-{}", "sections"]:
+        metadata.refresh(name, lambda: [])
+    klass.KlassChangePoller(cache=KlassObjectCache(), metadata=metadata).poll()
+    assert metadata.get("sections", lambda: None) == []
+    assert metadata.get("classifications-False", lambda: None) is None
+    assert metadata.get("classificationfamilies-20-{}", lambda: None) is None
@@ -0,0 +1,88 @@
+import json
+import time
+from unittest import mock
+
+import pandas as pd
+import requests
+
+import klass
+import tests
+from klass.utility.profiling import UNATTRIBUTED
+from klass.utility.profiling import KlassProfiler
+from klass.utility.profiling import phase
+from klass.utility.profiling import profiled
+
+
+@profiled("outer")
+def _outer():
+    with phase("network"):
+        time.sleep(0.01)
+        with phase("json"):
+            time.sleep(0.01)
+    return _inner()
+
+
+@profiled("inner")
+def _inner():
+    with phase("pandas"):
+        return [0] * 100_000
+
+
+def test_nested_calls_count_towards_the_outermost():
+    with KlassProfiler() as profiler:
+        _outer()
+    assert [call["name"] for call in profiler.calls] == ["outer"]
+    phases = profiler.calls[0]["phases"]
+    assert set(phases) == {"network", "json", "pandas"}
+    # The json phase runs inside the network phase, and is only counted once
+    assert phases["network"] + phases["json"] <= profiler.calls[0]["seconds"]
+    assert profiler.calls[0]["peak_memory"] > 0
+
+
+def test_nothing_recorded_without_a_profiler():
+    profiler = KlassProfiler()
+    _outer()
+    assert profiler.calls == []
+    assert profiler.report().empty
+
+
+def test_phases_outside_calls_are_unattributed():
+    with KlassProfiler(trace_memory=False) as profiler:
+        with phase("pandas"):
+            pass
+    report = profiler.report()
+    assert report.index.tolist() == [UNATTRIBUTED]
+    assert profiler.calls == []
+
+
+def test_profiler_as_decorator_and_report():
+    profiler = KlassProfiler(trace_memory=False)
+
+    @profiler
+    def job():
+        _outer()
+        _outer()
+
+    job()
+    report = profiler.report()
+    assert report.loc["outer", "calls"] == 2
+    assert pd.isna(report.loc["outer", "peak_memory_mb"])
+    summary = json.loads(profiler.to_json())["summary"]
+    assert summary[0]["name"] == "outer"
+    assert summary[0]["calls"] == 2
+
+
+@mock.patch.object(requests.Session, "send")
+def test_klass_codes_split_into_phases(mock_response):
+    mock_response.return_value = tests.mock_response_data.codes_fake_content()
+    with KlassProfiler() as profiler:
+        codes = klass.KlassCodes(36, "2023-01-01")
+        codes.to_dict()
+    report = profiler.report()
+    assert set(report.index) == {"KlassCodes", "KlassCodes.to_dict"}
+    assert report.loc["KlassCodes", "network"] > 0
+    assert report.loc["KlassCodes", "json"] > 0
+    # The codes are normalized into .data when to_dict() first needs them
+    assert report.loc["KlassCodes.to_dict", "normalize"] > 0
+    assert report.loc["KlassCodes.to_dict", "pandas"] > 0
+    assert "KlassCodes" in str(profiler)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import klass
+import tests.mock_request_functions as mock_returns
+
+
+@pytest.fixture
+def search_index():
+    index = klass.KlassSearchIndex()
+    index.add_classification(0, "Standard for mocking tests", "Kjønn og alder")
+    index.add_codes(0, "Standard for mocking tests", mock_returns.codes_at_success())
+    index.add_classification(1, "Næringsgruppering", "Fiske og akvakultur")
+    index.add_codes(
+        1,
+        "Næringsgruppering",
+        pd.DataFrame(
+            {"code": ["03.2", "03.1"], "name": ["Akvakultur", "Fiske og fangst"]}
+        ),
+    )
+    index.add_variants(1, "Næringsgruppering", {"1959": "Fiskerinæringer"})
+    return index
+
+
+def test_search_index_finds_code_in_codelist(search_index):
+    result = search_index.search("akvakultur", kind="code")
+    assert isinstance(result, pd.DataFrame)
+    assert result.iloc[0]["item_id"] == "03.2"
+    assert result.iloc[0]["classification_id"] == 1
+
+
+def test_search_index_prefix_and_norwegian_chars(search_index):
+    result = search_index.search("naeringsgr")
+    assert result.iloc[0]["kind"] == "classification"
+    assert result.iloc[0]["item_name"] == "Næringsgruppering"
+
+
+def test_search_index_ranks_all_words_first(search_index):
+    result = search_index.search("fiske fangst")
+    assert result.iloc[0]["item_id"] == "03.1"
+
+
+def test_search_index_empty_query(search_index):
+    assert not len(search_index.search(""))
+    assert not len(search_index.search("finnesikke"))
+
+
+def test_search_index_remove_classification(search_index):
+    search_index.remove_classification(1)
+    assert not len(search_index.search("akvakultur"))
+    assert len(search_index.search("babygutt"))
+
+
+def test_search_index_save_load(search_index, tmp_path):
+    search_index.remove_classification(0)
+    path = tmp_path / "index.json"
+    search_index.save(path)
+    loaded = klass.KlassSearchIndex.load(path)
+    assert len(loaded) == len(search_index)
+    pd.testing.assert_frame_equal(
+        loaded.search("akva"), search_index.search("akva"), check_like=True
+    )
+
+
+@mock.patch("klass.classes.search_index.codes_at")
+@mock.patch("klass.classes.search_index.classification_by_id")
+def test_search_index_from_catalog(mock_classification, mock_codes_at):
+    mock_classification.return_value = mock_returns.classification_by_id_success()
+    mock_codes_at.return_value = mock_returns.codes_at_success()
+    index = klass.KlassSearchIndex.from_catalog(classification_ids=[0])
+    assert len(index) == 4
+    assert index.search("gutt").iloc[0]["item_id"] == "2"
+    assert str(index)
+    assert repr(index)
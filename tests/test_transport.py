@@ -0,0 +1,169 @@
+from unittest import mock
+
+import pytest
+import requests
+
+import klass
+import klass.config as config
+import tests
+import tests.mock_request_functions as mock_returns
+from klass.requests.klass_requests import correspondence_table_by_id_call
+from klass.requests.klass_requests import variants_by_id_call
+from klass.requests.session import get_json
+from klass.requests.session import get_transport
+from klass.requests.session import prefetch
+from klass.requests.session import set_transport
+from klass.requests.session import use_transport
+from klass.requests.transport import KlassTransport
+from klass.requests.transport import MemoryTransport
+from klass.requests.transport import RequestsTransport
+from klass.requests.transport import TransportResponse
+from klass.requests.transport import request_key
+from klass.requests.validate import validate_params
+
+URL = config.BASE_URL + "classifications/36"
+
+
+def test_request_key_ignores_parameter_order():
+    assert request_key(URL, {"b": 1, "a": "x y"}) == request_key(
+        URL, {"a": "x y", "b": 1}
+    )
+    assert request_key(URL) == URL
+
+
+def test_memory_transport_answers_request_functions():
+    params = validate_params({"language": "nb", "includeFuture": False})
+    transport = MemoryTransport()
+    transport.add(URL, params, json_body={"name": "Utdanning"})
+    with use_transport(transport):
+        assert klass.classification_by_id(36)["name"] == "Utdanning"
+    assert transport.calls == [request_key(URL, params)]
+    assert isinstance(get_transport(), RequestsTransport)
+
+
+def test_memory_transport_missing_response_raises_http_error():
+    with use_transport(MemoryTransport()), pytest.raises(requests.HTTPError) as e:
+        get_json(URL, {"language": "nb"})
+    assert e.value.response is not None
+    assert e.value.response.status_code == 404
+
+
+def test_set_transport_returns_previous():
+    transport = MemoryTransport()
+    previous = set_transport(transport)
+    try:
+        assert get_transport() is transport
+    finally:
+        set_transport(previous)
+    assert previous is None
+
+
+@mock.patch.object(requests.Session, "send")
+def test_requests_transport_through_session(mock_response):
+    mock_response.return_value = tests.mock_response_data.sections_fake_content()
+    response = RequestsTransport().get(config.BASE_URL + "ssbsections")
+    assert response.ok
+    assert response.json()["_embedded"]["ssbSections"]
+    assert mock_response.call_count == 1
+
+
+def test_transport_response_round_trips_to_requests():
+    response = TransportResponse(500, b'{"error": true}', {"X-Test": "1"}, URL)
+    converted = response.to_requests_response()
+    assert converted.status_code == 500
+    assert converted.json() == {"error": True}
+    assert converted.headers["x-test"] == "1"
+
+
+def test_get_many_keeps_order():
+    transport = MemoryTransport()
+    transport.add(URL, json_body=1)
+    transport.add(URL + "/changes", json_body=2)
+    responses = transport.get_many([(URL + "/changes", None), (URL, None)])
+    assert [response.json() for response in responses] == [2, 1]
+
+
+def test_transport_must_implement_get():
+    with pytest.raises(TypeError):
+        KlassTransport()
+
+
+def test_requests_transport_get_many_keeps_order():
+    transport = RequestsTransport(max_workers=4)
+    with mock.patch.object(
+        transport,
+        "get",
+        side_effect=lambda url, params: TransportResponse(200, b"1", url=url),
+    ):
+        responses = transport.get_many([(URL + str(i), None) for i in range(10)])
+    assert [response.url for response in responses] == [URL + str(i) for i in range(10)]
+
+
+def test_prefetch_answers_get_json_from_one_batch():
+    transport = MemoryTransport()
+    transport.add(URL, json_body=1)
+    with (
+        use_transport(transport),
+        mock.patch.object(transport, "get_many", wraps=transport.get_many) as batches,
+    ):
+        with prefetch([(URL, None), (URL, {})]) as sent:
+            assert get_json(URL) == 1
+            assert get_json(URL) == 1
+        assert get_json(URL) == 1
+    assert sent == 1
+    assert batches.call_count == 1
+    assert len(transport.calls) == 2
+
+
+def test_version_sends_variants_and_correspondences_in_batches(klass_version_success):
+    version = klass_version_success
+    second = dict(version.classificationVariants[0])
+    second["_links"] = {"self": {"href": config.BASE_URL + "variants/1960"}}
+    version.classificationVariants = [*version.classificationVariants, second]
+    transport = MemoryTransport()
+    for variant_id in version.variants_simple():
+        transport.add(
+            *variants_by_id_call(variant_id),
+            json_body=mock_returns.variants_by_id_success(),
+        )
+    for correspondence_id in version.correspondences_simple():
+        transport.add(
+            *correspondence_table_by_id_call(correspondence_id),
+            json_body=mock_returns.correspondence_table_by_id_success(),
+        )
+    with (
+        use_transport(transport),
+        mock.patch.object(transport, "get_many", wraps=transport.get_many) as batches,
+    ):
+        assert len(version.get_all_variants()) == 2
+        assert len(version.get_all_correspondences()) == 1
+        # Variants already in the object cache are not requested again
+        version.get_all_variants()
+    assert [len(call.args[0]) for call in batches.call_args_list] == [2, 1]
+    assert len(transport.calls) == 3
+
+
+def test_httpx_transport_get():
+    httpx = pytest.importorskip("httpx")
+    from klass.requests.transport import HttpxTransport
+
+    def handler(request):
+        return httpx.Response(200, json={"path": request.url.path})
+
+    with HttpxTransport(http2=False) as transport:
+        transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+        assert transport.get(URL).json() == {"path": "/api/klass/v1/classifications/36"}
+        assert transport.get(URL).elapsed >= 0
+
+
+def test_httpx_transport_raises_requests_errors():
+    httpx = pytest.importorskip("httpx")
+    from klass.requests.transport import HttpxTransport
+
+    def handler(request):
+        raise httpx.ConnectError("Connection lost", request=request)
+
+    with HttpxTransport(http2=False) as transport:
+        transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+        with pytest.raises(requests.ConnectionError):
+            transport.get(URL)
@@ -0,0 +1,69 @@
+import datetime
+
+import pytest
+
+from klass.requests import klass_requests
+from klass.requests import validate
+
+
+def test_validate_params_keeps_table_order_and_drops_unknown():
+    params = {
+        "query": "nus",
+        "unknown": "dropped",
+        "includeFuture": True,
+        "language": "NB",
+        "from": "2023-01-01",
+    }
+    result = validate.validate_params(params)
+    assert list(result) == ["language", "includeFuture", "from", "query"]
+    assert result["language"] == "nb"
+    assert result["includeFuture"] == "true"
+
+
+def test_validate_params_result_is_not_shared():
+    first = validate.validate_params({"date": "2023-01-01"})
+    first["date"] = "changed"
+    assert validate.validate_params({"date": "2023-01-01"})["date"] == "2023-01-01"
+
+
+def test_validate_params_does_not_confuse_bools_and_ints():
+    assert validate.validate_params({"includeFuture": True})["includeFuture"] == "true"
+    with pytest.raises(TypeError):
+        validate.validate_params({"includeFuture": 1})
+
+
+def test_validate_params_raises_on_bad_value():
+    with pytest.raises(ValueError):
+        validate.validate_params({"selectLevel": "one"})
+
+
+@pytest.mark.parametrize(
+    "date, expected",
+    [
+        ("2023-01-31", "2023-01-31"),
+        ("31 January 2023", "2023-01-31"),
+        ("2023-01-31T12:00:00", "2023-01-31"),
+    ],
+)
+def test_validate_date_formats(date, expected):
+    assert validate.validate_date(date) == expected
+
+
+def test_validate_date_raises():
+    with pytest.raises(ValueError, match="YYYY-MM-DD"):
+        validate.validate_date("not a date")
+
+
+def test_date_parsing_is_shared_and_cached():
+    validate.parse_datestring.cache_clear()
+    klass_requests.convert_datestring("2031-05-17", "yyyy-mm-dd")
+    validate.validate_date("2031-05-17")
+    info = validate.parse_datestring.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert validate.parse_datestring("2031-05-17") == datetime.datetime(2031, 5, 17)
+
+
+def test_convert_datestring_unknown_return_type():
+    with pytest.raises(ValueError):
+        klass_requests.convert_datestring("2023-01-01", "unknown")
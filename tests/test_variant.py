@@ -1,3 +1,8 @@
+from unittest import mock
+
+import pandas as pd
+
+
 def test_variant_classificationitems_has_expected_content(
     klass_variant_success,
 ):
@@ -27,3 +32,12 @@ def test_variant_to_dict(klass_variant_success):
     assert len(dict_check)
     assert len(default_dict_check)
     assert default_dict_check["missing_key"] == "other"
+
+
+@mock.patch("klass.classes.variant.pd.json_normalize", wraps=pd.json_normalize)
+def test_variant_data_is_lazy(mock_normalize, klass_variant_success):
+    assert klass_variant_success.name
+    mock_normalize.assert_not_called()
+    assert len(klass_variant_success.data)
+    klass_variant_success.to_dict()
+    mock_normalize.assert_called_once()
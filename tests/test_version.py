@@ -53,3 +53,12 @@ def test_version_get_variant_missing_identifier_raises(klass_version_success):
 def test_version_get_variant_non_string_search_term_raises(klass_version_success):
     with pytest.raises(ValueError):
         klass_version_success.get_variant(search_term=123)  # type: ignore[arg-type]
+
+
+@mock.patch("klass.classes.version.pd.json_normalize", wraps=pd.json_normalize)
+def test_version_data_is_lazy(mock_normalize, klass_version_success):
+    assert klass_version_success.variants_simple()
+    mock_normalize.assert_not_called()
+    assert len(klass_version_success.data)
+    assert len(klass_version_success.data)
+    mock_normalize.assert_called_once()
@@ -0,0 +1,72 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from klass.utility.versions import VersionIndex
+
+
+@pytest.fixture
+def version_index():
+    href = "https://data.ssb.no/api/klass/v1/versions/{}"
+    return VersionIndex(
+        [
+            {
+                "validFrom": "2024-01-01",
+                "_links": {"self": {"href": href.format(3)}},
+            },
+            {
+                "validFrom": "2015-01-01",
+                "validTo": "2020-01-01",
+                "_links": {"self": {"href": href.format(1)}},
+            },
+            {
+                "validFrom": "2020-01-01",
+                "validTo": "2022-01-01",
+                "_links": {"self": {"href": href.format(2)}},
+            },
+        ]
+    )
+
+
+def test_version_index_sorted(version_index):
+    assert version_index.version_ids == [1, 2, 3]
+    assert version_index.latest() == 3
+    assert len(version_index) == 3
+    assert "2024-01-01->" in repr(version_index)
+
+
+def test_version_id_at_boundaries(version_index):
+    assert version_index.version_id_at("2014-12-31") is None
+    assert version_index.version_id_at("2015-01-01") == 1
+    assert version_index.version_id_at("2019-12-31") == 1
+    assert version_index.version_id_at("2020-01-01") == 2
+    assert version_index.version_id_at("2023-06-01") is None
+    assert version_index.version_id_at(datetime.date(2030, 1, 1)) == 3
+
+
+def test_version_ids_at_keeps_index(version_index):
+    dates = pd.Series(
+        ["2016-05-17", "2023-06-01", "2024-01-01", "2010-01-01"], index=list("abcd")
+    )
+    result = version_index.version_ids_at(dates)
+    assert list(result.index) == list("abcd")
+    assert result.tolist() == [1, pd.NA, 3, pd.NA]
+
+
+def test_version_ids_at_empty_index():
+    result = VersionIndex([]).version_ids_at(["2020-01-01"])
+    assert result.isna().all()
+
+
+def test_classification_get_version_at_date(klass_classification_success):
+    classification = klass_classification_success
+    assert classification.version_id_at("2020-01-01") == 0
+    assert classification.version_ids_at(
+        ["2020-01-01", "2051-01-01"]
+    ).isna().tolist() == [
+        False,
+        True,
+    ]
+    with pytest.raises(ValueError):
+        classification.get_version(date="2051-01-01")
@@ -1,3 +1,5 @@
+import threading
+import time
 from unittest import mock
 
 import klass
@@ -25,3 +27,47 @@ def test_gui_formatting_empty_result(klass_classification_search_empty):
     )
     assert "no matching" in result.lower()
     assert isinstance(result, str)
+
+
+@mock.patch("klass.widgets.search_ipywidget.KlassSearchClassifications")
+def test_search_html_is_cached(mock_search, klass_classification_search_success):
+    search_ipywidget = klass.widgets.search_ipywidget
+    search_ipywidget.search_cache.clear()
+    mock_search.return_value = klass_classification_search_success
+    first = search_ipywidget.search_html("Nus", "320")
+    assert search_ipywidget.search_html(" nus ", "320") == first
+    assert mock_search.call_count == 1
+    search_ipywidget.search_html("Nus")
+    assert mock_search.call_count == 2
+
+
+@mock.patch("klass.widgets.search_ipywidget.search_html")
+def test_gui_debounces_typing(mock_search_html):
+    searched = threading.Event()
+    mock_search_html.side_effect = lambda *args: searched.set() or "found"
+    gui = klass.widgets.search_ipywidget.search_classification(debounce=0.05)
+    search_term = gui.children[0].children[1]
+    search_term.value = "Nu"
+    search_term.value = "Nus"
+    search_term.value = "Nus 2000"
+    assert searched.wait(5)
+    time.sleep(0.1)
+    mock_search_html.assert_called_once_with("Nus 2000", "", True, None)
+
+
+def test_gui_searches_local_index():
+    index = klass.KlassSearchIndex().add_classification(
+        36, "Standard for utdanningsgruppering"
+    )
+    result = klass.widgets.search_ipywidget.search_html("utdanning", index=index)
+    assert "KlassClassification(36)" in result
+
+
+def test_local_index_search_sees_added_classifications():
+    index = klass.KlassSearchIndex().add_classification(
+        36, "Standard for utdanningsgruppering"
+    )
+    search_html = klass.widgets.search_ipywidget.search_html
+    assert "KlassClassification(7)" not in search_html("utdanning", index=index)
+    index.add_classification(7, "Klassifisering av utdanningsnivå")
+    assert "KlassClassification(7)" in search_html("utdanning", index=index)